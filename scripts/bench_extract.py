@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Extractor benchmark over the checked-in page corpus (scripts/bench_corpus/).
+
+Every extractor runs end to end - fetch through the shared engine, parse,
+map fields - with the engine replaying corpus pages instead of the network,
+so the numbers are parse cost only and stay comparable between commits:
+
+    python scripts/bench_extract.py                          # all extractors
+    python scripts/bench_extract.py get_roster search_player --repeat 500
+    python scripts/bench_extract.py --save before.json       # keep the numbers
+
+Each extractor runs in a process of its own so its peak RSS is not shared
+with the others. The report shows calls/sec, pages/sec, p50/p99 latency per
+call and peak RSS (plus the RSS before the first call).
+
+The corpus is a manifest of page files and the URLs each one answers for;
+to add a page, drop the saved HTML in bench_corpus/ and list it there.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_corpus')
+
+TEAM_ID = 3336
+SEASON = 2025
+PLAYER_ID = 712345
+PLAYER_NAME = 'Andrei Popescu'
+PROFILE_URL = f'https://www.transfermarkt.com/andrei-popescu/profil/spieler/{PLAYER_ID}'
+LEAGUE_URL = 'https://www.transfermarkt.com/wettbewerb/marktwerte/wettbewerb/RO2'
+
+
+def load_manifest(root=CORPUS_DIR):
+    with open(os.path.join(root, 'manifest.json'), encoding='utf-8') as f:
+        return json.load(f)['pages']
+
+
+def corpus_files(kind=None, root=CORPUS_DIR):
+    """Paths of the corpus pages, optionally one kind only"""
+    return [(entry['kind'], os.path.join(root, entry['file'])) for entry in load_manifest(root)
+            if kind is None or entry['kind'] == kind]
+
+
+class CorpusArchive:
+    """Corpus pages by normalized URL; stands in for the html archive in replay mode"""
+
+    def __init__(self, root=CORPUS_DIR):
+        from http_cache import normalize_url
+        self.normalize = normalize_url
+        self.pages = {}
+        self.by_kind = {}
+        for entry in load_manifest(root):
+            with open(os.path.join(root, entry['file']), encoding='utf-8') as f:
+                body = f.read()
+            self.by_kind[entry['kind']] = body
+            for url in entry['urls']:
+                self.pages[normalize_url(url)] = body
+        self.stats = {'replayed': 0, 'missing': 0}
+
+    def lookup(self, url):
+        body = self.pages.get(self.normalize(url))
+        self.stats['replayed' if body is not None else 'missing'] += 1
+        return body
+
+    def report(self, mode):
+        return f"Corpus: {self.stats['replayed']} pages served | {self.stats['missing']} not in corpus"
+
+
+# --- Extractors -------------------------------------------------------------
+# Each setup returns a zero-argument call running the extractor once; the
+# number is how many corpus pages one call reads.
+
+def _get_roster(loop, corpus):
+    import scraper_complete
+    return lambda: loop.run_until_complete(scraper_complete.get_roster(TEAM_ID))
+
+
+def _get_player_details(loop, corpus):
+    import scraper_complete
+    return lambda: loop.run_until_complete(scraper_complete.get_player_details(PLAYER_ID))
+
+
+def _scrape_stats(loop, corpus):
+    import scrape_everything
+    return lambda: loop.run_until_complete(scrape_everything.scrape_stats(PROFILE_URL))
+
+
+def _scrape_transfers(loop, corpus):
+    import scrape_everything
+    return lambda: loop.run_until_complete(scrape_everything.scrape_transfers(PROFILE_URL))
+
+
+def _get_club_stats(loop, corpus):
+    import scrape_club_stats
+    return lambda: loop.run_until_complete(scrape_club_stats.get_club_stats(TEAM_ID, SEASON))
+
+
+def _get_club_transfers(loop, corpus):
+    import scrape_club_transfers
+    return lambda: loop.run_until_complete(scrape_club_transfers.get_club_transfers(TEAM_ID, SEASON))
+
+
+def _parse_market_value_page(loop, corpus):
+    import scraper
+    html = corpus.by_kind['market_values']
+    return lambda: scraper.parse_market_value_page(html, LEAGUE_URL)
+
+
+def _search_player(loop, corpus):
+    import scraper_details
+    return lambda: scraper_details.search_player(PLAYER_NAME)
+
+
+EXTRACTORS = {
+    'get_roster': (1, _get_roster),
+    'get_player_details': (2, _get_player_details),
+    'scrape_stats': (1, _scrape_stats),
+    'scrape_transfers': (1, _scrape_transfers),
+    'get_club_stats': (1, _get_club_stats),
+    'get_club_transfers': (1, _get_club_transfers),
+    'parse_market_value_page': (1, _parse_market_value_page),
+    'search_player': (1, _search_player),
+}
+
+
+def peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def percentile(sorted_values, pct):
+    return sorted_values[min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))]
+
+
+def measure(name, repeat, warmup=3):
+    """Run one extractor in this process; returns its result dict"""
+    os.environ['TM_CACHE'] = '0'
+    import fetch_engine
+    from coalescer import RequestCoalescer
+
+    corpus = CorpusArchive()
+    engine = fetch_engine.FetchEngine(mode='replay', archive=corpus)
+    fetch_engine.set_engine(engine)
+    loop = asyncio.new_event_loop()
+    pages_per_call, setup = EXTRACTORS[name]
+    call = setup(loop, corpus)
+    rss_base = peak_rss_mb()
+
+    result = None
+    for _ in range(warmup):
+        engine.coalescer = RequestCoalescer()
+        result = call()
+    latencies = []
+    for _ in range(repeat):
+        # Fresh in-run LRU, so every call reads its pages from the corpus again
+        engine.coalescer = RequestCoalescer()
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    loop.close()
+
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        'extractor': name,
+        'calls': repeat,
+        'calls_per_sec': repeat / total,
+        'pages_per_sec': repeat * pages_per_call / total,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'rss_base_mb': rss_base,
+        'rss_peak_mb': peak_rss_mb(),
+        'empty': not result,
+        'missing_pages': corpus.stats['missing'],
+    }
+
+
+def run_isolated(name, repeat):
+    """measure() in a child process; None (and its stderr) if it failed"""
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', name, '--repeat', str(repeat)],
+                          capture_output=True, text=True)
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith('RESULT '):
+            return json.loads(line[len('RESULT '):])
+    print(f"{name}: failed (exit {proc.returncode})\n{proc.stderr[-2000:]}")
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('extractors', nargs='*', help=f"default: all ({', '.join(EXTRACTORS)})")
+    parser.add_argument('--repeat', type=int, default=200, help='timed calls per extractor')
+    parser.add_argument('--save', help='also write the results to this JSON file')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    unknown = [name for name in args.extractors if name not in EXTRACTORS]
+    if unknown:
+        parser.error(f"unknown extractor(s): {', '.join(unknown)}")
+
+    if args.child:
+        print('RESULT ' + json.dumps(measure(args.child, args.repeat)), flush=True)
+        return
+
+    results = []
+    print(f"{'extractor':24} {'calls/s':>8} {'pages/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'RSS MB':>8} {'base MB':>8}")
+    for name in args.extractors or EXTRACTORS:
+        r = run_isolated(name, args.repeat)
+        if r is None:
+            continue
+        results.append(r)
+        note = ''
+        if r['missing_pages']:
+            note = f"  ({r['missing_pages']} page requests not in the corpus)"
+        elif r['empty']:
+            note = '  (empty result - corpus and extractor disagree)'
+        print(f"{name:24} {r['calls_per_sec']:8.1f} {r['pages_per_sec']:8.1f} {r['p50_ms']:8.2f} "
+              f"{r['p99_ms']:8.2f} {r['rss_peak_mb']:8.1f} {r['rss_base_mb']:8.1f}{note}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'repeat': args.repeat, 'at': time.strftime('%Y-%m-%d %H:%M:%S'), 'results': results}, f, indent=2)
+        print(f"Saved to {args.save}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Parse benchmark: BeautifulSoup code paths vs the lxml backend (tm_parse.py).
+
+Pages come from the record/replay archive (default), the checked-in corpus
+(bench_corpus/, see bench_extract.py) or from .html files:
+
+    python scripts/bench_parse.py                        # every archived page
+    python scripts/bench_parse.py --corpus               # offline, same pages every run
+    python scripts/bench_parse.py --kind roster          # one page kind
+    python scripts/bench_parse.py pages/*.html --kind profile
+
+For each kind both implementations extract the same fields from every page;
+the report shows pages/sec, CPU ms per page and the speed-up.
+"""
+
+import argparse
+import os
+import re
+import time
+
+from bs4 import BeautifulSoup
+
+import tm_parse
+
+POSITIONS = ['Goalkeeper', 'Defender', 'Midfield', 'Attack', 'Centre-Back', 'Left-Back', 'Right-Back',
+             'Defensive Midfield', 'Central Midfield', 'Attacking Midfield', 'Left Winger', 'Right Winger',
+             'Centre-Forward', 'Second Striker', 'Left Midfield', 'Right Midfield']
+
+
+# --- BeautifulSoup reference paths (as the scrapers did it before tm_parse) ---
+
+def bs4_roster(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    players = {}
+    table = soup.find('table', class_='items')
+    if not table:
+        return players
+    for row in table.find_all('tr'):
+        link = row.find('a', href=lambda x: x and '/profil/spieler/' in str(x))
+        if not link:
+            continue
+        match = re.search(r'/spieler/(\d+)', link['href'])
+        if not match or match.group(1) in players:
+            continue
+        players[match.group(1)] = [cell.get_text(strip=True) for cell in row.find_all('td')]
+    return players
+
+
+def bs4_profile(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    info = {}
+    for label_el in soup.select('div.info-table span.info-table__content--regular'):
+        value_el = label_el.find_next_sibling('span')
+        if value_el:
+            info[label_el.get_text(strip=True).lower().rstrip(':')] = value_el.get_text(strip=True)
+    pos_el = soup.select_one('div.detail-position__position')
+    stats_box = soup.find('div', class_='data-header__box--big')
+    spans = [s.get_text(strip=True) for s in stats_box.find_all('span')] if stats_box else []
+    return info, pos_el.get_text(strip=True) if pos_el else None, spans
+
+
+def bs4_stats(html):
+    soup = BeautifulSoup(html, 'lxml')
+    totals = []
+    for row in soup.select('tfoot tr'):
+        cells = row.select('td')
+        if cells and 'total' in cells[0].text.lower():
+            totals = [c.text.strip() for c in cells]
+            break
+    seasons = []
+    for row in soup.select('table.items tbody tr'):
+        cells = row.select('td')
+        if len(cells) >= 5:
+            season = row.select_one('td.zentriert a')
+            seasons.append((season.text.strip() if season else None,
+                            [c.text.strip() for c in row.select('td.zentriert')]))
+    return totals, seasons
+
+
+def bs4_transfers(html):
+    soup = BeautifulSoup(html, 'lxml')
+    transfers = []
+    for row in soup.select('div.tm-transfer-history tbody tr, table.transfer-history tbody tr'):
+        first = row.select_one('td:first-child')
+        clubs = row.select('td.no-border-links a, td.vereinsname a')
+        transfers.append((first.text.strip() if first else None, [c.text.strip() for c in clubs]))
+    return transfers
+
+
+# --- lxml backend ---------------------------------------------------------
+
+def lxml_roster(html):
+    return tm_parse.roster_rows(tm_parse.document(html))
+
+
+def lxml_profile(html):
+    doc = tm_parse.document(html)
+    return tm_parse.profile(doc), tm_parse.profile_header(doc)
+
+
+def lxml_stats(html):
+    doc = tm_parse.document(html)
+    return tm_parse.stats_footer(doc), tm_parse.stats_rows(doc)
+
+
+def lxml_transfers(html):
+    return tm_parse.transfer_rows(tm_parse.document(html))
+
+
+CASES = {
+    'roster': (bs4_roster, lxml_roster),
+    'profile': (bs4_profile, lxml_profile),
+    'stats': (bs4_stats, lxml_stats),
+    'transfers': (bs4_transfers, lxml_transfers),
+}
+
+
+def guess_kind(name):
+    for marker, kind in (('kader', 'roster'), ('leistungsdaten', 'stats'),
+                         ('transfers', 'transfers'), ('profil', 'profile')):
+        if marker in name:
+            return kind
+    return None
+
+
+def load_pages(paths, kind, corpus=False):
+    """{kind: [html, ...]} from files, the corpus or, without either, the archive"""
+    pages = {}
+    if corpus:
+        from bench_extract import corpus_files
+        for page_kind, path in corpus_files(kind):
+            if page_kind in CASES:
+                with open(path, encoding='utf-8') as f:
+                    pages.setdefault(page_kind, []).append(f.read())
+        return pages
+    if paths:
+        for path in paths:
+            page_kind = kind or guess_kind(os.path.basename(path))
+            if page_kind in CASES:
+                with open(path, encoding='utf-8') as f:
+                    pages.setdefault(page_kind, []).append(f.read())
+        return pages
+    from html_archive import HtmlArchive
+    archive = HtmlArchive()
+    for _, page_kind, body in archive.iter_pages(kind):
+        if page_kind in CASES:
+            pages.setdefault(page_kind, []).append(body)
+    archive.close()
+    return pages
+
+
+def bench(fn, pages, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        for html in pages:
+            fn(html)
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('paths', nargs='*', help='.html files (default: the html archive)')
+    parser.add_argument('--corpus', action='store_true', help='use the checked-in bench_corpus/ pages')
+    parser.add_argument('--kind', choices=sorted(CASES))
+    parser.add_argument('--repeat', type=int, default=3, help='runs per implementation (best is kept)')
+    args = parser.parse_args()
+
+    pages = load_pages(args.paths, args.kind, args.corpus)
+    if not pages:
+        print("No pages to benchmark - record some with --record or pass .html files")
+        return
+
+    print(f"{'kind':10} {'pages':>6} {'bs4 p/s':>9} {'lxml p/s':>9} {'bs4 ms':>8} {'lxml ms':>8} {'speed-up':>9}")
+    for kind, htmls in sorted(pages.items()):
+        slow, fast = CASES[kind]
+        t_slow = bench(slow, htmls, args.repeat)
+        t_fast = bench(fast, htmls, args.repeat)
+        n = len(htmls)
+        print(f"{kind:10} {n:6} {n / t_slow:9.1f} {n / t_fast:9.1f} "
+              f"{t_slow / n * 1000:8.2f} {t_fast / n * 1000:8.2f} {t_slow / t_fast:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
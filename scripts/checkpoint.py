@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Append-only checkpoint journal for resumable scrapes.
+
+Long runs used to rewrite their whole progress file (every player scraped so
+far) after each team or league, so checkpointing got slower as the run grew.
+A journal instead appends one JSON line per finished unit:
+
+    {"kind": "player", "key": 568544, "data": {...}}
+
+and fsyncs after each batch, so a checkpoint costs the same whatever the size
+of the run. On start, replay() reads the lines back (last record per
+kind/key wins; a last line torn by a crash is cut off, a corrupt line before
+it is skipped). When most lines have been superseded the file is compacted:
+live records are written to a temp file, fsynced and swapped in with
+os.replace(), so the journal is never half rewritten.
+
+    journal = CheckpointJournal('complete_progress.jsonl')
+    for kind, key, data in journal.replay():
+        ...
+    journal.append('player', player_id, player)
+    journal.sync()
+"""
+
+import json
+import os
+
+COMPACT_MIN_LINES = 1000    # don't bother compacting small journals
+
+
+class CheckpointJournal:
+    """Crash-safe JSONL journal of (kind, key, data) records"""
+
+    def __init__(self, path):
+        self.path = path
+        self.records = {}     # (kind, key) -> data, last write wins
+        self.lines = 0
+        self._file = None
+
+    def replay(self):
+        """Load the journal; returns [(kind, key, data)] in first-written order.
+
+        Only the last line can be torn by a crash: it is dropped and cut from
+        the file. An unreadable line before it is corruption - it is skipped
+        with a warning (its unit is redone) and the records after it are kept.
+        """
+        self.records = {}
+        self.lines = 0
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                lines = f.readlines()
+            valid = 0
+            for number, line in enumerate(lines, 1):
+                last = number == len(lines)
+                if last and not line.endswith(b'\n'):
+                    break    # torn tail from a crash
+                try:
+                    rec = json.loads(line)
+                    self.records[(rec['kind'], rec['key'])] = rec.get('data')
+                except (ValueError, KeyError, TypeError):
+                    if last:
+                        break
+                    print(f"Warning: {self.path} line {number} is unreadable, skipped")
+                valid += len(line)
+                self.lines += 1
+            self._truncate_to(valid)
+        return [(kind, key, data) for (kind, key), data in self.records.items()]
+
+    def _truncate_to(self, valid):
+        # Drop a partial last line so new appends start on a clean line
+        if os.path.getsize(self.path) != valid:
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid)
+
+    def __len__(self):
+        return len(self.records)
+
+    def append(self, kind, key, data=None):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps({'kind': kind, 'key': key, 'data': data}, ensure_ascii=False) + '\n')
+        self.records[(kind, key)] = data
+        self.lines += 1
+
+    def sync(self):
+        """Make everything appended so far durable; compacts when mostly stale"""
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        if self.lines >= COMPACT_MIN_LINES and self.lines > 2 * len(self.records):
+            self.compact()
+
+    def compact(self):
+        """Rewrite the journal with one line per live record"""
+        self.close()
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for (kind, key), data in self.records.items():
+                f.write(json.dumps({'kind': kind, 'key': key, 'data': data}, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self.lines = len(self.records)
+
+    def close(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        """Run finished: drop the journal"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Single-fetch-per-URL coalescing for the fetch engine.
+
+Within one run, any number of stages may ask for the same page - the
+profile page alone feeds the info-table, position, market value and header
+extractors. The coalescer keys requests by normalized URL and
+  - returns the body from a small in-run LRU if the page was already fetched
+  - joins the in-flight request ("singleflight") if it is being fetched now
+so every extractor shares one response instead of issuing its own request.
+"""
+
+import asyncio
+from collections import OrderedDict
+
+from http_cache import normalize_url
+
+LRU_SIZE = 256    # pages; a profile page is ~150-250 KB of HTML
+
+
+class RequestCoalescer:
+    """In-run LRU + in-flight map in front of the real fetch"""
+
+    def __init__(self, max_entries=LRU_SIZE):
+        self.max_entries = max_entries
+        self.recent = OrderedDict()
+        self.inflight = {}
+        self.stats = {'fetched': 0, 'lru_hits': 0, 'joined': 0}
+
+    async def get(self, url, fetch):
+        """Body for url; fetch() is only awaited if nobody has it yet"""
+        key = normalize_url(url)
+        if key in self.recent:
+            self.recent.move_to_end(key)
+            self.stats['lru_hits'] += 1
+            return self.recent[key]
+
+        pending = self.inflight.get(key)
+        if pending is not None:
+            self.stats['joined'] += 1
+            return await asyncio.shield(pending)
+
+        pending = self.inflight[key] = asyncio.get_running_loop().create_future()
+        self.stats['fetched'] += 1
+        try:
+            body = await fetch()
+        except BaseException as e:
+            pending.set_exception(e)
+            pending.exception()   # waiters re-raise it; don't warn if there are none
+            raise
+        else:
+            pending.set_result(body)
+            if body is not None:
+                self._remember(key, body)
+            return body
+        finally:
+            del self.inflight[key]
+
+    def peek(self, url):
+        """Body already fetched in this run, without fetching"""
+        return self.recent.get(normalize_url(url))
+
+    def _remember(self, key, body):
+        self.recent[key] = body
+        if len(self.recent) > self.max_entries:
+            self.recent.popitem(last=False)
+
+    def report(self):
+        s = self.stats
+        return f"Coalescing: {s['fetched']} unique fetches | {s['lru_hits']} served from run LRU | {s['joined']} joined in-flight"
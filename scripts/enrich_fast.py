@@ -3,13 +3,13 @@ Fast enrichment: scrape roster pages to fill age/position.
 Age format on TM: "May 9, 2000 (25)" in td[5] with class 'zentriert'
 Position: td[4] plain text
 """
-import json
-import requests
-from bs4 import BeautifulSoup
-import time
-import re
+import asyncio
 import os
-import sys
+
+from fetch_engine import fetch_html, run
+from player_store import PlayerStore
+from team_manifest import load_teams
+import tm_parse
 
 def get_current_season():
     """Calculate Transfermarkt season year dynamically.
@@ -19,12 +19,6 @@ def get_current_season():
     return now.year if now.month >= 8 else now.year - 1
 
 
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-    'Accept': 'text/html,application/xhtml+xml',
-    'Accept-Language': 'en-US,en;q=0.5',
-}
-
 BASE_URL = "https://www.transfermarkt.us"
 LEAGUES = [
     'RO1', 'RO2', 'RO3', 'SER1', 'SER2', 'KR1', 'KR2', 'BOS1', 'ALB1', 'KOS1',
@@ -35,127 +29,35 @@ LEAGUES = [
     'FI1', 'LI1', 'EST1', 'MNP3',
 ]
 
-session = requests.Session()
-session.headers.update(HEADERS)
-
-def fetch(url, retries=3):
-    for i in range(retries):
-        try:
-            time.sleep(1.0 + i * 0.5)
-            resp = session.get(url, timeout=30)
-            if resp.status_code == 200:
-                return resp.text
-            elif resp.status_code == 429:
-                print(f"  Rate limited! Waiting 60s...", flush=True)
-                time.sleep(60)
-            elif resp.status_code == 404:
-                return None
-        except Exception as e:
-            print(f"  Error: {e}", flush=True)
-            time.sleep(3)
-    return None
-
-def get_teams(league_code):
-    url = f"{BASE_URL}/wettbewerb/startseite/wettbewerb/{league_code}"
-    html = fetch(url)
-    if not html:
-        return []
-    soup = BeautifulSoup(html, 'html.parser')
-    teams = []
-    seen = set()
-    for link in soup.find_all('a', href=lambda x: x and '/startseite/verein/' in str(x)):
-        href = link.get('href', '')
-        match = re.search(r'/verein/(\d+)', href)
-        if match and match.group(1) not in seen:
-            seen.add(match.group(1))
-            name = link.get('title') or link.get_text(strip=True)
-            # Get the slug from URL for roster page
-            slug_match = re.match(r'/([^/]+)/startseite', href)
-            slug = slug_match.group(1) if slug_match else None
-            if name and len(name) > 1:
-                teams.append({'id': match.group(1), 'name': name, 'slug': slug})
-    return teams
-
-def get_roster_data(team):
+async def get_roster_data(team):
     """Get player age + position from roster table"""
     slug = team['slug'] or 'team'
     url = f"{BASE_URL}/{slug}/kader/verein/{team['id']}/plus/1"
-    html = fetch(url)
+    html = await fetch_html(url, kind='roster')
     if not html:
         return {}
     
-    soup = BeautifulSoup(html, 'html.parser')
     player_data = {}
-    
-    table = soup.find('table', class_='items')
-    if not table:
-        return {}
-    
-    rows = table.find_all('tr')
-    for row in rows:
-        # Find player ID from link
-        link = row.find('a', href=lambda x: x and '/profil/spieler/' in str(x))
-        if not link:
-            continue
-        match = re.search(r'/spieler/(\d+)', link['href'])
-        if not match:
-            continue
-        pid = match.group(1)
-        if pid in player_data:
-            continue
-        
-        cells = row.find_all('td')
-        data = {}
-        
-        for cell in cells:
-            text = cell.get_text(strip=True)
-            classes = ' '.join(cell.get('class', []))
-            
-            # Age: look for date format "Mon DD, YYYY (age)" 
-            age_match = re.search(r'\((\d{1,2})\)\s*$', text)
-            if age_match and 'age' not in data:
-                age = int(age_match.group(1))
-                if 13 <= age <= 50:
-                    data['age'] = age
-                    data['dob'] = text.split('(')[0].strip()
-            
-            # Position: plain text cell with known position names
-            if text in ['Goalkeeper', 'Defender', 'Midfield', 'Attack',
-                       'Centre-Back', 'Left-Back', 'Right-Back',
-                       'Defensive Midfield', 'Central Midfield', 'Attacking Midfield',
-                       'Left Winger', 'Right Winger', 'Centre-Forward',
-                       'Second Striker', 'Left Midfield', 'Right Midfield']:
-                data['position'] = text
-            
-            # Height
-            height_match = re.match(r'^(\d,\d{2})\s*m$', text)
-            if height_match:
-                data['height'] = text
-            
-            # Foot
-            if text in ['right', 'left', 'both']:
-                data['foot'] = text
-        
+    for row in tm_parse.roster_rows(tm_parse.document(html)):
+        data = {key: row[key] for key in ('age', 'position', 'height', 'foot') if key in row}
+        if 'age' in data:
+            data['dob'] = row['date_of_birth'].split('(')[0].strip()
         if data:
-            player_data[pid] = data
+            player_data[row['player_id']] = data
     
     return player_data
 
-def main():
+ENRICH_FIELDS = ['age', 'position', 'date_of_birth', 'height', 'foot']
+
+async def main():
     json_path = os.path.join(os.path.dirname(__file__), '..', 'public', 'players.json')
+    store = PlayerStore.for_json(json_path)
     
-    with open(json_path) as f:
-        players = json.load(f)
+    # Current values by player_id; only matched players are written back
+    players = {p['player_id']: p for p in store.select(ENRICH_FIELDS)}
     
-    # Build lookup by player_id
-    pid_to_idx = {}
-    for i, p in enumerate(players):
-        pid = p.get('player_id') or p.get('playerId')
-        if pid:
-            pid_to_idx[pid] = i
-    
-    missing_age = sum(1 for p in players if p.get('age') is None)
-    missing_pos = sum(1 for p in players if not p.get('position'))
+    missing_age = sum(1 for p in players.values() if p.get('age') is None)
+    missing_pos = sum(1 for p in players.values() if not p.get('position'))
     print(f"Before: {len(players)} players, {missing_age} missing age, {missing_pos} missing position", flush=True)
     
     enriched_age = 0
@@ -164,50 +66,57 @@ def main():
     enriched_foot = 0
     total_teams = 0
     
+    league_teams = await load_teams(LEAGUES)
     for league_code in LEAGUES:
-        teams = get_teams(league_code)
+        teams = league_teams[league_code]
         print(f"\n{league_code}: {len(teams)} teams", flush=True)
+        rosters = await asyncio.gather(*(get_roster_data(team) for team in teams))
         
-        for team in teams:
+        for team, roster in zip(teams, rosters):
             total_teams += 1
-            roster = get_roster_data(team)
             
             matched = 0
             for pid, data in roster.items():
-                if pid in pid_to_idx:
-                    idx = pid_to_idx[pid]
+                if pid in players:
+                    player = players[pid]
                     matched += 1
+                    updates = {}
                     
-                    if 'age' in data and players[idx].get('age') is None:
-                        players[idx]['age'] = data['age']
+                    if 'age' in data and player.get('age') is None:
+                        updates['age'] = data['age']
                         enriched_age += 1
                     
-                    if 'position' in data and not players[idx].get('position'):
-                        players[idx]['position'] = data['position']
+                    if 'position' in data and not player.get('position'):
+                        updates['position'] = data['position']
                         enriched_pos += 1
                     
-                    if 'dob' in data and not players[idx].get('date_of_birth'):
-                        players[idx]['date_of_birth'] = data['dob']
+                    if 'dob' in data and not player.get('date_of_birth'):
+                        updates['date_of_birth'] = data['dob']
                     
-                    if 'height' in data and not players[idx].get('height'):
-                        players[idx]['height'] = data['height']
+                    if 'height' in data and not player.get('height'):
+                        updates['height'] = data['height']
                         enriched_height += 1
                     
-                    if 'foot' in data and not players[idx].get('foot'):
-                        players[idx]['foot'] = data['foot']
+                    if 'foot' in data and not player.get('foot'):
+                        updates['foot'] = data['foot']
                         enriched_foot += 1
+                    
+                    if updates:
+                        player.update(updates)
+                        store.upsert(pid, updates, source='enrich_fast')
             
             if total_teams % 5 == 0:
                 print(f"  [{total_teams}] {team['name']}: {len(roster)} players, {matched} matched | Age +{enriched_age} Pos +{enriched_pos}", flush=True)
         
-        # Save after each league
-        with open(json_path, 'w') as f:
-            json.dump(players, f, ensure_ascii=False)
-        still_missing = sum(1 for p in players if p.get('age') is None)
+        # Commit after each league (only the changed rows were written)
+        store.commit()
+        still_missing = sum(1 for p in players.values() if p.get('age') is None)
         print(f"  Saved! Age +{enriched_age} | Pos +{enriched_pos} | Height +{enriched_height} | Foot +{enriched_foot} | Still missing age: {still_missing}", flush=True)
     
+    store.export(json_path)
+    store.close()
     print(f"\nDone! Teams: {total_teams}", flush=True)
     print(f"Enriched: Age +{enriched_age}, Pos +{enriched_pos}, Height +{enriched_height}, Foot +{enriched_foot}", flush=True)
 
 if __name__ == '__main__':
-    main()
+    run(main())
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+Fill every missing player field with one request per (player, page).
+
+Each enricher used to fetch the same profile page for its own field or two:
+five position scripts for `position`, enrich_data.py again for
+age/date_of_birth, scrape_fast.py again for height/foot. This command
+plans the demand first:
+
+    1. scan the store for the fields each player is missing
+    2. group them by the page that provides them (FIELD_PAGES)
+    3. fetch each (player, page) once and run every extractor of that page
+       on the one parsed document (pipeline.fetch_and_parse)
+
+and writes back only the fields that were missing.
+
+Pages are picked by cost. A club's squad page (kader/plus/1) gives
+position, age, date of birth, height, foot, contract and photo for ~25
+players in one request, so those fields are planned per club first: a club
+gets its squad page when at least ROSTER_MIN_PLAYERS of its players need
+nothing a squad page can't give (the rest need their profile anyway, which
+fills the same fields for free). Whatever the squad pages don't resolve -
+players who left the club, blank cells - is re-planned per player.
+
+A player whose missing profile fields are all in the page's data header
+(HEAD_FIELDS) gets a partial fetch (fetch_engine.fetch_partial): the
+response is closed once the header has been read instead of downloading
+the whole profile. What the header doesn't have falls back to the full
+page.
+
+    python scripts/enrich_missing.py                       # every field, every page
+    python scripts/enrich_missing.py --fields position age --league RO1 RO2
+    python scripts/enrich_missing.py --plan                # planned vs. naive requests, no fetching
+    python scripts/enrich_missing.py --per-player          # skip the squad pages
+    python scripts/enrich_missing.py --full-pages          # no partial fetches
+    python scripts/enrich_missing.py --budget 3000 --interest grades.json
+
+With --budget the run is capped at that many requests and spent on the
+pages worth most: every (player, field) a page would fill is worth
+FIELD_WEIGHT[field] x the player's weight (league and market value, as in
+refresh_scheduler.py, x INTEREST_WEIGHT for players with a scouting report
+in --interest, a saved /api/grades response). Squad, profile, stats and
+transfer pages are picked greedily by the value they add to what is
+already picked (a lazy greedy set cover - a squad page and a profile can
+fill the same field, which only counts once).
+"""
+
+import argparse
+import asyncio
+import heapq
+import json
+import os
+import time
+
+from fetch_engine import fetch_partial, run
+from pipeline import FETCH_WORKERS, PARSE_WORKERS, PipelineStats, fetch_and_parse
+from player_store import PlayerStore
+from refresh_scheduler import player_weight
+from scrape_everything import parse_stats, stats_url_for
+from stream_fetch import DATA_HEADER, HEADER_DATE_OF_BIRTH, HEADER_HEIGHT, HEADER_POSITION
+import tm_parse
+
+VALID_POSITIONS = ['Goalkeeper', 'Defender', 'Midfield', 'Attack', 'Forward',
+    'Centre-Back', 'Left-Back', 'Right-Back', 'Sweeper',
+    'Central Midfield', 'Defensive Midfield', 'Attacking Midfield',
+    'Left Midfield', 'Right Midfield',
+    'Left Winger', 'Right Winger', 'Centre-Forward', 'Second Striker', 'Striker']
+
+ROSTER_URL = "https://www.transfermarkt.com/team/kader/verein/{club_id}/plus/1"
+
+# Fields a squad page has for every player on it
+ROSTER_FIELDS = ('position', 'age', 'date_of_birth', 'height', 'foot', 'contract_expires', 'photo_url')
+
+# Profile fields the data header has, read by a partial fetch that stops at
+# the end of that header. Foot and the full citizenship are only in the info table further down.
+HEAD_FIELDS = ('position', 'age', 'date_of_birth', 'height')
+HEAD_TARGETS = [HEADER_POSITION, HEADER_DATE_OF_BIRTH, HEADER_HEIGHT]
+
+# A squad page is worth it once it replaces this many profile requests
+ROSTER_MIN_PLAYERS = 2
+
+# Page kind -> URL built from the profile URL
+PAGE_URLS = {
+    'profile': lambda url: url,
+    'stats': stats_url_for,
+    'transfers': lambda url: url.replace('/profil/', '/transfers/'),
+}
+
+# Field -> the page that provides it
+FIELD_PAGES = {
+    'position': 'profile',
+    'age': 'profile',
+    'date_of_birth': 'profile',
+    'height': 'profile',
+    'foot': 'profile',
+    'citizenship': 'profile',
+    'place_of_birth': 'profile',
+    'contract_expires': 'profile',
+    'agent': 'profile',
+    'photo_url': 'profile',
+    'season_stats': 'stats',
+    'career_totals': 'stats',
+    'transfer_history': 'transfers',
+}
+
+# How much a filled field is worth to the scouts
+FIELD_WEIGHT = {
+    'position': 3.0, 'age': 3.0, 'date_of_birth': 2.0, 'season_stats': 3.0, 'career_totals': 2.0,
+    'contract_expires': 2.0, 'height': 1.0, 'foot': 1.0, 'citizenship': 1.0, 'agent': 1.0,
+    'transfer_history': 1.0, 'place_of_birth': 0.5, 'photo_url': 0.5,
+}
+
+# Players with a scouting report count this much more
+INTEREST_WEIGHT = 3.0
+
+# Kept in their own tables, not as player fields
+TABLE_FIELDS = {'season_stats': 'season_stats', 'transfer_history': 'transfers'}
+
+def is_valid_position(pos):
+    return bool(pos) and any(vp.lower() in pos.lower() for vp in VALID_POSITIONS)
+
+def parse_profile(html):
+    """Every profile-page field from one parse (runs in a parse worker process)"""
+    doc = tm_parse.document(html)
+    fields = tm_parse.profile(doc)
+    found = {f: fields[f] for f in FIELD_PAGES if FIELD_PAGES[f] == 'profile' and fields.get(f) is not None}
+    # detail-position box, then the data header, then the info table
+    found.pop('position', None)
+    for pos in (fields.get('main_position'), tm_parse.header_labels(doc).get('Position'), fields.get('position')):
+        if is_valid_position(pos):
+            found['position'] = pos
+            break
+    return found
+
+def parse_head(found):
+    """HEAD_FIELDS from the values a partial profile fetch found"""
+    fields = {}
+    if is_valid_position(found.get('header_position')):
+        fields['position'] = found['header_position']
+    if found.get('header_date_of_birth'):
+        fields['date_of_birth'] = found['header_date_of_birth']
+        age = tm_parse.AGE.search(fields['date_of_birth'])
+        if age:
+            fields['age'] = int(age.group(1))
+    if found.get('header_height'):
+        fields['height'] = found['header_height']
+    return fields
+
+def parse_roster(html):
+    """{player_id: squad-page fields} (runs in a parse worker process)"""
+    players = {}
+    for row in tm_parse.roster_rows(tm_parse.document(html)):
+        found = {f: row[f] for f in ROSTER_FIELDS if row.get(f) is not None}
+        if not is_valid_position(found.get('position')):
+            found.pop('position', None)
+        players[row['player_id']] = found
+    return players
+
+def parse_transfers(html):
+    return {'transfer_history': tm_parse.transfer_rows(tm_parse.document(html))}
+
+PAGE_PARSERS = {'profile': parse_profile, 'stats': parse_stats, 'transfers': parse_transfers}
+
+def is_missing(value):
+    return value is None or value == '' or value == {} or value == []
+
+def plan(store, fields, leagues=None):
+    """{page: {player_id: (profile_url, club_id, {missing fields of that page})}}"""
+    where, params = "profile_url IS NOT NULL AND profile_url != ''", ()
+    if leagues:
+        where += f" AND league_code IN ({', '.join('?' for _ in leagues)})"
+        params = tuple(leagues)
+    columns = [f for f in fields if f not in TABLE_FIELDS]
+    rows = store.select(['profile_url', 'club_id'] + columns, where=where, params=params)
+    # Players with rows in the side tables have those fields
+    present = {field: {pid for (pid,) in store.db.execute(f'SELECT DISTINCT player_id FROM {table}')}
+               for field, table in TABLE_FIELDS.items() if field in fields}
+
+    demand = {}
+    for row in rows:
+        pid = row['player_id']
+        for field in fields:
+            missing = pid not in present[field] if field in TABLE_FIELDS else is_missing(row.get(field))
+            if missing:
+                page = FIELD_PAGES[field]
+                entry = demand.setdefault(page, {}).setdefault(pid, (row['profile_url'], row['club_id'], set()))
+                entry[2].add(field)
+    return demand
+
+def plan_clubs(demand):
+    """Move profile demand a squad page can cover onto per-club pages.
+
+    Returns ({club_id: {player_id: wanted fields}}, the per-player demand left)
+    """
+    candidates = {}
+    for pid, (_, club_id, wanted) in demand.get('profile', {}).items():
+        # Players who need a profile-only field get their profile anyway
+        if club_id and wanted <= set(ROSTER_FIELDS):
+            candidates.setdefault(club_id, {})[pid] = wanted
+    clubs = {club_id: players for club_id, players in candidates.items() if len(players) >= ROSTER_MIN_PLAYERS}
+    covered = {pid for players in clubs.values() for pid in players}
+    left = dict(demand)
+    if covered:
+        left['profile'] = {pid: entry for pid, entry in demand['profile'].items() if pid not in covered}
+    return clubs, left
+
+def load_interest(path):
+    """player_ids with a scouting report, from a saved /api/grades response (or a plain id list)"""
+    with open(path, encoding='utf-8') as f:
+        grades = json.load(f)
+    return {str(g.get('playerId') or g.get('player_id')) if isinstance(g, dict) else str(g) for g in grades}
+
+def player_weights(store, interest=()):
+    return {p['player_id']: player_weight(p) * (INTEREST_WEIGHT if p['player_id'] in interest else 1.0)
+            for p in store.select(['league_code', 'market_value'])}
+
+def candidate_pages(demand, weights):
+    """{(page, key): {(player_id, field): value}} - what each possible request would fill"""
+    pages = {}
+    for page, players in demand.items():
+        for pid, (_, club_id, wanted) in players.items():
+            values = {(pid, f): weights.get(pid, 1.0) * FIELD_WEIGHT[f] for f in wanted}
+            pages[(page, pid)] = values
+            if page == 'profile' and club_id:
+                roster = {cell: v for cell, v in values.items() if cell[1] in ROSTER_FIELDS}
+                if roster:
+                    pages.setdefault(('roster', club_id), {}).update(roster)
+    return pages
+
+def optimize(pages, budget):
+    """Greedy max-value pick of up to `budget` pages; [(page, key)] in pick order.
+
+    Lazy: a popped page's gain is recomputed against what is covered and it is
+    only taken if it still beats the next best, else pushed back. A squad
+    page picked early can be made redundant by profiles picked after it;
+    such pages are dropped and the freed budget goes back to the greedy pick.
+    """
+    heap = [(-sum(values.values()), key) for key, values in pages.items()]
+    heapq.heapify(heap)
+    covered = set()
+    chosen = []
+    while True:
+        while heap and len(chosen) < budget:
+            _, key = heapq.heappop(heap)
+            gain = sum(v for cell, v in pages[key].items() if cell not in covered)
+            if gain <= 0:
+                continue
+            if heap and gain < -heap[0][0]:
+                heapq.heappush(heap, (-gain, key))
+                continue
+            covered.update(pages[key])
+            chosen.append(key)
+        times = {}
+        for key in chosen:
+            for cell in pages[key]:
+                times[cell] = times.get(cell, 0) + 1
+        redundant = next((key for key in chosen if all(times[cell] > 1 for cell in pages[key])), None)
+        if redundant is None:
+            return chosen
+        chosen.remove(redundant)
+
+def value_of(pages, chosen):
+    """Value of every (player, field) the chosen pages fill, each counted once"""
+    cells = {}
+    for key in chosen:
+        cells.update(pages[key])
+    return sum(cells.values())
+
+def budget_plan(demand, pages, chosen):
+    """The picked pages as (clubs, per-player demand), most valuable first within each kind"""
+    clubs, left = {}, {}
+    for page, key in chosen:
+        if page == 'roster':
+            players = clubs.setdefault(key, {})
+            for pid, field in pages[(page, key)]:
+                players.setdefault(pid, set()).add(field)
+        else:
+            left.setdefault(page, {})[key] = demand[page][key]
+    return clubs, left
+
+def print_plan(demand, fields, clubs, left):
+    per_field = {f: 0 for f in fields}
+    for players in demand.values():
+        for _, _, wanted in players.values():
+            for f in wanted:
+                per_field[f] += 1
+    naive = sum(len(players) for players in demand.values())
+    planned = len(clubs) + sum(len(players) for players in left.values())
+    print("Missing: " + ', '.join(f"{f} {n}" for f, n in per_field.items() if n))
+    parts = [f"{len(clubs)} squad pages (for {sum(len(p) for p in clubs.values())} players)"]
+    parts += [f"{len(players)} {page}" for page, players in left.items()]
+    print(f"Planned: {' + '.join(parts)} = {planned} requests")
+    heads = sum(1 for _, _, wanted in left.get('profile', {}).values() if wanted <= set(HEAD_FIELDS))
+    if heads:
+        print(f"  {heads} of the profiles need only header fields (partial fetch unless --full-pages)")
+    print(f"Naive: {naive} (one page per player) | {sum(per_field.values())} (one script per field)", flush=True)
+
+async def run_rosters(store, clubs, filled, args):
+    """Squad pages for the planned clubs; fills what they have for the planned players"""
+    todo = list(clubs.items())[:args.limit]
+    print(f"\nroster: {len(todo)} squad pages", flush=True)
+    stats = PipelineStats(args.fetch_workers, args.parse_workers)
+    results = fetch_and_parse(todo, lambda item: ROSTER_URL.format(club_id=item[0]), parse_roster, kind='roster',
+                              fetch_workers=args.fetch_workers, parse_workers=args.parse_workers, stats=stats)
+    resolved = 0
+    async for (club_id, players), rows in results:
+        for pid, wanted in players.items():
+            found = (rows or {}).get(pid, {})
+            updates = {f: found[f] for f in wanted if not is_missing(found.get(f))}
+            if updates:
+                store.upsert(pid, updates, source='enrich_roster')
+                for f in updates:
+                    filled[f] += 1
+            if len(updates) == len(wanted):
+                resolved += 1
+        store.commit()
+    print(f"  roster: {resolved}/{sum(len(p) for _, p in todo)} players fully resolved", flush=True)
+    print(f"  {stats.report()}", flush=True)
+
+async def run_pages(store, page, players, filled, args):
+    """One per-player page kind"""
+    start = time.time()
+    todo = list(players.items())[:args.limit]
+    print(f"\n{page}: {len(todo)} pages", flush=True)
+    stats = PipelineStats(args.fetch_workers, args.parse_workers)
+    results = fetch_and_parse(todo, lambda item: PAGE_URLS[page](item[1][0]), PAGE_PARSERS[page], kind=page,
+                              fetch_workers=args.fetch_workers, parse_workers=args.parse_workers, stats=stats)
+    done = empty = 0
+    async for (pid, (_, _, wanted)), parsed in results:
+        done += 1
+        updates = {f: parsed[f] for f in wanted if parsed and not is_missing(parsed.get(f))}
+        if updates:
+            store.upsert(pid, updates, source=f'enrich_{page}')
+            for f in updates:
+                filled[f] += 1
+        else:
+            empty += 1
+        if done % 100 == 0:
+            store.commit()
+            rate = done / (time.time() - start) * 60
+            print(f"  [{done}/{len(todo)}] {rate:.0f}/min | nothing found for {empty}", flush=True)
+    store.commit()
+    print(f"  {page}: {done} pages, nothing found for {empty}", flush=True)
+    print(f"  {stats.report()}", flush=True)
+
+async def run_heads(store, players, filled, args):
+    """Partial profile fetches for players missing only HEAD_FIELDS; returns those still missing some"""
+    todo = list(players.items())[:args.limit]
+    print(f"\nprofile head: {len(todo)} partial pages", flush=True)
+
+    async def one(item):
+        pid, (url, _, wanted) = item
+        return item, await fetch_partial(url, HEAD_TARGETS, kind='profile', stop_after=DATA_HEADER)
+
+    done = 0
+    unresolved = {}
+    for next_page in asyncio.as_completed([one(item) for item in todo]):
+        (pid, entry), found = await next_page
+        done += 1
+        parsed = parse_head(found or {})
+        updates = {f: parsed[f] for f in entry[2] if f in parsed}
+        if updates:
+            store.upsert(pid, updates, source='enrich_profile_head')
+            for f in updates:
+                filled[f] += 1
+        if found is not None and len(updates) < len(entry[2]):
+            unresolved[pid] = (entry[0], entry[1], entry[2] - set(updates))
+        if done % 100 == 0:
+            store.commit()
+    store.commit()
+    print(f"  profile head: {done} pages, {len(unresolved)} need the full page", flush=True)
+    return unresolved
+
+async def main():
+    parser = argparse.ArgumentParser(description='Fill missing player fields with the fewest page requests')
+    parser.add_argument('--fields', nargs='*', help=f"default: all ({', '.join(FIELD_PAGES)})")
+    parser.add_argument('--league', nargs='*', help='only players in these league codes')
+    parser.add_argument('--limit', type=int, help='at most this many pages per page kind')
+    parser.add_argument('--plan', action='store_true', help='print planned vs. naive requests and exit')
+    parser.add_argument('--per-player', action='store_true', help="don't use squad pages")
+    parser.add_argument('--full-pages', action='store_true', help='no partial fetches for header-only fields')
+    parser.add_argument('--budget', type=int, help='request ceiling; spend it on the most valuable pages')
+    parser.add_argument('--interest', help='saved /api/grades JSON: players with a report weigh more')
+    parser.add_argument('--fetch-workers', type=int, default=FETCH_WORKERS)
+    parser.add_argument('--parse-workers', type=int, default=PARSE_WORKERS)
+    args = parser.parse_args()
+    fields = args.fields or list(FIELD_PAGES)
+    unknown = [f for f in fields if f not in FIELD_PAGES]
+    if unknown:
+        parser.error(f"unknown field(s): {', '.join(unknown)}")
+
+    json_path = os.path.join(os.path.dirname(__file__), '..', 'public', 'players.json')
+    store = PlayerStore.for_json(json_path)
+    demand = plan(store, fields, args.league)
+    if args.budget is not None:
+        pages = candidate_pages(demand, player_weights(store, load_interest(args.interest) if args.interest else ()))
+        if args.per_player:
+            pages = {key: values for key, values in pages.items() if key[0] != 'roster'}
+        chosen = optimize(pages, args.budget)
+        clubs, left = budget_plan(demand, pages, chosen)
+    else:
+        clubs, left = ({}, demand) if args.per_player else plan_clubs(demand)
+    print_plan(demand, fields, clubs, left)
+    if args.budget is not None:
+        total = sum(sum(values.values()) for key, values in pages.items() if key[0] != 'roster')
+        gained = value_of(pages, chosen)
+        print(f"Budget {args.budget}: {len(chosen)} pages fill {gained:.0f} of {total:.0f} missing value" +
+              (f" ({gained / total:.0%})" if total else ''), flush=True)
+    if args.plan:
+        store.close()
+        return
+
+    start = time.time()
+    filled = {f: 0 for f in fields}
+    if clubs:
+        await run_rosters(store, clubs, filled, args)
+        if args.budget is None:
+            # Leftovers - players no longer on that squad, blank cells - per player
+            # (a budgeted run leaves them to the next run)
+            left = plan(store, fields, args.league)
+    for page, players in left.items():
+        if page == 'profile' and not args.full_pages:
+            heads = {pid: entry for pid, entry in players.items() if entry[2] <= set(HEAD_FIELDS)}
+            if heads:
+                rest = await run_heads(store, heads, filled, args)
+                players = {**{pid: e for pid, e in players.items() if pid not in heads}, **rest}
+        if players:
+            await run_pages(store, page, players, filled, args)
+
+    store.export(json_path)
+    store.close()
+    print(f"\nDone in {(time.time() - start) / 60:.1f}m! Filled: " +
+          ', '.join(f"{f} +{n}" for f, n in filled.items() if n), flush=True)
+
+if __name__ == '__main__':
+    run(main())
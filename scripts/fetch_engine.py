@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Shared asyncio fetch engine for all Transfermarkt scrapers.
+
+One pooled HTTP client per run (see http_transport.py), bounded concurrency
+per host and awaitable fetch_html(url, kind=...) calls. Async scripts await
+fetch_html() directly; the older blocking scripts call fetch_page(), which
+runs the same engine on a background event loop so every script shares one
+connection pool.
+
+    html = await fetch_html(url, kind='roster')     # inside a coroutine
+    html = fetch_page(url, kind='profile')          # from blocking code
+
+When only a few head-of-page values are needed, fetch_partial() streams the
+page and stops reading once they are found (see stream_fetch.py):
+
+    found = await fetch_partial(url, [HEADER_POSITION], stop_after=DATA_HEADER)
+
+Every script that imports the engine also accepts --record / --replay
+(see html_archive.py).
+"""
+
+import asyncio
+import atexit
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+from coalescer import RequestCoalescer
+from html_archive import HtmlArchive, archive_mode
+from http_cache import HttpCache, cache_enabled
+from http_transport import ConnectionStats, build_client
+from rate_control import AimdRateController, parse_retry_after
+from stream_fetch import PageScanner, StreamStats
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+}
+
+# Page kinds used across the scrapers. The kind is carried with every request
+# so later layers (cache TTLs, stats) can tell roster pages from profiles.
+KINDS = ('league', 'roster', 'profile', 'stats', 'transfers', 'market_values', 'search', 'page')
+
+MAX_PER_HOST = 4          # concurrent requests per host
+MAX_THROTTLED = 6         # 429s tolerated for one URL before giving up
+TIMEOUT = 30
+
+# Parsed at import so the flags are gone before a script reads sys.argv itself
+ARCHIVE_MODE = archive_mode(sys.argv)
+
+
+class FetchEngine:
+    """Pooled async HTTP fetcher with a concurrency cap and AIMD pacing per host"""
+
+    def __init__(self, max_per_host=MAX_PER_HOST, retries=3, timeout=TIMEOUT, cache=None, mode=None, archive=None):
+        self.max_per_host = max_per_host
+        self.retries = retries
+        self.timeout = timeout
+        self.rate = AimdRateController()
+        self.mode = mode
+        # Replay can be pointed at any object with lookup(url) / report(mode)
+        self.archive = archive or (HtmlArchive() if mode else None)
+        self.coalescer = RequestCoalescer()
+        if cache is None and cache_enabled() and mode != 'replay':
+            cache = HttpCache()
+        self.cache = cache
+        self.client = None
+        self._host_slots = {}
+        self.stats = {'requests': 0, 'ok': 0, 'failed': 0, 'rate_limited': 0}
+        self.connections = ConnectionStats()
+        self.streams = StreamStats()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _get_client(self):
+        if self.client is None:
+            self.client = build_client(HEADERS, self.timeout, max_connections=self.max_per_host * 4)
+        return self.client
+
+    def _slot(self, host):
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.max_per_host)
+        return slot
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+        if self.cache is not None:
+            self.cache.db.commit()
+
+    async def fetch_html(self, url, kind='page'):
+        """Fetch a page and return its text, or None if it is gone or keeps failing"""
+        # One request per URL per run, however many stages ask for it
+        return await self.coalescer.get(url, lambda: self._fetch_archived(url, kind))
+
+    async def _fetch_archived(self, url, kind):
+        if self.mode == 'replay':
+            return self.archive.lookup(url)
+        body = await self._fetch(url, kind)
+        if body is not None and self.mode == 'record':
+            self.archive.record(url, kind, body)
+        return body
+
+    async def _fetch(self, url, kind):
+        entry = self.cache.get(url) if self.cache else None
+        if entry and self.cache.is_fresh(entry, kind):
+            self.cache.stats['hits'] += 1
+            return entry.body
+        # Expired entries are revalidated instead of refetched when possible
+        headers = entry.validators() if entry else {}
+        if self.cache and not headers:
+            self.cache.stats['misses'] += 1
+
+        client = self._get_client()
+        host = urlsplit(url).hostname
+        errors = throttled = 0
+        async with self._slot(host):
+            while errors < self.retries and throttled < MAX_THROTTLED:
+                await self.rate.acquire(host)
+                self.stats['requests'] += 1
+                started = time.monotonic()
+                try:
+                    resp = await client.get(url, headers=headers, extensions={'trace': self.connections.trace})
+                except httpx.HTTPError as e:
+                    print(f"  Error ({kind}): {e}", flush=True)
+                    self.rate.on_error(host)
+                    errors += 1
+                    continue
+                self.connections.record(resp)
+                if resp.status_code == 429:
+                    self.stats['rate_limited'] += 1
+                    throttled += 1
+                    self.rate.on_throttle(host, parse_retry_after(resp.headers.get('Retry-After')))
+                    continue
+                if resp.status_code >= 500:
+                    self.rate.on_error(host)
+                else:
+                    self.rate.on_success(host, time.monotonic() - started)
+                if resp.status_code == 304 and entry:
+                    self.stats['ok'] += 1
+                    self.cache.touch(url)
+                    return entry.body
+                if resp.status_code == 200:
+                    self.stats['ok'] += 1
+                    self.streams.note_full(kind, resp.num_bytes_downloaded)
+                    if self.cache:
+                        self.cache.put(url, kind, resp.text,
+                                       resp.headers.get('ETag'), resp.headers.get('Last-Modified'))
+                    return resp.text
+                if resp.status_code in (404, 410):
+                    return None
+                print(f"  HTTP {resp.status_code} for {url}", flush=True)
+                errors += 1
+        self.stats['failed'] += 1
+        return None
+
+    async def fetch_partial(self, url, targets, kind='profile', stop_after=None):
+        """Values for targets ({name: value}) reading only as much of the page as needed.
+
+        A complete body already in the run LRU, the archive or a fresh cache
+        entry is scanned instead of going to the network. Partial bodies are
+        never cached or archived; record mode always fetches the full page.
+        """
+        body = self.coalescer.peek(url)
+        if body is None and self.mode == 'replay':
+            body = self.archive.lookup(url)
+        if body is None and self.mode == 'record':
+            body = await self.fetch_html(url, kind)
+        if body is None and self.mode != 'replay' and self.cache:
+            entry = self.cache.get(url)
+            if entry and self.cache.is_fresh(entry, kind):
+                self.cache.stats['hits'] += 1
+                body = entry.body
+        if body is not None or self.mode in ('replay', 'record'):
+            return PageScanner(targets, stop_after).scan(body) if body else None
+        return await self._stream(url, targets, kind, stop_after)
+
+    async def _stream(self, url, targets, kind, stop_after):
+        client = self._get_client()
+        host = urlsplit(url).hostname
+        errors = throttled = 0
+        async with self._slot(host):
+            while errors < self.retries and throttled < MAX_THROTTLED:
+                await self.rate.acquire(host)
+                self.stats['requests'] += 1
+                started = time.monotonic()
+                scanner = PageScanner(targets, stop_after)
+                try:
+                    # Leaving the block early closes the response; on HTTP/1.1
+                    # that costs the connection, on HTTP/2 only the stream.
+                    async with client.stream('GET', url, extensions={'trace': self.connections.trace}) as resp:
+                        self.connections.record(resp)
+                        if resp.status_code == 200:
+                            async for chunk in resp.aiter_bytes():
+                                if scanner.feed(chunk):
+                                    break
+                except httpx.HTTPError as e:
+                    print(f"  Error ({kind}): {e}", flush=True)
+                    self.rate.on_error(host)
+                    errors += 1
+                    continue
+                if resp.status_code == 429:
+                    self.stats['rate_limited'] += 1
+                    throttled += 1
+                    self.rate.on_throttle(host, parse_retry_after(resp.headers.get('Retry-After')))
+                    continue
+                if resp.status_code >= 500:
+                    self.rate.on_error(host)
+                else:
+                    self.rate.on_success(host, time.monotonic() - started)
+                if resp.status_code == 200:
+                    self.stats['ok'] += 1
+                    length = resp.headers.get('Content-Length')
+                    self.streams.note_partial(kind, resp.num_bytes_downloaded,
+                                              int(length) if length and length.isdigit() else None)
+                    return scanner.found
+                if resp.status_code in (404, 410):
+                    return None
+                print(f"  HTTP {resp.status_code} for {url}", flush=True)
+                errors += 1
+        self.stats['failed'] += 1
+        return None
+
+    async def fetch_many(self, urls, kind='page'):
+        """Fetch several pages concurrently, results in input order"""
+        return await asyncio.gather(*(self.fetch_html(url, kind=kind) for url in urls))
+
+    def report(self):
+        s = self.stats
+        lines = [f"Requests: {s['requests']} | OK: {s['ok']} | Failed: {s['failed']} | 429s: {s['rate_limited']}",
+                 self.coalescer.report(), self.streams.report(), self.connections.report(), self.rate.report()]
+        if self.cache:
+            lines.append(self.cache.report())
+        if self.archive:
+            lines.append(self.archive.report(self.mode))
+        return '\n'.join(line for line in lines if line)
+
+
+_engine = None
+
+
+def get_engine():
+    """The engine shared by everything in this process"""
+    global _engine
+    if _engine is None:
+        _engine = FetchEngine(mode=ARCHIVE_MODE)
+    return _engine
+
+
+def set_engine(engine):
+    """Make engine the shared one (bench_extract.py serves its corpus this way)"""
+    global _engine
+    _engine = engine
+
+
+async def fetch_html(url, kind='page'):
+    return await get_engine().fetch_html(url, kind=kind)
+
+
+async def fetch_many(urls, kind='page'):
+    return await get_engine().fetch_many(urls, kind=kind)
+
+
+async def fetch_partial(url, targets, kind='profile', stop_after=None):
+    return await get_engine().fetch_partial(url, targets, kind=kind, stop_after=stop_after)
+
+
+def run(main):
+    """Run an async main() and close the shared engine afterwards"""
+    async def _runner():
+        try:
+            return await main
+        finally:
+            await get_engine().close()
+            print(get_engine().report(), flush=True)
+    return asyncio.run(_runner())
+
+
+# --- Blocking bridge -------------------------------------------------------
+# Scripts that are still written as plain loops (or use threads) call
+# fetch_page(). Requests are executed on one background loop so they share the
+# same client, pool and per-host limits as the async scrapers.
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _bridge_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='fetch-engine', daemon=True).start()
+            atexit.register(_shutdown_bridge)
+    return _loop
+
+
+def _shutdown_bridge():
+    if _loop is None:
+        return
+    asyncio.run_coroutine_threadsafe(get_engine().close(), _loop).result(timeout=10)
+    _loop.call_soon_threadsafe(_loop.stop)
+    print(get_engine().report(), flush=True)
+
+
+def fetch_page(url, kind='page'):
+    """Blocking wrapper around fetch_html() for synchronous scripts"""
+    return asyncio.run_coroutine_threadsafe(fetch_html(url, kind=kind), _bridge_loop()).result()
+
+
+def fetch_pages(urls, kind='page'):
+    """Blocking wrapper around fetch_many()"""
+    return asyncio.run_coroutine_threadsafe(fetch_many(urls, kind=kind), _bridge_loop()).result()
+
+
+if __name__ == '__main__':
+    start = time.time()
+    pages = fetch_pages(sys.argv[1:])
+    for url, html in zip(sys.argv[1:], pages):
+        print(f"{url}: {len(html) if html else 'failed'}")
+    print(f"{time.time() - start:.1f}s")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Raw HTML archive with record/replay for offline re-runs.
+
+Every page body is stored once, zstd-compressed and content-addressed by its
+SHA-256 (objects/ab/abcdef....zst); a small SQLite index maps normalized URLs
+to the body they last returned. Any scraper can run in one of two modes:
+
+    python scripts/rescrape_all.py --record   # fetch as usual, archive every page
+    python scripts/rescrape_all.py --replay   # no network: serve pages from the archive
+
+Replay runs at parse speed and gives identical input every time, so a parser
+fix can regenerate players.json without a rescrape and benchmarks are
+deterministic. The mode can also be set with TM_ARCHIVE=record|replay and
+the location with TM_ARCHIVE_DIR (default scripts/html_archive/).
+
+    python scripts/html_archive.py stats
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+
+from http_cache import normalize_url
+
+ARCHIVE_DIR = os.environ.get(
+    'TM_ARCHIVE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'html_archive'))
+ZSTD_LEVEL = 10
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        sys.exit("html_archive needs the 'zstandard' package (pip install zstandard)")
+    return zstandard
+
+
+def archive_mode(argv):
+    """Pull --record / --replay out of argv; returns 'record', 'replay' or None"""
+    parser = argparse.ArgumentParser(add_help=False)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--record', action='store_true')
+    group.add_argument('--replay', action='store_true')
+    args, rest = parser.parse_known_args(argv[1:])
+    argv[1:] = rest
+    if args.record:
+        return 'record'
+    if args.replay:
+        return 'replay'
+    mode = os.environ.get('TM_ARCHIVE', '').lower()
+    return mode if mode in ('record', 'replay') else None
+
+
+class HtmlArchive:
+    """Content-addressed, zstd-compressed store of fetched pages"""
+
+    def __init__(self, root=ARCHIVE_DIR):
+        zstd = _zstd()
+        self.root = root
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+        self.compressor = zstd.ZstdCompressor(level=ZSTD_LEVEL)
+        self.decompressor = zstd.ZstdDecompressor()
+        self.db = sqlite3.connect(os.path.join(root, 'index.db'), check_same_thread=False)
+        self.db.execute('''CREATE TABLE IF NOT EXISTS pages (
+            key TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            digest TEXT NOT NULL,
+            fetched_at REAL NOT NULL
+        )''')
+        self.stats = {'recorded': 0, 'new_objects': 0, 'replayed': 0, 'missing': 0}
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, 'objects', digest[:2], digest[2:] + '.zst')
+
+    def record(self, url, kind, body):
+        data = body.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = path + '.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(self.compressor.compress(data))
+            os.replace(tmp, path)
+            self.stats['new_objects'] += 1
+        self.db.execute('INSERT OR REPLACE INTO pages (key, url, kind, digest, fetched_at) VALUES (?, ?, ?, ?, ?)',
+                        (normalize_url(url), url, kind, digest, time.time()))
+        self.db.commit()
+        self.stats['recorded'] += 1
+        return digest
+
+    def lookup(self, url):
+        """Archived body for a URL, or None if it was never recorded"""
+        row = self.db.execute('SELECT digest FROM pages WHERE key = ?', (normalize_url(url),)).fetchone()
+        if not row:
+            self.stats['missing'] += 1
+            return None
+        with open(self._object_path(row[0]), 'rb') as f:
+            body = self.decompressor.decompress(f.read()).decode('utf-8')
+        self.stats['replayed'] += 1
+        return body
+
+    def iter_pages(self, kind=None):
+        """(url, kind, body) for every archived page, optionally one kind only"""
+        query = 'SELECT url, kind, digest FROM pages'
+        params = ()
+        if kind:
+            query += ' WHERE kind = ?'
+            params = (kind,)
+        for url, page_kind, digest in self.db.execute(query, params).fetchall():
+            with open(self._object_path(digest), 'rb') as f:
+                yield url, page_kind, self.decompressor.decompress(f.read()).decode('utf-8')
+
+    def close(self):
+        self.db.close()
+
+    def report(self, mode):
+        s = self.stats
+        if mode == 'replay':
+            return f"Archive (replay): {s['replayed']} pages served | {s['missing']} not in archive"
+        return f"Archive (record): {s['recorded']} pages recorded | {s['new_objects']} new objects"
+
+
+if __name__ == '__main__':
+    archive = HtmlArchive()
+    total = 0
+    for kind, count in archive.db.execute('SELECT kind, COUNT(*) FROM pages GROUP BY kind ORDER BY kind'):
+        print(f"{kind:15} {count:7} pages")
+        total += count
+    size = sum(os.path.getsize(os.path.join(d, f))
+               for d, _, files in os.walk(os.path.join(archive.root, 'objects')) for f in files)
+    print(f"{'total':15} {total:7} pages  {size / 1e6:.1f} MB on disk")
+    archive.close()
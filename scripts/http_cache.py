@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+On-disk HTTP cache for the fetch engine.
+
+Pages are stored zlib-compressed in a SQLite file keyed by normalized URL,
+so the slugged and slug-less forms of the same Transfermarkt page
+(/stefan-tarnovanu/profil/spieler/568544 and /spieler/profil/spieler/568544)
+share one entry. Each page kind has its own TTL; once an entry expires it is
+revalidated with If-None-Match / If-Modified-Since when the server sent an
+ETag or Last-Modified, and a 304 just refreshes the entry.
+
+TTLs can be overridden per kind with TM_CACHE_TTL_<KIND>=<seconds>
+(e.g. TM_CACHE_TTL_PROFILE=86400); TM_CACHE=0 disables the cache.
+
+    python scripts/http_cache.py stats
+    python scripts/http_cache.py purge      # drop expired entries
+"""
+
+import os
+import sqlite3
+import sys
+import time
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'http_cache.db')
+
+DEFAULT_TTLS = {
+    'league': 7 * DAY,
+    'roster': DAY,
+    'profile': 7 * DAY,
+    'stats': DAY,
+    'transfers': 7 * DAY,
+    'market_values': DAY,
+    'search': 30 * DAY,
+    'page': DAY,
+}
+
+# Transfermarkt ignores the leading slug on entity pages, e.g.
+# /<slug>/profil/spieler/<id> and /<slug>/kader/verein/<id>
+ENTITY_SEGMENTS = {'spieler', 'verein', 'wettbewerb'}
+
+
+def normalize_url(url):
+    """Canonical cache key: lower-case host, no slug, sorted query, no fragment"""
+    parts = urlsplit(url)
+    segments = [s for s in parts.path.split('/') if s]
+    if len(segments) >= 4 and segments[2] in ENTITY_SEGMENTS:
+        segments[0] = '-'
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), '/' + '/'.join(segments), query, ''))
+
+
+def load_ttls():
+    ttls = dict(DEFAULT_TTLS)
+    for kind in ttls:
+        value = os.environ.get(f'TM_CACHE_TTL_{kind.upper()}')
+        if value:
+            ttls[kind] = int(value)
+    return ttls
+
+
+class CacheEntry:
+    def __init__(self, row):
+        self.url, self.kind, body, self.etag, self.last_modified, self.fetched_at = row
+        self.body = zlib.decompress(body).decode('utf-8')
+
+    def age(self):
+        return time.time() - self.fetched_at
+
+    def validators(self):
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """SQLite-backed page cache with per-kind TTLs"""
+
+    def __init__(self, path=CACHE_FILE, ttls=None):
+        self.path = path
+        self.ttls = ttls or load_ttls()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('''CREATE TABLE IF NOT EXISTS pages (
+            key TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            body BLOB NOT NULL,
+            etag TEXT,
+            last_modified TEXT,
+            fetched_at REAL NOT NULL
+        )''')
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stored': 0}
+
+    def ttl(self, kind):
+        return self.ttls.get(kind, self.ttls['page'])
+
+    def get(self, url):
+        row = self.db.execute(
+            'SELECT url, kind, body, etag, last_modified, fetched_at FROM pages WHERE key = ?',
+            (normalize_url(url),)).fetchone()
+        return CacheEntry(row) if row else None
+
+    def is_fresh(self, entry, kind):
+        return entry.age() < self.ttl(kind)
+
+    def put(self, url, kind, body, etag=None, last_modified=None):
+        self.db.execute(
+            'INSERT OR REPLACE INTO pages (key, url, kind, body, etag, last_modified, fetched_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (normalize_url(url), url, kind, zlib.compress(body.encode('utf-8'), 6),
+             etag, last_modified, time.time()))
+        self.db.commit()
+        self.stats['stored'] += 1
+
+    def touch(self, url):
+        """Server answered 304 - the cached body is good for another TTL"""
+        self.db.execute('UPDATE pages SET fetched_at = ? WHERE key = ?', (time.time(), normalize_url(url)))
+        self.db.commit()
+        self.stats['revalidated'] += 1
+
+    def purge_expired(self):
+        now = time.time()
+        removed = 0
+        for kind, ttl in self.ttls.items():
+            cur = self.db.execute('DELETE FROM pages WHERE kind = ? AND fetched_at < ? '
+                                  'AND etag IS NULL AND last_modified IS NULL', (kind, now - ttl))
+            removed += cur.rowcount
+        self.db.commit()
+        self.db.execute('VACUUM')
+        return removed
+
+    def close(self):
+        self.db.close()
+
+    def report(self):
+        s = self.stats
+        return f"Cache: {s['hits']} hits | {s['revalidated']} revalidated (304) | {s['misses']} misses | {s['stored']} stored"
+
+
+def cache_enabled():
+    return os.environ.get('TM_CACHE', '1') != '0'
+
+
+if __name__ == '__main__':
+    cache = HttpCache()
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    if command == 'purge':
+        print(f"Removed {cache.purge_expired()} expired entries")
+    else:
+        for kind, count, size in cache.db.execute(
+                'SELECT kind, COUNT(*), SUM(LENGTH(body)) FROM pages GROUP BY kind ORDER BY kind'):
+            print(f"{kind:15} {count:7} pages  {size / 1e6:8.1f} MB  ttl {cache.ttl(kind) / HOUR:.0f}h")
+    cache.close()
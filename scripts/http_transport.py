@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP transport for the fetch engine.
+
+Builds the one pooled client a run uses: persistent keep-alive connections,
+a single TLS context for every connection and optional HTTP/2 multiplexing
+(needs the `h2` package; set TM_HTTP2=0 to force HTTP/1.1). ConnectionStats
+counts new TCP connections and TLS handshakes against requests so every run
+can report how well connections were reused.
+"""
+
+import os
+import ssl
+from collections import Counter
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (presence check only - httpx drives it)
+    H2_AVAILABLE = True
+except ImportError:
+    H2_AVAILABLE = False
+
+try:
+    import certifi
+    CA_FILE = certifi.where()
+except ImportError:
+    CA_FILE = None
+
+KEEPALIVE_EXPIRY = 60     # seconds an idle connection stays in the pool
+MAX_KEEPALIVE = 20
+
+# One context for the whole process: certificates are loaded once and every
+# connection shares the same session cache instead of building its own.
+SSL_CONTEXT = ssl.create_default_context(cafile=CA_FILE)
+
+
+def http2_enabled():
+    return H2_AVAILABLE and os.environ.get('TM_HTTP2', '1') != '0'
+
+
+class ConnectionStats:
+    """Counts requests vs. new connections for the per-run reuse report"""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+        self.tls_handshakes = 0
+        self.versions = Counter()
+
+    async def trace(self, event_name, info):
+        # httpcore emits these once per new connection, never on reuse
+        if event_name == 'connection.connect_tcp.complete':
+            self.connections += 1
+        elif event_name == 'connection.start_tls.complete':
+            self.tls_handshakes += 1
+
+    def record(self, response):
+        self.requests += 1
+        self.versions[response.http_version] += 1
+
+    def reuse_ratio(self):
+        if not self.requests:
+            return 0.0
+        return max(0.0, 1 - self.connections / self.requests)
+
+    def report(self):
+        versions = ', '.join(f"{v}: {n}" for v, n in self.versions.most_common()) or '-'
+        return (f"Connections: {self.requests} requests over {self.connections} connections "
+                f"({self.reuse_ratio():.1%} reused) | TLS handshakes: {self.tls_handshakes} | {versions}")
+
+
+def build_client(headers, timeout, max_connections, http2=None):
+    """Pooled keep-alive AsyncClient shared by every request in a run"""
+    if http2 is None:
+        http2 = http2_enabled()
+    return httpx.AsyncClient(
+        headers=headers,
+        timeout=timeout,
+        follow_redirects=True,
+        http2=http2,
+        verify=SSL_CONTEXT,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=MAX_KEEPALIVE,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+    )
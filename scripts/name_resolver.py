@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Local name -> player_id resolver, so legacy rows without IDs don't cost a
+Transfermarkt search each.
+
+The index is built once from every player in the store (all known
+rosters):
+
+    fold(name)      lower case, diacritics removed (Bîrligea -> birligea,
+                    Ștefan -> stefan), punctuation dropped, tokens sorted so
+                    "Olaru Darius" == "Darius Olaru"
+    exact           folded name -> players, answered with one dict lookup
+    trigrams        per-token trigram postings for names that differ by a
+                    letter or two; candidates are scored by Dice overlap
+
+Several candidates are told apart by club (the legacy file's `Club`) and
+age. A name still unresolved - no candidate, or two equally good ones - is
+a true miss and only then goes to the schnellsuche search
+(scraper_details.search_player); the answer, hit or miss, is cached in
+name_cache.json so it is never searched twice.
+
+    python scripts/name_resolver.py "Darius Olaru" [--club "FCSB"] [--age 27]
+    python scripts/name_resolver.py --batch scripts/scraped_players.json [--offline]
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+import unicodedata
+
+from player_store import PlayerStore
+import tm_parse
+
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'name_cache.json')
+
+MIN_SIMILARITY = 0.6    # Dice overlap of trigrams for a fuzzy candidate
+CLUB_BONUS = 0.2
+AGE_BONUS = 0.1
+MARGIN = 0.05           # the best must beat a different player by this much
+STOP_GRAM_SHARE = 0.05  # trigrams in more names than this share are skipped when rarer ones exist
+
+# Letters NFKD leaves alone
+FOLD = str.maketrans({'ł': 'l', 'ø': 'o', 'đ': 'd', 'ß': 'ss', 'æ': 'ae', 'œ': 'oe', 'ı': 'i', 'þ': 'th'})
+NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+def fold(name):
+    """'Daniel Bîrligea' -> 'birligea daniel'"""
+    text = unicodedata.normalize('NFKD', (name or '').lower().translate(FOLD))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(sorted(NON_ALNUM.sub(' ', text).split()))
+
+def trigrams(key):
+    grams = set()
+    for token in key.split():
+        padded = f'  {token} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def similarity(a, b):
+    """Dice overlap of two folded names' trigrams"""
+    ga, gb = trigrams(a), trigrams(b)
+    return 2 * len(ga & gb) / max(1, len(ga) + len(gb))
+
+def clubs_match(a, b):
+    """Folded club names, one inside the other ('fcsb' / 'fcsb bucuresti')"""
+    return bool(a and b) and (a in b or b in a)
+
+class NameResolver:
+    """Trigram index over the store's players; resolve() -> player_id or None"""
+
+    def __init__(self, players, search=None, cache_file=CACHE_FILE):
+        self.entries = []       # (player_id, folded club, age)
+        self.urls = {}
+        self.exact = {}
+        self.postings = {}
+        self.sizes = []
+        for p in players:
+            index = len(self.entries)
+            self.entries.append((p['player_id'], fold(p.get('club')), p.get('age')))
+            if p.get('profile_url'):
+                self.urls[p['player_id']] = p['profile_url']
+            keys = {fold(p.get('name'))} | {fold(p.get('full_name'))}
+            keys.discard('')
+            grams = set()
+            for key in keys:
+                self.exact.setdefault(key, []).append(index)
+                grams |= trigrams(key)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(index)
+        self.stop_size = max(50, int(len(self.entries) * STOP_GRAM_SHARE))
+
+        self.search = search
+        self.cache_file = cache_file
+        self.cache = {}
+        if cache_file and os.path.exists(cache_file):
+            with open(cache_file, encoding='utf-8') as f:
+                self.cache = json.load(f)
+        self.stats = {'exact': 0, 'fuzzy': 0, 'cached': 0, 'searched': 0, 'missed': 0}
+
+    @classmethod
+    def from_store(cls, store, **kwargs):
+        return cls(store.select(['name', 'full_name', 'club', 'age', 'profile_url']), **kwargs)
+
+    def candidates(self, key):
+        """[(similarity, entry index)] for a folded name"""
+        if key in self.exact:
+            return [(1.0, index) for index in self.exact[key]]
+        grams = trigrams(key)
+        lists = [self.postings[g] for g in grams if g in self.postings]
+        rare = [postings for postings in lists if len(postings) <= self.stop_size]
+        counts = {}
+        for postings in rare or lists:
+            for index in postings:
+                counts[index] = counts.get(index, 0) + 1
+        if rare and len(rare) < len(lists):
+            # Overlap on the skipped common trigrams, for the few candidates left
+            common = [set(postings) for postings in lists if len(postings) > self.stop_size]
+            for index in counts:
+                counts[index] += sum(1 for postings in common if index in postings)
+        scored = [(2 * n / (len(grams) + self.sizes[index]), index) for index, n in counts.items()]
+        return [(score, index) for score, index in scored if score >= MIN_SIMILARITY]
+
+    def resolve_local(self, name, club=None, age=None):
+        """player_id from the index; None if no candidate or two equally good ones"""
+        club = fold(club)
+        scored = []
+        for score, index in self.candidates(fold(name)):
+            pid, entry_club, entry_age = self.entries[index]
+            if clubs_match(club, entry_club):
+                score += CLUB_BONUS
+            if age and entry_age is not None:
+                try:
+                    if abs(int(age) - int(entry_age)) <= 1:
+                        score += AGE_BONUS
+                except (TypeError, ValueError):
+                    pass
+            scored.append((score, pid))
+        if not scored:
+            return None
+        scored.sort(reverse=True)
+        best_score, best = scored[0]
+        for score, pid in scored[1:]:
+            if pid != best:
+                if best_score - score < MARGIN:
+                    return None
+                break
+        return best
+
+    def resolve(self, name, club=None, age=None):
+        """player_id from the index, else the cache, else one search (cached); None if unknown"""
+        key = fold(name)
+        pid = self.resolve_local(name, club, age)
+        if pid:
+            self.stats['exact' if key in self.exact else 'fuzzy'] += 1
+            return pid
+        cache_key = f"{key}|{fold(club)}"
+        if cache_key in self.cache:
+            self.stats['cached'] += 1
+            return self.cache[cache_key]
+        if not self.search:
+            self.stats['missed'] += 1
+            return None
+        self.stats['searched'] += 1
+        url = self.search(name, club or None)
+        match = tm_parse.PLAYER_ID.search(url or '')
+        # The search falls back to its first hit; only keep it if the URL slug fits the name
+        slug = url.split('/')[3] if match and url.count('/') > 3 else ''
+        pid = match.group(1) if match and similarity(key, fold(slug)) >= MIN_SIMILARITY else None
+        if pid is None:
+            self.stats['missed'] += 1
+        self.cache[cache_key] = pid
+        return pid
+
+    def profile_url(self, player_id):
+        return self.urls.get(player_id) or f"https://www.transfermarkt.com/spieler/profil/spieler/{player_id}"
+
+    def save(self):
+        if self.cache_file:
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(self.cache, f, ensure_ascii=False, indent=1)
+
+    def report(self):
+        return ' | '.join(f"{k}: {v}" for k, v in self.stats.items())
+
+def legacy_row(row):
+    """(name, club, age) from a scraped_players.json row"""
+    name = row['Player'][0] if isinstance(row.get('Player'), list) else row.get('Player')
+    return name, row.get('Club') or None, row.get('Age')
+
+def main():
+    parser = argparse.ArgumentParser(description='Resolve player names to player_id from the local index')
+    parser.add_argument('name', nargs='?')
+    parser.add_argument('--club')
+    parser.add_argument('--age')
+    parser.add_argument('--batch', help='resolve every row of a scraped_players.json-style file')
+    parser.add_argument('--offline', action='store_true', help='never search, report misses only')
+    args = parser.parse_args()
+    if not args.name and not args.batch:
+        parser.error('give a name or --batch FILE')
+
+    search = None
+    if not args.offline:
+        from scraper_details import search_player
+        search = search_player
+
+    start = time.perf_counter()
+    store = PlayerStore.for_json()
+    resolver = NameResolver.from_store(store, search=search)
+    store.close()
+    print(f"Index: {len(resolver.entries)} players, {len(resolver.postings)} trigrams "
+          f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    if args.name:
+        start = time.perf_counter()
+        pid = resolver.resolve(args.name, args.club, args.age)
+        print(f"{args.name} -> {pid or 'not found'} ({(time.perf_counter() - start) * 1e6:.0f} µs)")
+    else:
+        with open(args.batch, encoding='utf-8') as f:
+            rows = json.load(f)
+        start = time.perf_counter()
+        for row in rows:
+            resolver.resolve(*legacy_row(row))
+        elapsed = time.perf_counter() - start
+        print(f"{len(rows)} rows in {elapsed:.2f}s | {resolver.report()}")
+    resolver.save()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Two-stage fetch/parse pipeline.
+
+Fetching is I/O-bound and parsing is CPU-bound; doing both in the same
+worker (or thread, under the GIL) means parsing serializes as soon as pages
+come back quickly, e.g. from the cache or archive. Here the stages are split:
+
+    fetch stage   asyncio workers calling the shared fetch engine
+        │  bounded queue of raw pages (back-pressure on the fetchers)
+    parse stage   ProcessPoolExecutor running parse(html) -> small dict
+
+    async for item, parsed in fetch_and_parse(players, url_for, parse_stats, kind='profile'):
+        ...
+
+`parse` must be a module-level function (it is pickled to the workers) and
+should return a compact dict, not a tree. Stage sizes default to
+TM_FETCH_WORKERS (8), TM_PARSE_WORKERS (CPU count) and TM_PARSE_QUEUE (64).
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fetch_engine import fetch_html
+
+FETCH_WORKERS = int(os.environ.get('TM_FETCH_WORKERS', 8))
+PARSE_WORKERS = int(os.environ.get('TM_PARSE_WORKERS', os.cpu_count() or 2))
+QUEUE_SIZE = int(os.environ.get('TM_PARSE_QUEUE', 64))
+
+_DONE = object()
+
+
+def _timed(parse, html):
+    start = time.process_time()
+    return parse(html), time.process_time() - start
+
+
+class PipelineStats:
+    def __init__(self, fetch_workers, parse_workers):
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self.pages = 0
+        self.missing = 0
+        self.parse_errors = 0
+        self.parse_cpu = 0.0
+        self.queue_peak = 0
+        self.started = time.monotonic()
+
+    def report(self):
+        wall = time.monotonic() - self.started
+        return (f"Pipeline: {self.pages} pages parsed ({self.missing} not fetched, {self.parse_errors} parse errors) "
+                f"in {wall:.1f}s | parse CPU {self.parse_cpu:.1f}s over {self.parse_workers} processes | "
+                f"{self.fetch_workers} fetchers | queue peak {self.queue_peak}")
+
+
+async def fetch_and_parse(items, url_for, parse, kind='page', fetch_workers=FETCH_WORKERS,
+                          parse_workers=PARSE_WORKERS, queue_size=QUEUE_SIZE, stats=None):
+    """Yield (item, parse(html)) as pages are parsed; parsed is None if the page could not be fetched"""
+    loop = asyncio.get_running_loop()
+    stats = stats or PipelineStats(fetch_workers, parse_workers)
+    todo = asyncio.Queue()
+    for item in items:
+        todo.put_nowait(item)
+    pages = asyncio.Queue(maxsize=queue_size)
+    results = asyncio.Queue()
+
+    async def fetcher():
+        while True:
+            try:
+                item = todo.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            html = await fetch_html(url_for(item), kind=kind)
+            await pages.put((item, html))    # waits while the parsers are behind
+            stats.queue_peak = max(stats.queue_peak, pages.qsize())
+
+    async def parser(pool):
+        while True:
+            entry = await pages.get()
+            if entry is _DONE:
+                return
+            item, html = entry
+            parsed = None
+            if html is None:
+                stats.missing += 1
+            else:
+                try:
+                    parsed, cpu = await loop.run_in_executor(pool, _timed, parse, html)
+                    stats.parse_cpu += cpu
+                    stats.pages += 1
+                except Exception as e:
+                    print(f"  Parse error: {e}", flush=True)
+                    stats.parse_errors += 1
+            await results.put((item, parsed))
+
+    async def drain(fetchers, parsers):
+        try:
+            await asyncio.gather(*fetchers, return_exceptions=True)
+            for _ in parsers:
+                await pages.put(_DONE)
+            await asyncio.gather(*parsers, return_exceptions=True)
+        finally:
+            await results.put(_DONE)
+
+    with ProcessPoolExecutor(max_workers=parse_workers) as pool:
+        fetchers = [asyncio.create_task(fetcher()) for _ in range(fetch_workers)]
+        parsers = [asyncio.create_task(parser(pool)) for _ in range(parse_workers)]
+        closer = asyncio.create_task(drain(fetchers, parsers))
+        try:
+            while True:
+                result = await results.get()
+                if result is _DONE:
+                    break
+                yield result
+        finally:
+            # Consumer stopped early (or failed): stop both stages
+            for task in fetchers + parsers + [closer]:
+                task.cancel()
+            await asyncio.gather(*fetchers, *parsers, closer, return_exceptions=True)
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Canonical SQLite store for player data.
+
+players.json used to be the only copy of the database, so every enricher
+loaded all ~21k players and rewrote the whole file to change a few fields.
+The store keeps the same data in SQLite:
+
+    players        one row per player; hot fields as columns, the rest as JSON
+    season_stats   one row per player/season/competition
+    transfers      transfer history, in page order
+    scrape_meta    which script last wrote which player, and when
+
+Scrapers upsert only the fields they found (store.upsert(pid, {'position': ...},
+source='enrich_profile')), roster rescrapes replace() the player set, and
+players.json becomes an export - no script writes it directly any more:
+
+    python scripts/player_store.py import public/players.json
+    python scripts/player_store.py export public/players.json
+    python scripts/player_store.py stats
+
+The file defaults to scripts/players.db (TM_STORE overrides it).
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import time
+
+STORE_FILE = os.environ.get(
+    'TM_STORE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'players.db'))
+PLAYERS_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'public', 'players.json')
+
+# Stored as real columns (indexed / filtered on); everything else goes in `data`
+COLUMNS = ('name', 'club', 'club_id', 'league', 'league_code', 'position', 'age',
+           'market_value', 'profile_url', 'scraped_at')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS players (
+    player_id TEXT PRIMARY KEY,
+    name TEXT,
+    club TEXT,
+    club_id TEXT,
+    league TEXT,
+    league_code TEXT,
+    position TEXT,
+    age INTEGER,
+    market_value TEXT,
+    profile_url TEXT,
+    scraped_at TEXT,
+    data TEXT NOT NULL DEFAULT '{}',
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_players_league ON players(league_code);
+CREATE INDEX IF NOT EXISTS idx_players_club ON players(club_id);
+CREATE INDEX IF NOT EXISTS idx_players_scraped ON players(scraped_at);
+
+CREATE TABLE IF NOT EXISTS season_stats (
+    player_id TEXT NOT NULL,
+    origin TEXT NOT NULL,          -- 'season_stats' or 'career_stats' (where the list came from)
+    seq INTEGER NOT NULL,
+    season TEXT,
+    competition TEXT,
+    appearances INTEGER,
+    goals INTEGER,
+    assists INTEGER,
+    data TEXT NOT NULL,
+    PRIMARY KEY (player_id, origin, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_season_stats_season ON season_stats(season);
+
+CREATE TABLE IF NOT EXISTS transfers (
+    player_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    season TEXT,
+    date TEXT,
+    from_club TEXT,
+    to_club TEXT,
+    fee TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (player_id, seq)
+);
+
+CREATE TABLE IF NOT EXISTS scrape_meta (
+    player_id TEXT NOT NULL,
+    source TEXT NOT NULL,
+    fields TEXT NOT NULL,
+    scraped_at REAL NOT NULL,
+    PRIMARY KEY (player_id, source)
+);
+CREATE INDEX IF NOT EXISTS idx_scrape_meta_scraped ON scrape_meta(scraped_at);
+'''
+
+
+def _json_path(field):
+    return '$."' + field.replace('"', '\\"') + '"'
+
+
+def _field_sql(field):
+    """SQL expression reading one player field, column or JSON"""
+    if field in COLUMNS or field == 'player_id':
+        return field
+    return f"json_extract(data, '{_json_path(field)}')"
+
+
+class PlayerStore:
+    """Field-level upserts over the canonical player tables"""
+
+    def __init__(self, path=STORE_FILE):
+        self.path = path
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(SCHEMA)
+
+    @classmethod
+    def for_json(cls, json_path=PLAYERS_JSON, path=STORE_FILE):
+        """Open the store, importing players.json the first time"""
+        store = cls(path)
+        if not store.count() and os.path.exists(json_path):
+            with open(json_path, encoding='utf-8') as f:
+                players = json.load(f)
+            store.upsert_many(players, source='import')
+            store.commit()
+            print(f"Imported {len(players)} players from {json_path} into {path}")
+        return store
+
+    def count(self):
+        return self.db.execute('SELECT COUNT(*) FROM players').fetchone()[0]
+
+    def upsert(self, player_id, fields, source=None):
+        """Insert the player or update just these fields"""
+        player_id = str(player_id)
+        fields = dict(fields)
+        fields.pop('player_id', None)
+        season_stats = fields.pop('season_stats', None)
+        transfers = fields.pop('transfer_history', None)
+        career = fields.get('career_stats')
+        if isinstance(career, dict) and 'stats_by_season' in career:
+            career = dict(career)
+            career_seasons = career.pop('stats_by_season')
+            fields['career_stats'] = career
+        else:
+            career_seasons = None
+
+        columns = {k: v for k, v in fields.items() if k in COLUMNS}
+        extra = {k: v for k, v in fields.items() if k not in COLUMNS}
+        # Lists kept in their own tables: an empty one stays in the JSON blob so
+        # the export still has the key ([]), a non-empty one replaces it
+        dropped = []
+        for key, rows in (('season_stats', season_stats), ('transfer_history', transfers)):
+            if rows is not None:
+                if rows:
+                    dropped.append(key)
+                else:
+                    extra[key] = []
+        if career_seasons == []:
+            fields['career_stats']['stats_by_season'] = []
+        now = time.time()
+
+        self.db.execute('INSERT OR IGNORE INTO players (player_id, updated_at) VALUES (?, ?)', (player_id, now))
+        assignments = [f'{k} = ?' for k in columns] + ['updated_at = ?']
+        params = list(columns.values()) + [now]
+        data = 'data'
+        if dropped:
+            keys = ', '.join(f"'{_json_path(k)}'" for k in dropped)
+            data = f'json_remove(data, {keys})'
+        if extra:
+            # json_set touches only the given keys of the JSON blob
+            paths = ', '.join(f"'{_json_path(k)}', json(?)" for k in extra)
+            data = f'json_set({data}, {paths})'
+            params += [json.dumps(v, ensure_ascii=False) for v in extra.values()]
+        if data != 'data':
+            assignments.append(f'data = {data}')
+        self.db.execute(f"UPDATE players SET {', '.join(assignments)} WHERE player_id = ?", params + [player_id])
+
+        if season_stats is not None:
+            self._replace_seasons(player_id, 'season_stats', season_stats)
+        if career_seasons is not None:
+            self._replace_seasons(player_id, 'career_stats', career_seasons)
+        if transfers is not None:
+            self._replace_transfers(player_id, transfers)
+        if source:
+            self.db.execute('INSERT OR REPLACE INTO scrape_meta (player_id, source, fields, scraped_at) '
+                            'VALUES (?, ?, ?, ?)', (player_id, source, json.dumps(sorted(fields)), now))
+
+    def upsert_many(self, players, source=None):
+        for p in players:
+            pid = p.get('player_id') or p.get('playerId')
+            if pid:
+                self.upsert(pid, p, source)
+
+    def _replace_seasons(self, player_id, origin, seasons):
+        self.db.execute('DELETE FROM season_stats WHERE player_id = ? AND origin = ?', (player_id, origin))
+        self.db.executemany(
+            'INSERT INTO season_stats (player_id, origin, seq, season, competition, appearances, goals, assists, data) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            [(player_id, origin, i, s.get('season'), s.get('competition'), s.get('appearances'),
+              s.get('goals'), s.get('assists'), json.dumps(s, ensure_ascii=False)) for i, s in enumerate(seasons)])
+
+    def _replace_transfers(self, player_id, transfers):
+        self.db.execute('DELETE FROM transfers WHERE player_id = ?', (player_id,))
+        self.db.executemany(
+            'INSERT INTO transfers (player_id, seq, season, date, from_club, to_club, fee, data) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            [(player_id, i, t.get('season'), t.get('date'), t.get('from_club'), t.get('to_club'),
+              t.get('fee'), json.dumps(t, ensure_ascii=False)) for i, t in enumerate(transfers)])
+
+    def select(self, fields, missing=None, where=None, params=()):
+        """Rows as dicts of player_id + fields; missing='position' keeps players without one"""
+        cols = ', '.join(['player_id'] + [_field_sql(f) for f in fields])
+        query = f'SELECT {cols} FROM players'
+        clauses = []
+        if missing:
+            expr = _field_sql(missing)
+            clauses.append(f"({expr} IS NULL OR {expr} = '')")
+        if where:
+            clauses.append(where)
+        if clauses:
+            query += ' WHERE ' + ' AND '.join(clauses)
+        return [dict(zip(['player_id'] + list(fields), row)) for row in self.db.execute(query + ' ORDER BY rowid', params)]
+
+    def get(self, player_id):
+        """Full player dict as it appears in players.json"""
+        row = self.db.execute(f"SELECT player_id, {', '.join(COLUMNS)}, data FROM players WHERE player_id = ?",
+                              (str(player_id),)).fetchone()
+        return self._assemble(row) if row else None
+
+    def _assemble(self, row, seasons=None, transfers=None):
+        player = {'player_id': row[0]}
+        player.update({k: v for k, v in zip(COLUMNS, row[1:-1]) if v is not None})
+        player.update(json.loads(row[-1]))
+        # The column is TEXT; players.json has numeric club ids
+        if isinstance(player.get('club_id'), str) and player['club_id'].isdigit():
+            player['club_id'] = int(player['club_id'])
+        pid = row[0]
+        if seasons is None:
+            seasons = self._seasons_for(pid)
+        if transfers is None:
+            transfers = self.transfer_history(pid)
+        if 'season_stats' in seasons:
+            player['season_stats'] = seasons['season_stats']
+        if 'career_stats' in seasons:
+            player.setdefault('career_stats', {})['stats_by_season'] = seasons['career_stats']
+        if transfers:
+            player['transfer_history'] = transfers
+        return player
+
+    def transfer_history(self, player_id):
+        """Stored transfer_history for one player, in page order ([] if none)"""
+        return [json.loads(d) for (d,) in self.db.execute(
+            'SELECT data FROM transfers WHERE player_id = ? ORDER BY seq', (str(player_id),))]
+
+    def _seasons_for(self, player_id):
+        seasons = {}
+        for origin, data in self.db.execute(
+                'SELECT origin, data FROM season_stats WHERE player_id = ? ORDER BY origin, seq', (player_id,)):
+            seasons.setdefault(origin, []).append(json.loads(data))
+        return seasons
+
+    def delete(self, player_ids):
+        """Remove players and everything stored for them"""
+        rows = [(str(pid),) for pid in player_ids]
+        for table in ('players', 'season_stats', 'transfers', 'scrape_meta'):
+            self.db.executemany(f'DELETE FROM {table} WHERE player_id = ?', rows)
+        return len(rows)
+
+    def replace(self, players, source, where=None, params=()):
+        """Make `players` the full set (or the full set matching `where`): upsert them, delete the rest.
+
+        Roster rescrapes use this, so players who left every covered roster
+        drop out of the store and the next export instead of coming back.
+        """
+        self.upsert_many(players, source)
+        keep = {str(p.get('player_id') or p.get('playerId')) for p in players}
+        query = 'SELECT player_id FROM players' + (f' WHERE {where}' if where else '')
+        gone = [pid for (pid,) in self.db.execute(query, params) if pid not in keep]
+        return self.delete(gone)
+
+    def players(self):
+        """Every player as it appears in players.json"""
+        seasons = {}
+        for pid, origin, data in self.db.execute(
+                'SELECT player_id, origin, data FROM season_stats ORDER BY player_id, origin, seq'):
+            seasons.setdefault(pid, {}).setdefault(origin, []).append(json.loads(data))
+        transfers = {}
+        for pid, data in self.db.execute('SELECT player_id, data FROM transfers ORDER BY player_id, seq'):
+            transfers.setdefault(pid, []).append(json.loads(data))
+        return [self._assemble(row, seasons.get(row[0], {}), transfers.get(row[0], []))
+                for row in self.db.execute(f"SELECT player_id, {', '.join(COLUMNS)}, data FROM players ORDER BY rowid")]
+
+    def export(self, json_path=PLAYERS_JSON):
+        """Write players.json from the store (atomic replace)"""
+        players = self.players()
+        tmp = json_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(players, f, ensure_ascii=False)
+        os.replace(tmp, json_path)
+        return len(players)
+
+    def commit(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    target = sys.argv[2] if len(sys.argv) > 2 else PLAYERS_JSON
+    store = PlayerStore()
+    if command == 'import':
+        with open(target, encoding='utf-8') as f:
+            players = json.load(f)
+        store.upsert_many(players, source='import')
+        print(f"Imported {len(players)} players into {store.path}")
+    elif command == 'export':
+        print(f"Exported {store.export(target)} players to {target}")
+    else:
+        print(f"Players: {store.count()}")
+        for code, count in store.db.execute(
+                'SELECT league_code, COUNT(*) FROM players GROUP BY league_code ORDER BY COUNT(*) DESC'):
+            print(f"  {code or '-':8} {count:6}")
+        for source, count, last in store.db.execute(
+                'SELECT source, COUNT(*), MAX(scraped_at) FROM scrape_meta GROUP BY source ORDER BY source'):
+            print(f"  source {source:20} {count:6} players  last {time.strftime('%Y-%m-%d %H:%M', time.localtime(last))}")
+    store.close()
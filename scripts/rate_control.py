@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Adaptive AIMD rate controller for the fetch engine.
+
+Each host gets a token bucket whose rate is learned at run time instead of
+hand-tuned sleeps: every successful response raises the rate additively, a
+429 (or a connection error) cuts it multiplicatively and honours Retry-After,
+and a sharp rise in latency trims it before Transfermarkt starts refusing.
+Workers call `await acquire(host)` before each request.
+
+Start/ceiling rates can be overridden with TM_RATE_START and TM_RATE_MAX
+(requests per second).
+"""
+
+import asyncio
+import os
+import time
+from email.utils import parsedate_to_datetime
+
+START_RATE = float(os.environ.get('TM_RATE_START', 0.5))   # req/s
+MAX_RATE = float(os.environ.get('TM_RATE_MAX', 4.0))
+MIN_RATE = 0.05
+ADDITIVE_STEP = 0.05      # req/s gained per second of clean traffic
+DECREASE_FACTOR = 0.5     # multiplicative cut on 429
+LATENCY_CUT = 0.85        # gentler cut when latency spikes
+LATENCY_SPIKE = 2.5       # latency > 2.5x baseline counts as congestion
+DEFAULT_BACKOFF = 30      # seconds to pause a host on 429 without Retry-After
+ERROR_BACKOFF = 5
+
+
+def parse_retry_after(value):
+    """Retry-After is either delta-seconds or an HTTP date"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    try:
+        return max(0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostRate:
+    """Token bucket + AIMD state for one host"""
+
+    def __init__(self, host, rate=START_RATE):
+        self.host = host
+        self.rate = rate
+        self.next_slot = 0.0
+        self.paused_until = 0.0
+        self.last_cut = 0.0
+        self.latency_base = None
+        self.latency_avg = None
+        self.cuts = 0
+        self.started = time.monotonic()
+        self.rate_seconds = 0.0    # integral of rate over time, for the settled average
+        self.last_change = self.started
+        self.lock = asyncio.Lock()
+
+    def _set_rate(self, rate):
+        now = time.monotonic()
+        self.rate_seconds += self.rate * (now - self.last_change)
+        self.last_change = now
+        self.rate = min(MAX_RATE, max(MIN_RATE, rate))
+
+    def settled_rate(self):
+        now = time.monotonic()
+        elapsed = now - self.started
+        if elapsed <= 0:
+            return self.rate
+        return (self.rate_seconds + self.rate * (now - self.last_change)) / elapsed
+
+
+class AimdRateController:
+    """Learns a sustainable request rate per host"""
+
+    def __init__(self, start_rate=START_RATE):
+        self.start_rate = start_rate
+        self.hosts = {}
+
+    def _host(self, host):
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = HostRate(host, self.start_rate)
+        return state
+
+    async def acquire(self, host):
+        """Wait for the next request token for this host"""
+        state = self._host(host)
+        async with state.lock:
+            now = time.monotonic()
+            slot = max(now, state.next_slot, state.paused_until)
+            state.next_slot = slot + 1.0 / state.rate
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def on_success(self, host, latency):
+        state = self._host(host)
+        # Additive increase: ADDITIVE_STEP req/s for every second of clean traffic
+        state._set_rate(state.rate + ADDITIVE_STEP / state.rate)
+
+        if state.latency_avg is None:
+            state.latency_avg = state.latency_base = latency
+            return
+        state.latency_avg = 0.8 * state.latency_avg + 0.2 * latency
+        state.latency_base = min(state.latency_base, state.latency_avg)
+        if state.latency_avg > LATENCY_SPIKE * state.latency_base and self._can_cut(state):
+            self._cut(state, LATENCY_CUT, f"latency {state.latency_avg:.1f}s")
+
+    def on_throttle(self, host, retry_after=None):
+        """429 from the server: cut the rate and pause the host"""
+        state = self._host(host)
+        pause = retry_after if retry_after is not None else DEFAULT_BACKOFF
+        state.paused_until = max(state.paused_until, time.monotonic() + pause)
+        if self._can_cut(state):
+            self._cut(state, DECREASE_FACTOR, f"429, pausing {pause:.0f}s")
+
+    def on_error(self, host):
+        state = self._host(host)
+        state.paused_until = max(state.paused_until, time.monotonic() + ERROR_BACKOFF)
+        if self._can_cut(state):
+            self._cut(state, DECREASE_FACTOR, "connection error")
+
+    def _can_cut(self, state):
+        # Requests already in flight when the first 429 lands will also fail;
+        # only cut once per window so one burst doesn't collapse the rate.
+        return time.monotonic() - state.last_cut > max(2.0, 2.0 / state.rate)
+
+    def _cut(self, state, factor, reason):
+        old = state.rate
+        state._set_rate(state.rate * factor)
+        state.last_cut = time.monotonic()
+        state.cuts += 1
+        print(f"  ⚠ {state.host}: {reason} → rate {old:.2f} → {state.rate:.2f} req/s", flush=True)
+
+    def report(self):
+        lines = []
+        for state in self.hosts.values():
+            lines.append(f"Rate {state.host}: settled at {state.settled_rate():.2f} req/s "
+                         f"(now {state.rate:.2f}, {state.cuts} cuts)")
+        return '\n'.join(lines)
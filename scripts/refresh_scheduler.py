@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Incremental refresh: keep every player's pages fresh within a request budget.
+
+The batch scripts refresh all-or-nothing - a league at a time
+(completed_leagues) or a whole player list (completed_ids) - so one part of
+the data is hours old while the rest waits weeks. The scheduler instead
+keeps a priority queue of (player_id, page_kind) work items and spends a
+fixed number of requests per hour on the most overdue ones:
+
+    urgency = age since last scrape / REFRESH_DAYS[kind]
+              x league weight (Romania first)
+              x market-value weight
+              x transfer-window weight (profile + transfers pages only)
+
+An item is due once its urgency reaches 1, so a RO1 regular is refreshed
+about three times as often as a player in a low-priority league. "Last
+scrape" is the newest scrape_meta entry of a source that writes that page's
+fields (see SOURCES), else the record's scraped_at.
+
+    python scripts/refresh_scheduler.py                    # run continuously, 600 requests/hour
+    python scripts/refresh_scheduler.py --budget 1200 --league RO1 RO2
+    python scripts/refresh_scheduler.py --once             # one tick (cron)
+    python scripts/refresh_scheduler.py --plan 20          # show the queue, no requests
+"""
+
+import argparse
+import asyncio
+import heapq
+import os
+import re
+import time
+from datetime import date, datetime
+
+from fetch_engine import run
+from player_store import PlayerStore
+from scrape_everything import scrape_profile, scrape_stats, scrape_transfers
+
+DAY = 86400
+
+# Base refresh interval per page kind, before the weights below
+REFRESH_DAYS = {'profile': 30, 'stats': 14, 'transfers': 60}
+
+# scrape_meta sources that count as a fresh scrape of each page kind. The
+# enrichers (enrich_fast, enrich_roster, enrich_profile_head, enrich_profile,
+# enrich_data) only fill fields a player was missing - mostly from squad pages
+# or the profile header - so they leave the rest of the profile as old as it was.
+SOURCES = {
+    'profile': ('refresh_profile',),
+    'stats': ('refresh_stats', 'club_stats', 'enrich_stats'),
+    'transfers': ('refresh_transfers', 'club_transfers', 'player_transfers', 'enrich_transfers'),
+}
+
+LEAGUE_WEIGHT = {'RO1': 3.0, 'RO2': 2.5, 'RO3': 2.0}
+VALUE_CAP = 5_000_000           # players worth this much or more get the full value weight (x2)
+
+# Approximate registration windows as ((month, day), (month, day)); players
+# move (and their profile/transfer pages change) in and just before them
+TRANSFER_WINDOWS = (((6, 1), (9, 1)), ((1, 1), (2, 15)))
+WINDOW_LEAD_DAYS = 14
+WINDOW_KINDS = ('profile', 'transfers')
+
+def parse_value(text):
+    """'€1.50m' / '€300k' -> euros (0 if unknown)"""
+    match = re.search(r'([\d.]+)\s*(k|m|bn)?', (text or '').replace(',', '').lower())
+    if not match:
+        return 0
+    try:
+        number = float(match.group(1))
+    except ValueError:
+        return 0
+    return number * {'k': 1e3, 'm': 1e6, 'bn': 1e9}.get(match.group(2), 1)
+
+def window_weight(today):
+    """2 inside a transfer window, 1.5 in the two weeks before one opens, else 1"""
+    for (start_m, start_d), (end_m, end_d) in TRANSFER_WINDOWS:
+        start = date(today.year, start_m, start_d)
+        if start <= today <= date(today.year, end_m, end_d):
+            return 2.0
+        # The January window's lead-in starts in December of the year before
+        ahead = start if start > today else date(today.year + 1, start_m, start_d)
+        if (ahead - today).days <= WINDOW_LEAD_DAYS:
+            return 1.5
+    return 1.0
+
+def player_weight(player):
+    """League x market-value weight, shared by all of a player's page kinds"""
+    league = LEAGUE_WEIGHT.get(player.get('league_code') or '', 1.0)
+    value = 1.0 + min(parse_value(player.get('market_value')), VALUE_CAP) / VALUE_CAP
+    return league * value
+
+def parse_scraped_at(text):
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+class RefreshQueue:
+    """Max-urgency heap of (player_id, page_kind) items built from the store"""
+
+    def __init__(self, store, leagues=None):
+        self.store = store
+        self.leagues = leagues
+        self.players = {}
+        self.last = {}      # (player_id, kind) -> unix time of last scrape
+        self.heap = []
+
+    def load(self):
+        where, params = "profile_url IS NOT NULL AND profile_url != ''", ()
+        if self.leagues:
+            where += f" AND league_code IN ({', '.join('?' for _ in self.leagues)})"
+            params = tuple(self.leagues)
+        self.players = {p['player_id']: p for p in self.store.select(
+            ['league_code', 'market_value', 'profile_url', 'scraped_at'], where=where, params=params)}
+
+        kind_of = {source: kind for kind, sources in SOURCES.items() for source in sources}
+        self.last = {}
+        for pid, source, scraped_at in self.store.db.execute(
+                f"SELECT player_id, source, scraped_at FROM scrape_meta "
+                f"WHERE source IN ({', '.join('?' for _ in kind_of)})", tuple(kind_of)):
+            key = (pid, kind_of[source])
+            if scraped_at > self.last.get(key, 0):
+                self.last[key] = scraped_at
+        self.rebuild()
+
+    def urgency(self, pid, kind, now, window):
+        player = self.players[pid]
+        last = self.last.get((pid, kind)) or parse_scraped_at(player.get('scraped_at'))
+        age_days = (now - last) / DAY
+        weight = player['weight'] * (window if kind in WINDOW_KINDS else 1.0)
+        return age_days / REFRESH_DAYS[kind] * weight
+
+    def rebuild(self):
+        """Recompute every urgency; ages grow at different weighted rates, so order drifts"""
+        now = time.time()
+        window = window_weight(date.today())
+        for player in self.players.values():
+            player['weight'] = player_weight(player)
+        self.heap = [(-self.urgency(pid, kind, now, window), pid, kind)
+                     for pid in self.players for kind in REFRESH_DAYS]
+        heapq.heapify(self.heap)
+
+    def due(self):
+        return sum(1 for neg, _, _ in self.heap if -neg >= 1)
+
+    def pop_due(self, n):
+        """Up to n of the most urgent items that are due"""
+        items = []
+        while self.heap and len(items) < n and -self.heap[0][0] >= 1:
+            _, pid, kind = heapq.heappop(self.heap)
+            items.append((pid, kind))
+        return items
+
+    def done(self, pid, kind):
+        """Back in the queue as just scraped (also after a failure, so it isn't retried at once)"""
+        self.last[(pid, kind)] = time.time()
+        heapq.heappush(self.heap, (0.0, pid, kind))
+
+async def refresh(store, player, kind):
+    """Fetch one page kind for a player and upsert what it found; True if it had data"""
+    url = player['profile_url']
+    if kind == 'profile':
+        fields = await scrape_profile(url)
+    elif kind == 'stats':
+        stats = await scrape_stats(url)
+        fields = {'career_totals': stats['career_totals'], 'season_stats': stats['season_stats']} \
+            if stats.get('season_stats') else {}
+    else:
+        history = await scrape_transfers(url)
+        fields = {'transfer_history': history} if history else {}
+    if fields:
+        store.upsert(player['player_id'], fields, source=f'refresh_{kind}')
+    return bool(fields)
+
+def print_plan(queue, n):
+    now = time.time()
+    window = window_weight(date.today())
+    due = {kind: 0 for kind in REFRESH_DAYS}
+    for neg, _, kind in queue.heap:
+        if -neg >= 1:
+            due[kind] += 1
+    print(f"Players: {len(queue.players)} | Due: " + ', '.join(f"{k} {v}" for k, v in due.items()) +
+          f" | Transfer-window weight: {window}")
+    for neg, pid, kind in heapq.nsmallest(n, queue.heap):
+        player = queue.players[pid]
+        last = queue.last.get((pid, kind)) or parse_scraped_at(player.get('scraped_at'))
+        age = f"{(now - last) / DAY:.0f}d" if last else 'never'
+        print(f"  {-neg:7.2f}  {pid:>8} {kind:9} {player.get('league_code') or '-':5} "
+              f"{player.get('market_value') or '-':>10}  last {age}")
+
+async def main():
+    parser = argparse.ArgumentParser(description='Refresh the most overdue player pages within a request budget')
+    parser.add_argument('--budget', type=int, default=600, help='requests per hour')
+    parser.add_argument('--tick', type=int, default=60, help='seconds between batches')
+    parser.add_argument('--league', nargs='*', help='only players in these league codes')
+    parser.add_argument('--export-every', type=int, default=60, help='minutes between players.json exports')
+    parser.add_argument('--once', action='store_true', help='run a single batch and exit')
+    parser.add_argument('--plan', type=int, metavar='N', help='print the N most urgent items and exit')
+    args = parser.parse_args()
+
+    json_path = os.path.join(os.path.dirname(__file__), '..', 'public', 'players.json')
+    store = PlayerStore.for_json(json_path)
+    queue = RefreshQueue(store, args.league)
+    queue.load()
+
+    if args.plan is not None:
+        print_plan(queue, args.plan)
+        store.close()
+        return
+
+    print(f"Players: {len(queue.players)} | Items due: {queue.due()} | Budget: {args.budget} requests/hour", flush=True)
+    per_tick = args.budget * args.tick / 3600
+    allowance = 0.0
+    total = empty = 0
+    last_export = last_reload = time.time()
+    try:
+        while True:
+            allowance = min(allowance + per_tick, max(per_tick, 1.0) * 2)
+            batch = queue.pop_due(int(allowance))
+            allowance -= len(batch)
+            if batch:
+                results = await asyncio.gather(*(refresh(store, queue.players[pid], kind) for pid, kind in batch))
+                for pid, kind in batch:
+                    queue.done(pid, kind)
+                empty += results.count(False)
+                total += len(batch)
+                store.commit()
+                print(f"[{datetime.now():%H:%M:%S}] refreshed {len(batch)} "
+                      f"({', '.join(sorted({k for _, k in batch}))}) | total {total}, empty {empty} | "
+                      f"due {queue.due()}", flush=True)
+
+            if args.once:
+                break
+            if time.time() - last_export >= args.export_every * 60:
+                store.export(json_path)
+                last_export = time.time()
+            if time.time() - last_reload >= 3600:
+                # Pick up new players and other scripts' scrapes, re-rank
+                queue.load()
+                last_reload = time.time()
+            await asyncio.sleep(args.tick)
+    finally:
+        if total:
+            store.export(json_path)
+        store.close()
+        print(f"Refreshed {total} pages ({empty} without data)", flush=True)
+
+if __name__ == '__main__':
+    run(main())
@@ -2,29 +2,31 @@
 """
 Fast rescrape ALL leagues - current season rosters only.
 Updates club/roster data while keeping existing enriched profile data + stats.
+Each run is snapshotted and diffed with the previous one (roster_snapshot.py),
+so arrivals, departures and club moves end up in snapshots/events.jsonl.
+
+    python scripts/rescrape_all.py                        # full roster rescrape
+    python scripts/rescrape_all.py --market-values-only   # values from league listings only
 """
 
-import requests
-from bs4 import BeautifulSoup
-import json
-import time
-import random
+import argparse
+import asyncio
 import os
-import re
 import shutil
 from datetime import datetime
 
+from checkpoint import CheckpointJournal
+from fetch_engine import fetch_html, run
+from player_store import PlayerStore
+from roster_snapshot import record_run
+from scraper import iter_league
+from team_manifest import load_teams
+import tm_parse
+
 def get_current_season():
     now = datetime.now()
     return now.year if now.month >= 8 else now.year - 1
 
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
-    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-    'Accept-Language': 'en-US,en;q=0.5',
-    'Connection': 'keep-alive',
-}
-
 LEAGUES = [
     ("Romania Liga 1", "RO1"),
     ("Romania Liga 2", "RO2"),
@@ -65,147 +67,120 @@ LEAGUES = [
     ("MLS Next Pro", "MNP3"),
 ]
 
-def fetch_page(url, retries=3):
-    for i in range(retries):
-        try:
-            resp = requests.get(url, headers=HEADERS, timeout=30)
-            if resp.status_code == 200:
-                return resp.text
-            elif resp.status_code == 429:
-                print(f"  ⚠ Rate limited, waiting 60s...")
-                time.sleep(60)
-            elif resp.status_code == 302:
-                return None  # Redirect = league doesn't exist
-            else:
-                print(f"  HTTP {resp.status_code}")
-        except Exception as e:
-            print(f"  Error: {e}")
-            time.sleep(5)
-    return None
+ROSTER_FIELDS = ('player_id', 'name', 'profile_url', 'position', 'photo_url', 'age', 'date_of_birth',
+                 'market_value', 'nationality', 'shirt_number', 'height', 'foot')
 
-def get_teams(league_code):
-    url = f"https://www.transfermarkt.com/wettbewerb/startseite/wettbewerb/{league_code}"
-    html = fetch_page(url)
+async def get_roster(team_id):
+    url = f"https://www.transfermarkt.com/team/kader/verein/{team_id}/plus/1"
+    html = await fetch_html(url, kind='roster')
     if not html:
         return []
     
-    soup = BeautifulSoup(html, 'lxml')
-    teams = []
-    seen = set()
-    
-    links = soup.find_all('a', href=lambda x: x and '/startseite/verein/' in x)
-    for link in links:
-        href = link.get('href', '')
-        match = re.search(r'/verein/(\d+)', href)
-        if match:
-            team_id = match.group(1)
-            if team_id not in seen:
-                seen.add(team_id)
-                name = link.get('title') or link.get_text(strip=True)
-                if name and len(name) > 1:
-                    teams.append({'id': team_id, 'name': name})
-    
-    return teams
+    # One pass per row; fields come from the columns named in the table header
+    rows = tm_parse.roster_rows(tm_parse.document(html), base_url='https://www.transfermarkt.com')
+    return [{k: row[k] for k in ROSTER_FIELDS if k in row} for row in rows]
 
-def get_roster(team_id):
-    season = get_current_season()
-    url = f"https://www.transfermarkt.com/team/kader/verein/{team_id}/plus/1"
-    html = fetch_page(url)
-    if not html:
-        return []
+def build_player(player, old, team, league_name, league_code):
+    """Merge fresh roster data with the enriched record we already have"""
+    return {
+        'player_id': player['player_id'],
+        'name': player.get('name', old.get('name', '')),
+        'profile_url': player.get('profile_url', old.get('profile_url', '')),
+        'position': player.get('position') or old.get('position'),
+        'market_value': player.get('market_value', old.get('market_value', '-')),
+        'nationality': player.get('nationality', old.get('nationality', '')),
+        'shirt_number': player.get('shirt_number', old.get('shirt_number', '')),
+        'date_of_birth': player.get('date_of_birth', old.get('date_of_birth', '')),
+        'height': player.get('height', old.get('height', '')),
+        'foot': player.get('foot', old.get('foot', '')),
+        'citizenship': old.get('citizenship', ''),
+        'contract_expires': old.get('contract_expires', ''),
+        'photo_url': player.get('photo_url', old.get('photo_url', '')),
+        'age': player.get('age') or old.get('age'),
+        'club': team['name'],
+        'club_id': team['id'],
+        'league': league_name,
+        'league_code': league_code,
+        'scraped_at': datetime.now().isoformat(),
+        'career_stats': old.get('career_stats', {}),
+        'appearances': old.get('appearances') or (old.get('career_stats', {}).get('total_appearances', 0)),
+        'goals': old.get('goals') or (old.get('career_stats', {}).get('total_goals', 0)),
+        'assists': old.get('assists') or (old.get('career_stats', {}).get('total_assists', 0)),
+    }
+
+async def scrape_league(league_name, league_code, teams):
+    """Fetch all of a league's rosters concurrently"""
+    rosters = await asyncio.gather(*(get_roster(team['id']) for team in teams))
+    return league_name, league_code, teams, rosters
+
+async def get_market_values(league_name, league_code):
+    """Listing rows for a league, through scraper.iter_league (page 1, then the rest together)"""
+    rows = []
+    pages = 0
+    async for _, page_rows in iter_league(league_code):
+        rows.extend(page_rows)
+        pages += 1
+    return league_name, league_code, rows, pages
+
+async def refresh_market_values():
+    """Update market_value (and scraped_at) from the league listing pages.
     
-    soup = BeautifulSoup(html, 'lxml')
-    players = []
+    A listing page carries 25 players, a roster page one team, so this costs
+    about 25x fewer requests than a roster rescrape. Rows are matched to
+    existing players by the player_id in their profile link; nothing else
+    in the record changes.
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    players_file = os.path.join(script_dir, '..', 'public', 'players.json')
+    store = PlayerStore.for_json(players_file)
     
-    table = soup.find('table', class_='items')
-    if not table:
-        return []
+    print("Loading existing data...")
+    existing_map = {p['player_id']: p for p in store.select(['market_value'])}
+    print(f"Existing: {len(existing_map)} players")
+    print(f"Started: {datetime.now()}")
+    print()
     
-    rows = table.find_all('tr', class_=['odd', 'even'])
-    for row in rows:
-        try:
-            link = row.find('a', href=lambda x: x and '/profil/spieler/' in x)
-            if not link:
+    total_pages = matched = changed = unknown = 0
+    now = datetime.now().isoformat()
+    pending = [get_market_values(name, code) for name, code in LEAGUES]
+    for next_league in asyncio.as_completed(pending):
+        league_name, league_code, rows, pages = await next_league
+        total_pages += pages
+        league_matched = 0
+        for row in rows:
+            player = existing_map.get(row['player_id'])
+            if player is None:
+                unknown += 1
                 continue
-            
-            href = link.get('href', '')
-            match = re.search(r'/spieler/(\d+)', href)
-            if not match:
+            value = row['market_value']
+            if not value or value == '-':
                 continue
-            
-            player = {
-                'player_id': match.group(1),
-                'name': link.get_text(strip=True),
-                'profile_url': f"https://www.transfermarkt.com{href}",
-            }
-            
-            # Position
-            inline = row.find('table', class_='inline-table')
-            if inline:
-                trs = inline.find_all('tr')
-                if len(trs) > 1:
-                    player['position'] = trs[1].get_text(strip=True)
-            
-            # Photo
-            img = row.find('img', class_='bilderrahmen-fixed')
-            if img:
-                player['photo_url'] = img.get('data-src') or img.get('src')
-            
-            # Age + DOB
-            cells = row.find_all('td')
-            for cell in cells:
-                text = cell.get_text(strip=True)
-                if '(' in text and ')' in text:
-                    age_match = re.search(r'\((\d+)\)', text)
-                    if age_match:
-                        age = int(age_match.group(1))
-                        if 14 <= age <= 50:
-                            player['age'] = age
-                            player['date_of_birth'] = text
-            
-            # Market value
-            mv_cell = row.find('td', class_='rechts hauptlink')
-            if mv_cell:
-                player['market_value'] = mv_cell.get_text(strip=True)
-            
-            # Nationality
-            flag_cells = row.find_all('td', class_='zentriert')
-            for fc in flag_cells:
-                flags = fc.find_all('img', class_='flaggenrahmen')
-                if flags:
-                    nats = list(set(f.get('title') for f in flags if f.get('title')))
-                    if nats:
-                        player['nationality'] = nats[0] if len(nats) == 1 else nats
-                    break
-            
-            # Shirt number
-            shirt = row.find('div', class_='rn_nummer')
-            if shirt:
-                player['shirt_number'] = shirt.get_text(strip=True)
-            
-            # Height + Foot
-            for cell in cells:
-                text = cell.get_text(strip=True)
-                if 'm' in text and ',' in text and len(text) < 10:
-                    player['height'] = text
-                if text.lower() in ('left', 'right', 'both'):
-                    player['foot'] = text.lower()
-            
-            players.append(player)
-        except:
-            continue
+            if player.get('market_value') != value:
+                changed += 1
+            store.upsert(row['player_id'], {'market_value': value, 'scraped_at': now}, source='market_values')
+            league_matched += 1
+        matched += league_matched
+        store.commit()
+        print(f"[{league_code}] {league_name}: {pages} pages, {len(rows)} rows → {league_matched} values updated", flush=True)
     
-    return players
+    print(f"\n{'='*50}")
+    print(f"Pages: {total_pages} | Values updated: {matched} ({changed} changed) | Not in the store: {unknown}")
+    
+    if os.path.exists(players_file):
+        shutil.copy2(players_file, players_file + '.bak')
+    store.export(players_file)
+    store.close()
+    print(f"Done: {datetime.now()}")
 
-def main():
+async def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))
     players_file = os.path.join(script_dir, '..', 'public', 'players.json')
-    progress_file = os.path.join(script_dir, 'rescrape_progress.json')
+    journal = CheckpointJournal(os.path.join(script_dir, 'rescrape_progress.jsonl'))
+    store = PlayerStore.for_json(players_file)
     
     # Load existing
     print(f"Loading existing data...")
-    with open(players_file, 'r', encoding='utf-8') as f:
-        existing = json.load(f)
+    existing = store.players()
     
     # Build lookup
     existing_map = {}
@@ -217,12 +192,11 @@ def main():
     # Load progress if resuming
     completed_leagues = []
     all_new_players = []
-    if os.path.exists(progress_file):
-        with open(progress_file, 'r') as f:
-            progress = json.load(f)
-            completed_leagues = progress.get('completed_leagues', [])
-            all_new_players = progress.get('players', [])
-            print(f"Resuming: {len(completed_leagues)} leagues done, {len(all_new_players)} players")
+    for kind, league_code, league_players in journal.replay():
+        completed_leagues.append(league_code)
+        all_new_players.extend(league_players)
+    if completed_leagues:
+        print(f"Resuming: {len(completed_leagues)} leagues done, {len(all_new_players)} players")
     
     print(f"Existing: {len(existing)} players")
     print(f"Season: {get_current_season()}")
@@ -231,91 +205,67 @@ def main():
     
     total_teams = 0
     
-    for league_name, league_code in LEAGUES:
-        if league_code in completed_leagues:
-            print(f"[SKIP] {league_name}")
-            continue
-        
-        print(f"[{league_code}] {league_name}...", end=' ', flush=True)
+    # Team lists come from the manifest; stale leagues are refetched together
+    league_teams = await load_teams([code for _, code in LEAGUES if code not in completed_leagues])
+    
+    # All leagues run at once; the fetch engine caps requests per host, so the
+    # run is paced by the politeness budget instead of one page at a time.
+    pending = [scrape_league(name, code, league_teams[code]) for name, code in LEAGUES if code not in completed_leagues]
+    for name, code in LEAGUES:
+        if code in completed_leagues:
+            print(f"[SKIP] {name}")
+    
+    for next_league in asyncio.as_completed(pending):
+        league_name, league_code, teams, rosters = await next_league
         
-        teams = get_teams(league_code)
         if not teams:
-            print(f"0 teams (skipped)")
+            print(f"[{league_code}] {league_name}: 0 teams (skipped)")
             completed_leagues.append(league_code)
+            journal.append('league', league_code, [])
+            journal.sync()
             continue
         
-        print(f"{len(teams)} teams")
         total_teams += len(teams)
-        time.sleep(random.uniform(1, 2))
-        
-        league_players = 0
-        for ti, team in enumerate(teams):
-            roster = get_roster(team['id'])
-            
+        league_players = []
+        for team, roster in zip(teams, rosters):
             for player in roster:
-                pid = player['player_id']
-                old = existing_map.get(pid, {})
-                
-                full_player = {
-                    'player_id': pid,
-                    'name': player.get('name', old.get('name', '')),
-                    'profile_url': player.get('profile_url', old.get('profile_url', '')),
-                    'position': player.get('position') or old.get('position'),
-                    'market_value': player.get('market_value', old.get('market_value', '-')),
-                    'nationality': player.get('nationality', old.get('nationality', '')),
-                    'shirt_number': player.get('shirt_number', old.get('shirt_number', '')),
-                    'date_of_birth': player.get('date_of_birth', old.get('date_of_birth', '')),
-                    'height': player.get('height', old.get('height', '')),
-                    'foot': player.get('foot', old.get('foot', '')),
-                    'citizenship': old.get('citizenship', ''),
-                    'contract_expires': old.get('contract_expires', ''),
-                    'photo_url': player.get('photo_url', old.get('photo_url', '')),
-                    'age': player.get('age') or old.get('age'),
-                    'club': team['name'],
-                    'club_id': team['id'],
-                    'league': league_name,
-                    'league_code': league_code,
-                    'scraped_at': datetime.now().isoformat(),
-                    'career_stats': old.get('career_stats', {}),
-                    'appearances': old.get('appearances') or (old.get('career_stats', {}).get('total_appearances', 0)),
-                    'goals': old.get('goals') or (old.get('career_stats', {}).get('total_goals', 0)),
-                    'assists': old.get('assists') or (old.get('career_stats', {}).get('total_assists', 0)),
-                }
-                
-                all_new_players.append(full_player)
-                league_players += 1
-            
-            time.sleep(random.uniform(1.2, 2))
+                old = existing_map.get(player['player_id'], {})
+                league_players.append(build_player(player, old, team, league_name, league_code))
+        all_new_players.extend(league_players)
         
         completed_leagues.append(league_code)
-        print(f"  → {league_players} players")
-        
-        # Save progress after each league
-        with open(progress_file, 'w') as f:
-            json.dump({
-                'completed_leagues': completed_leagues,
-                'players': all_new_players,
-                'last_update': datetime.now().isoformat()
-            }, f, ensure_ascii=False)
+        print(f"[{league_code}] {league_name}: {len(teams)} teams → {len(league_players)} players", flush=True)
         
-        time.sleep(random.uniform(1, 2))
+        # Checkpoint after each league: append this league's players only
+        journal.append('league', league_code, league_players)
+        journal.sync()
     
     # Save final
     print(f"\n{'='*50}")
     print(f"Scraped: {len(all_new_players)} players from {total_teams} teams")
     
     # Backup
-    shutil.copy2(players_file, players_file + '.bak')
+    if os.path.exists(players_file):
+        shutil.copy2(players_file, players_file + '.bak')
+    
+    # The rosters are the full player set: players on none of them are removed
+    removed = store.replace(all_new_players, 'rescrape_all')
+    store.export(players_file)
+    store.close()
+    print(f"Removed (on no roster): {removed}")
     
-    with open(players_file, 'w', encoding='utf-8') as f:
-        json.dump(all_new_players, f, ensure_ascii=False)
+    # Cleanup progress journal
+    journal.remove()
     
-    # Cleanup progress file
-    if os.path.exists(progress_file):
-        os.remove(progress_file)
+    # Who arrived, left or moved since the last run
+    record_run(all_new_players, 'rescrape_all')
     
     print(f"Total: {len(all_new_players)} players saved")
     print(f"Done: {datetime.now()}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description='Rescrape current rosters for every league')
+    parser.add_argument('--market-values-only', action='store_true',
+                        help='only refresh market_value from the league market-value listings')
+    args = parser.parse_args()
+    run(refresh_market_values() if args.market_values_only else main())
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Roster snapshots and the events between two of them.
+
+rescrape_all.py / rescrape_romania.py rebuild players.json from the current
+rosters, so a player who left the covered leagues used to just vanish. Each
+run now also saves a compact snapshot of who was where:
+
+    {"taken_at": ..., "source": "rescrape_all",
+     "players": {player_id: [club_id, league_code, shirt_number, market_value]}}
+
+and diffs it with the previous one. The diff works on the dict key views
+and (player_id, row) item sets, so 21k players take milliseconds and no
+extra requests. It emits one event per change, appended to
+snapshots/events.jsonl:
+
+    arrival       on a roster now, not in the previous snapshot
+    departure     in the previous snapshot, on no roster now
+    club_move     club_id changed (league_code may too)
+    value_change  market_value changed
+
+Downstream stages ask profiles_to_refetch() which profiles the last run
+made stale (arrivals and club moves) instead of refetching everything:
+
+    python scripts/roster_snapshot.py                 # events of the last run
+    python scripts/roster_snapshot.py --refetch       # player_ids to refetch
+    python scripts/roster_snapshot.py --diff OLD NEW  # diff two snapshot files
+"""
+
+import argparse
+import gzip
+import json
+import os
+from datetime import datetime
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'snapshots')
+EVENTS_FILE = os.path.join(SNAPSHOT_DIR, 'events.jsonl')
+KEEP_SNAPSHOTS = 12
+
+FIELDS = ('club_id', 'league_code', 'shirt_number', 'market_value')
+CLUB, LEAGUE, SHIRT, VALUE = range(len(FIELDS))
+
+# Events that leave the stored profile out of date
+REFETCH_EVENTS = ('arrival', 'club_move')
+
+
+def snapshot_from_players(players, source):
+    """Snapshot dict from a list of player records"""
+    rows = {}
+    for p in players:
+        pid = p.get('player_id')
+        if pid:
+            rows[str(pid)] = tuple(str(p.get(f) or '') for f in FIELDS)
+    return {'taken_at': datetime.now().isoformat(timespec='seconds'), 'source': source, 'players': rows}
+
+
+def save_snapshot(snapshot, snapshot_dir=SNAPSHOT_DIR):
+    """Write the snapshot gzipped; returns its path. Only the newest KEEP_SNAPSHOTS are kept."""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    stamp = snapshot['taken_at'].replace('-', '').replace(':', '')
+    path = os.path.join(snapshot_dir, f'roster-{stamp}.json.gz')
+    with gzip.open(path + '.tmp', 'wt', encoding='utf-8') as f:
+        json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(path + '.tmp', path)
+    for old in snapshot_files(snapshot_dir)[:-KEEP_SNAPSHOTS]:
+        os.remove(old)
+    return path
+
+
+def load_snapshot(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        snapshot = json.load(f)
+    # Rows come back as lists; tuples hash, so the diff can use set operations
+    snapshot['players'] = {pid: tuple(row) for pid, row in snapshot['players'].items()}
+    return snapshot
+
+
+def snapshot_files(snapshot_dir=SNAPSHOT_DIR):
+    """Snapshot paths, oldest first (the timestamped names sort by time)"""
+    if not os.path.isdir(snapshot_dir):
+        return []
+    return [os.path.join(snapshot_dir, name) for name in sorted(os.listdir(snapshot_dir))
+            if name.startswith('roster-') and name.endswith('.json.gz')]
+
+
+def latest_snapshot(snapshot_dir=SNAPSHOT_DIR):
+    """The newest saved snapshot, or None before the first run"""
+    files = snapshot_files(snapshot_dir)
+    return load_snapshot(files[-1]) if files else None
+
+
+def diff(old, new):
+    """Events turning snapshot `old` into `new`"""
+    before, after = old['players'], new['players']
+    events = []
+    for pid in sorted(after.keys() - before.keys()):
+        row = after[pid]
+        events.append({'type': 'arrival', 'player_id': pid, 'club_id': row[CLUB], 'league_code': row[LEAGUE],
+                       'market_value': row[VALUE]})
+    for pid in sorted(before.keys() - after.keys()):
+        row = before[pid]
+        events.append({'type': 'departure', 'player_id': pid, 'club_id': row[CLUB], 'league_code': row[LEAGUE]})
+
+    # Rows that differ at all: item sets, minus the arrivals already handled
+    changed = {pid for pid, _ in after.items() - before.items()} & before.keys()
+    for pid in sorted(changed):
+        was, now = before[pid], after[pid]
+        if was[CLUB] != now[CLUB]:
+            events.append({'type': 'club_move', 'player_id': pid, 'from_club_id': was[CLUB], 'to_club_id': now[CLUB],
+                           'from_league': was[LEAGUE], 'to_league': now[LEAGUE]})
+        if was[VALUE] != now[VALUE]:
+            events.append({'type': 'value_change', 'player_id': pid, 'from': was[VALUE], 'to': now[VALUE]})
+    return events
+
+
+def append_events(events, run, events_file=EVENTS_FILE):
+    """Append a run's events to the log, tagged with the run's snapshot time"""
+    os.makedirs(os.path.dirname(events_file), exist_ok=True)
+    with open(events_file, 'a', encoding='utf-8') as f:
+        for event in events:
+            f.write(json.dumps(dict(event, run=run), ensure_ascii=False) + '\n')
+
+
+def load_events(run=None, events_file=EVENTS_FILE):
+    """Logged events, only those of `run` if given"""
+    if not os.path.exists(events_file):
+        return []
+    with open(events_file, encoding='utf-8') as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    return [e for e in events if run is None or e.get('run') == run]
+
+
+def last_run_events(snapshot_dir=SNAPSHOT_DIR):
+    """Events logged by the most recent run ([] if it was the first)"""
+    latest = latest_snapshot(snapshot_dir)
+    if latest is None:
+        return []
+    return load_events(latest['taken_at'], os.path.join(snapshot_dir, 'events.jsonl'))
+
+
+def profiles_to_refetch(events):
+    """player_ids whose profile the events made stale"""
+    return {e['player_id'] for e in events if e['type'] in REFETCH_EVENTS}
+
+
+def summarize(events):
+    counts = {}
+    for e in events:
+        counts[e['type']] = counts.get(e['type'], 0) + 1
+    return ' | '.join(f"{kind}: {counts.get(kind, 0)}" for kind in ('arrival', 'departure', 'club_move', 'value_change'))
+
+
+def record_run(players, source, snapshot_dir=SNAPSHOT_DIR):
+    """Snapshot a finished roster run and log its diff with the previous one; returns the events"""
+    previous = latest_snapshot(snapshot_dir)
+    snapshot = snapshot_from_players(players, source)
+    events = diff(previous, snapshot) if previous else []
+    save_snapshot(snapshot, snapshot_dir)
+    if previous is None:
+        print(f"Roster snapshot: {len(snapshot['players'])} players (first snapshot, nothing to diff)")
+        return events
+    append_events(events, snapshot['taken_at'], os.path.join(snapshot_dir, 'events.jsonl'))
+    print(f"Roster changes since {previous['taken_at']}: {summarize(events)}")
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show roster events between snapshots')
+    parser.add_argument('--diff', nargs=2, metavar=('OLD', 'NEW'), help='diff two snapshot files instead')
+    parser.add_argument('--refetch', action='store_true', help='print only the player_ids to refetch')
+    args = parser.parse_args()
+
+    if args.diff:
+        events = diff(load_snapshot(args.diff[0]), load_snapshot(args.diff[1]))
+    else:
+        events = last_run_events()
+
+    if args.refetch:
+        for pid in sorted(profiles_to_refetch(events)):
+            print(pid)
+        return
+    for e in events:
+        print(json.dumps(e, ensure_ascii=False))
+    print(summarize(events))
+
+
+if __name__ == '__main__':
+    main()
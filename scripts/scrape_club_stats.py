@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Current-season stats from club performance pages - one request per club.
+
+The club view of the performance data (leistungsdaten/verein/{club_id})
+lists appearances, goals, assists, cards and minutes for the whole squad,
+so a weekly refresh costs one page per club (~25 players) instead of one
+full-career page per player. Each matched player gets a `current_season`
+dict in the store; season_stats/career totals are left alone - the
+per-player career page (scrape_everything.py / scrape_profiles.py) is only
+needed for the first backfill.
+
+    python scripts/scrape_club_stats.py [--season 2025] [--league RO1 ...]
+"""
+
+import argparse
+import asyncio
+import os
+from datetime import datetime
+
+from fetch_engine import fetch_html, run
+from player_store import PlayerStore
+import tm_parse
+
+CLUB_STATS_URL = "https://www.transfermarkt.com/team/leistungsdaten/verein/{club_id}/reldata/%26{season}/plus/1"
+
+STAT_FIELDS = ('in_squad', 'appearances', 'goals', 'assists', 'minutes', 'yellow_cards', 'second_yellow',
+               'red_cards', 'subs_on', 'subs_off', 'points_per_game')
+
+def get_current_season():
+    """Calculate Transfermarkt season year dynamically.
+    TM uses start year: Aug 2025 onward = 2025, before Aug 2025 = 2024."""
+    now = datetime.now()
+    return now.year if now.month >= 8 else now.year - 1
+
+def season_label(season):
+    """2025 -> '25/26', the way TM labels seasons"""
+    return f"{season % 100:02d}/{(season + 1) % 100:02d}"
+
+async def get_club_stats(club_id, season):
+    """Stats rows for a club's whole squad, [] if the page is missing"""
+    html = await fetch_html(CLUB_STATS_URL.format(club_id=club_id, season=season), kind='stats')
+    if not html:
+        return []
+    return tm_parse.club_stats_rows(tm_parse.document(html))
+
+async def main():
+    parser = argparse.ArgumentParser(description='Refresh current-season stats from club performance pages')
+    parser.add_argument('--season', type=int, default=get_current_season(), help='TM season start year')
+    parser.add_argument('--league', nargs='*', help='only clubs in these league codes')
+    args = parser.parse_args()
+
+    json_path = os.path.join(os.path.dirname(__file__), '..', 'public', 'players.json')
+    store = PlayerStore.for_json(json_path)
+
+    # Clubs to visit, from the players we already have
+    where = "club_id IS NOT NULL AND club_id != ''"
+    params = ()
+    if args.league:
+        where += f" AND league_code IN ({', '.join('?' for _ in args.league)})"
+        params = tuple(args.league)
+    clubs = {}
+    for p in store.select(['club_id', 'club'], where=where, params=params):
+        club = clubs.setdefault(p['club_id'], {'name': p['club'], 'players': set()})
+        club['players'].add(p['player_id'])
+
+    label = season_label(args.season)
+    print(f"Season {label}: {len(clubs)} clubs, {sum(len(c['players']) for c in clubs.values())} players", flush=True)
+
+    async def one_club(club_id):
+        return club_id, await get_club_stats(club_id, args.season)
+
+    updated = moved = empty = 0
+    now = datetime.now().isoformat()
+    for done, next_club in enumerate(asyncio.as_completed([one_club(cid) for cid in clubs]), 1):
+        club_id, rows = await next_club
+        club = clubs[club_id]
+        if not rows:
+            empty += 1
+            print(f"[{done}/{len(clubs)}] {club['name']}: no stats page", flush=True)
+            continue
+
+        matched = 0
+        for row in rows:
+            # Only players we have at this club; someone listed here but stored
+            # elsewhere moved mid-season and is left to the roster rescrape
+            if row['player_id'] not in club['players']:
+                moved += 1
+                continue
+            current = {'season': label, 'club': club['name'], 'club_id': club_id, 'updated_at': now}
+            current.update({k: row[k] for k in STAT_FIELDS if k in row})
+            store.upsert(row['player_id'], {'current_season': current}, source='club_stats')
+            matched += 1
+        updated += matched
+        store.commit()
+        print(f"[{done}/{len(clubs)}] {club['name']}: {len(rows)} rows, {matched} updated", flush=True)
+
+    store.export(json_path)
+    store.close()
+    print(f"\nDone! Players updated: {updated} | Rows for players not stored at that club: {moved} | Clubs without a page: {empty}", flush=True)
+
+if __name__ == '__main__':
+    run(main())
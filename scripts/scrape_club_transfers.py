@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Transfer ingest from club transfer pages - one request per club and season.
+
+A club's transfers page lists every arrival and departure of a season, so
+walking the clubs of rescrape_all.LEAGUES (~800 pages) replaces fetching
+one /transfers/ page per player (~21k). Each move becomes a
+transfer_history entry on the matching player_id in the store:
+
+    arrival at club B from A    {season, from_club: A, to_club: B, fee}
+    departure from A to B       the same move seen from A (kept once)
+
+Only players the club pages can't resolve - movers with no stored history
+yet - fall back to their own transfers page (scrape_everything.scrape_transfers).
+
+    python scripts/scrape_club_transfers.py [--season 2025] [--league RO1 ...] [--no-fallback]
+"""
+
+import argparse
+import asyncio
+import os
+from datetime import datetime
+
+from fetch_engine import fetch_html, get_engine, run
+from name_resolver import clubs_match, fold
+from player_store import PlayerStore
+from rescrape_all import LEAGUES
+from scrape_everything import scrape_transfers
+from team_manifest import load_teams
+import tm_parse
+
+CLUB_TRANSFERS_URL = "https://www.transfermarkt.com/team/transfers/verein/{club_id}/saison_id/{season}"
+
+def get_current_season():
+    """Calculate Transfermarkt season year dynamically.
+    TM uses start year: Aug 2025 onward = 2025, before Aug 2025 = 2024."""
+    now = datetime.now()
+    return now.year if now.month >= 8 else now.year - 1
+
+def season_label(season):
+    """2025 -> '25/26', the way TM labels seasons"""
+    return f"{season % 100:02d}/{(season + 1) % 100:02d}"
+
+async def get_club_transfers(club_id, season):
+    """Arrivals and departures of one club for a season, [] if the page is missing"""
+    html = await fetch_html(CLUB_TRANSFERS_URL.format(club_id=club_id, season=season), kind='transfers')
+    if not html:
+        return []
+    return tm_parse.club_transfer_rows(tm_parse.document(html))
+
+def to_entry(move, team, label):
+    """transfer_history entry for a move seen from `team`'s page"""
+    other = {'club': move.get('club', ''), 'id': move.get('club_id')}
+    this = {'club': team['name'], 'id': team['id']}
+    source, dest = (other, this) if move['direction'] == 'in' else (this, other)
+    entry = {'season': label, 'from_club': source['club'], 'to_club': dest['club'],
+             'from_club_id': source['id'], 'to_club_id': dest['id']}
+    if move.get('fee'):
+        entry['fee'] = move['fee']
+    return entry
+
+def same_club(a, b, side):
+    """One side of two moves: by id where both have one, else by folded name
+    (club pages name clubs by link title, player pages by link text, so
+    'FC Hermannstadt' and 'Hermannstadt' are the same club)"""
+    if a.get(f'{side}_id') and b.get(f'{side}_id'):
+        return str(a[f'{side}_id']) == str(b[f'{side}_id'])
+    a_name, b_name = fold(a.get(side)), fold(b.get(side))
+    return a_name == b_name or clubs_match(a_name, b_name)
+
+def same_move(a, b):
+    """Same season and the same clubs on both sides"""
+    return a.get('season') == b.get('season') and \
+           same_club(a, b, 'from_club') and same_club(a, b, 'to_club')
+
+def merge_moves(history, entries):
+    """New entries first (newest season on top, like the player page), duplicates dropped"""
+    new = []
+    for entry in entries:
+        if not any(same_move(entry, old) for old in history + new):
+            new.append(entry)
+    return new + history, len(new)
+
+async def main():
+    parser = argparse.ArgumentParser(description='Ingest transfer history from club transfer pages')
+    parser.add_argument('--season', type=int, default=get_current_season(), help='TM season start year')
+    parser.add_argument('--league', nargs='*', help='only these league codes (default: rescrape_all.LEAGUES)')
+    parser.add_argument('--no-fallback', action='store_true', help="don't fetch per-player pages for unresolved movers")
+    args = parser.parse_args()
+
+    json_path = os.path.join(os.path.dirname(__file__), '..', 'public', 'players.json')
+    store = PlayerStore.for_json(json_path)
+    known = {p['player_id']: p for p in store.select(['name', 'profile_url'])}
+    label = season_label(args.season)
+
+    leagues = [(name, code) for name, code in LEAGUES if not args.league or code in args.league]
+    # Only stale manifest entries cost a league page; count what was really requested
+    engine = get_engine()
+    before = engine.stats['requests']
+    team_lists = await load_teams([code for _, code in leagues])
+    league_requests = engine.stats['requests'] - before
+    teams = {t['id']: t for team_list in team_lists.values() for t in team_list}
+    print(f"Season {label}: {len(leagues)} leagues, {len(teams)} clubs", flush=True)
+
+    async def one_club(team):
+        return team, await get_club_transfers(team['id'], args.season)
+
+    # player_id -> entries from every club page that lists the player
+    moves = {}
+    pages = unknown = 0
+    for done, next_club in enumerate(asyncio.as_completed([one_club(t) for t in teams.values()]), 1):
+        team, rows = await next_club
+        pages += 1
+        for move in rows:
+            if move['player_id'] not in known:
+                unknown += 1
+                continue
+            entries = moves.setdefault(move['player_id'], [])
+            entry = to_entry(move, team, label)
+            if not any(same_move(entry, e) for e in entries):
+                entries.append(entry)
+        if done % 25 == 0:
+            print(f"  [{done}/{len(teams)}] club pages | {len(moves)} players moved", flush=True)
+
+    # Movers without any stored history can't be merged into one - their own
+    # page gives the full history (including this move)
+    merged = added = 0
+    unresolved = []
+    for pid, entries in moves.items():
+        history = store.transfer_history(pid)
+        if not history:
+            unresolved.append(pid)
+            continue
+        history, new = merge_moves(history, entries)
+        if new:
+            store.upsert(pid, {'transfer_history': history}, source='club_transfers')
+            merged += 1
+            added += new
+    store.commit()
+    print(f"Club pages: {pages} | Moves merged: {added} for {merged} players | "
+          f"Unresolved: {len(unresolved)} | Moves of players not stored: {unknown}", flush=True)
+
+    fallback = player_pages = 0
+    if unresolved and not args.no_fallback:
+        player_pages = len(unresolved)
+        print(f"Fetching {len(unresolved)} player transfer pages...", flush=True)
+
+        async def one_player(pid):
+            url = known[pid].get('profile_url')
+            return pid, await scrape_transfers(url) if url else []
+
+        for next_player in asyncio.as_completed([one_player(pid) for pid in unresolved]):
+            pid, history = await next_player
+            if history:
+                fallback += 1
+            else:
+                # Page missing: keep what the club pages know
+                history = moves[pid]
+            store.upsert(pid, {'transfer_history': history}, source='player_transfers')
+        store.commit()
+    elif unresolved:
+        for pid in unresolved:
+            store.upsert(pid, {'transfer_history': moves[pid]}, source='club_transfers')
+        store.commit()
+
+    store.export(json_path)
+    store.close()
+    print(f"\nDone! Pages: {pages} club + {player_pages} player ({fallback} with a history) | "
+          f"HTTP requests: {engine.stats['requests']} ({league_requests} for league pages)", flush=True)
+
+if __name__ == '__main__':
+    run(main())
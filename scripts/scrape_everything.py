@@ -2,35 +2,35 @@
 """
 COMPREHENSIVE Transfermarkt Scraper
 Gets EVERYTHING: profile, stats by season, transfer history.
+This is the first-time backfill; current-season stats are refreshed per
+club by scrape_club_stats.py.
 """
 
-import requests
-from bs4 import BeautifulSoup
+import asyncio
 import json
-import time
-import re
 import os
 from datetime import datetime
 
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-    'Accept-Language': 'en-US,en;q=0.5',
-}
+from checkpoint import CheckpointJournal
+from fetch_engine import fetch_html, run
+import tm_parse
 
-PROGRESS_FILE = 'everything_progress.json'
+LEGACY_PROGRESS_FILE = 'everything_progress.json'
+JOURNAL_FILE = 'everything_progress.jsonl'
 DATA_FILE = 'complete_progress.json'
 
 def load_progress():
-    if os.path.exists(PROGRESS_FILE):
-        with open(PROGRESS_FILE) as f:
-            return json.load(f)
-    return {'completed_ids': [], 'last_update': None}
-
-def save_progress(progress):
-    progress['last_update'] = datetime.now().isoformat()
-    with open(PROGRESS_FILE, 'w') as f:
-        json.dump(progress, f)
+    """Replay the journal; returns it with {player_id: scraped data} (None = already in DATA_FILE)"""
+    journal = CheckpointJournal(JOURNAL_FILE)
+    done = {key: value for kind, key, value in journal.replay() if kind == 'player'}
+    if not done and os.path.exists(LEGACY_PROGRESS_FILE):
+        # One-time import of the old rewrite-everything progress file
+        with open(LEGACY_PROGRESS_FILE) as f:
+            for pid in json.load(f).get('completed_ids', []):
+                journal.append('player', pid)
+                done[pid] = None
+        journal.sync()
+    return journal, done
 
 def load_players():
     with open(DATA_FILE) as f:
@@ -41,227 +41,115 @@ def save_players(data):
     with open(DATA_FILE, 'w') as f:
         json.dump(data, f)
 
-def scrape_profile(url):
+PROFILE_FIELDS = ('photo_url', 'shirt_number', 'date_of_birth', 'age', 'place_of_birth', 'height',
+                  'citizenship', 'position', 'foot', 'agent', 'joined', 'contract_expires', 'main_position')
+
+async def scrape_profile(url):
     """Scrape profile page: photo, DOB, height, foot, position, market value, etc."""
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=30)
-        soup = BeautifulSoup(resp.text, 'lxml')
-        profile = {}
-        
-        # Photo
-        photo_el = soup.select_one('img.data-header__profile-image')
-        if photo_el:
-            profile['photo_url'] = photo_el.get('src', '')
-        
-        # Shirt number
-        shirt = soup.select_one('span.data-header__shirt-number')
-        if shirt:
-            profile['shirt_number'] = shirt.text.strip().replace('#', '')
-        
-        # Info table
-        for row in soup.select('div.info-table span.info-table__content--regular'):
-            label = row.text.strip().lower().rstrip(':')
-            value_el = row.find_next_sibling('span')
-            if not value_el:
-                continue
-            value = value_el.text.strip()
-            
-            if 'date of birth' in label:
-                profile['date_of_birth'] = value
-                age_match = re.search(r'\((\d+)\)', value)
-                if age_match:
-                    profile['age'] = int(age_match.group(1))
-            elif 'place of birth' in label:
-                profile['place_of_birth'] = value
-            elif 'height' in label:
-                profile['height'] = value
-            elif 'citizenship' in label:
-                profile['citizenship'] = value
-            elif 'position' in label:
-                profile['position'] = value
-            elif 'foot' in label:
-                profile['foot'] = value
-            elif 'agent' in label:
-                profile['agent'] = value
-            elif 'joined' in label:
-                profile['joined'] = value
-            elif 'contract expires' in label:
-                profile['contract_expires'] = value
-        
-        # Market value
-        mv_el = soup.select_one('a.data-header__market-value-wrapper')
-        if mv_el:
-            profile['market_value_full'] = mv_el.text.strip()
-        
-        # Position from detail box
-        pos_el = soup.select_one('div.detail-position__position')
-        if pos_el:
-            profile['main_position'] = pos_el.text.strip()
+        html = await fetch_html(url, kind='profile')
+        if not html:
+            return {}
+        fields = tm_parse.profile(tm_parse.document(html))
+        profile = {k: fields[k] for k in PROFILE_FIELDS if k in fields}
+        if 'market_value' in fields:
+            profile['market_value_full'] = fields['market_value']
         
         return profile
     except Exception as e:
         print(f"Profile error: {e}")
         return {}
 
-def scrape_stats(profile_url):
+def stats_url_for(profile_url):
+    """Full-career performance page of a player"""
+    return profile_url.replace('/profil/', '/leistungsdaten/') + '/saison//verein/0/liga/0/wettbewerb//pos/0/trainer_id/0/plus/1'
+
+async def scrape_stats(profile_url):
     """Scrape stats page: career totals + season-by-season"""
     try:
-        # Convert profile URL to stats URL
-        stats_url = profile_url.replace('/profil/', '/leistungsdaten/') + '/saison//verein/0/liga/0/wettbewerb//pos/0/trainer_id/0/plus/1'
-        
-        resp = requests.get(stats_url, headers=HEADERS, timeout=30)
-        soup = BeautifulSoup(resp.text, 'lxml')
-        
-        stats = {
-            'career_totals': {},
-            'season_stats': []
-        }
-        
-        # Career totals from footer
-        for row in soup.select('tfoot tr'):
-            cells = row.select('td')
-            if len(cells) >= 12:
-                first = cells[0].text.strip().lower()
-                if 'total' in first:
-                    try:
-                        stats['career_totals'] = {
-                            'appearances': int(cells[2].text.strip() or 0),
-                            'goals': int(cells[7].text.strip() or 0),
-                            'assists': int(cells[9].text.strip() or 0),
-                            'yellow_cards': int(cells[10].text.strip() or 0),
-                            'second_yellow': int(cells[11].text.strip() or 0),
-                            'minutes': int(cells[12].text.strip().replace("'", "").replace(".", "") or 0) if len(cells) > 12 else 0
-                        }
-                    except:
-                        pass
-                    break
-        
-        # Season-by-season stats
-        for row in soup.select('table.items tbody tr'):
-            cells = row.select('td')
-            if len(cells) < 5:
-                continue
-            
-            season = {}
-            
-            # Season
-            season_cell = row.select_one('td.zentriert a')
-            if season_cell:
-                season['season'] = season_cell.text.strip()
-            
-            # Competition
-            comp_cell = row.select_one('td.hauptlink a')
-            if comp_cell:
-                season['competition'] = comp_cell.text.strip()
-            
-            # Club
-            club_cell = row.select_one('td.no-border-links a')
-            if club_cell:
-                season['club'] = club_cell.text.strip()
-            
-            # Stats (appearances, goals, assists, etc.)
-            num_cells = row.select('td.zentriert')
-            if len(num_cells) >= 4:
-                try:
-                    season['appearances'] = int(num_cells[-4].text.strip() or 0)
-                except:
-                    season['appearances'] = 0
-                try:
-                    season['goals'] = int(num_cells[-3].text.strip() or 0)
-                except:
-                    season['goals'] = 0
-                try:
-                    season['assists'] = int(num_cells[-2].text.strip() or 0)
-                except:
-                    season['assists'] = 0
-                try:
-                    mins = num_cells[-1].text.strip().replace("'", "").replace(".", "")
-                    season['minutes'] = int(mins or 0)
-                except:
-                    season['minutes'] = 0
-            
-            if season.get('season'):
-                stats['season_stats'].append(season)
-        
-        return stats
+        html = await fetch_html(stats_url_for(profile_url), kind='stats')
+        if not html:
+            return {'career_totals': {}, 'season_stats': []}
+        return parse_stats(html)
     except Exception as e:
         print(f"Stats error: {e}")
         return {'career_totals': {}, 'season_stats': []}
 
-def scrape_transfers(profile_url):
+TOTAL_FIELDS = ('appearances', 'goals', 'assists', 'yellow_cards', 'second_yellow', 'minutes')
+SEASON_FIELDS = ('appearances', 'goals', 'assists', 'minutes')
+
+def parse_stats(html):
+    """Career totals + season rows from a stats page (module level, so pipeline workers can run it)"""
+    doc = tm_parse.document(html)
+    totals = tm_parse.stats_totals(doc)
+    stats = {
+        'career_totals': {k: totals[k] for k in TOTAL_FIELDS if k in totals},
+        'season_stats': []
+    }
+    
+    # Season-by-season stats, numbers mapped from the table header
+    for row in tm_parse.stats_rows(doc):
+        if not row['season']:
+            continue
+        season = {'season': row['season']}
+        if row['competition']:
+            season['competition'] = row['competition']
+        if row['club']:
+            season['club'] = row['club']
+        season.update({k: row['counts'][k] for k in SEASON_FIELDS if k in row['counts']})
+        stats['season_stats'].append(season)
+    
+    return stats
+
+async def scrape_transfers(profile_url):
     """Scrape transfer history"""
     try:
         # Convert to transfers URL
         transfers_url = profile_url.replace('/profil/', '/transfers/')
         
-        resp = requests.get(transfers_url, headers=HEADERS, timeout=30)
-        soup = BeautifulSoup(resp.text, 'lxml')
-        
-        transfers = []
-        
-        for row in soup.select('div.tm-transfer-history tbody tr, table.transfer-history tbody tr'):
-            transfer = {}
-            
-            # Season
-            season_el = row.select_one('td:first-child')
-            if season_el:
-                transfer['season'] = season_el.text.strip()
-            
-            # Date
-            date_el = row.select_one('td.zentriert')
-            if date_el:
-                transfer['date'] = date_el.text.strip()
-            
-            # From club
-            clubs = row.select('td.no-border-links a, td.vereinsname a')
-            if len(clubs) >= 1:
-                transfer['from_club'] = clubs[0].text.strip()
-            if len(clubs) >= 2:
-                transfer['to_club'] = clubs[1].text.strip()
-            
-            # Fee
-            fee_el = row.select_one('td.rechts a, td.transfer-fee')
-            if fee_el:
-                transfer['fee'] = fee_el.text.strip()
-            
-            if transfer.get('season') or transfer.get('date'):
-                transfers.append(transfer)
-        
-        return transfers
+        html = await fetch_html(transfers_url, kind='transfers')
+        if not html:
+            return []
+        return tm_parse.transfer_rows(tm_parse.document(html))
     except Exception as e:
         print(f"Transfers error: {e}")
         return []
 
-def scrape_player_everything(profile_url):
-    """Scrape ALL data for a player"""
-    data = {}
-    
-    # 1. Profile
-    profile = scrape_profile(profile_url)
-    data.update(profile)
-    time.sleep(1)
+async def scrape_player_everything(profile_url):
+    """Scrape ALL data for a player (profile, stats and transfers fetched together)"""
+    profile, stats, transfers = await asyncio.gather(
+        scrape_profile(profile_url),
+        scrape_stats(profile_url),
+        scrape_transfers(profile_url),
+    )
     
-    # 2. Stats
-    stats = scrape_stats(profile_url)
+    data = dict(profile)
     data['career_totals'] = stats.get('career_totals', {})
     data['season_stats'] = stats.get('season_stats', [])
-    time.sleep(1)
-    
-    # 3. Transfers
-    transfers = scrape_transfers(profile_url)
     data['transfer_history'] = transfers
     
     return data
 
-def main():
+async def scrape_one(player):
+    try:
+        return player, await scrape_player_everything(player['profile_url']), None
+    except Exception as e:
+        return player, None, e
+
+async def main():
     print("=" * 60)
     print("COMPREHENSIVE SCRAPER - EVERYTHING")
     print("=" * 60)
     
     data = load_players()
     players = data.get('players', [])
-    progress = load_progress()
-    completed_ids = set(progress.get('completed_ids', []))
+    journal, journaled = load_progress()
+    completed_ids = set(journaled)
+    
+    # Journaled results newer than the last DATA_FILE save
+    for p in players:
+        if journaled.get(p.get('player_id')):
+            p.update(journaled[p['player_id']])
     
     print(f"Total players: {len(players)}")
     print(f"Already completed: {len(completed_ids)}")
@@ -271,49 +159,40 @@ def main():
     processed = 0
     errors = 0
     
-    for i, player in enumerate(players):
-        player_id = player.get('player_id')
+    todo = [p for p in players
+            if p.get('player_id') and p['player_id'] not in completed_ids and p.get('profile_url')]
+    
+    # Every player is queued at once; the fetch engine decides how many
+    # requests are actually in flight.
+    for count, next_player in enumerate(asyncio.as_completed([scrape_one(p) for p in todo]), 1):
+        player, full_data, error = await next_player
+        name = player.get('name', 'Unknown')
         
-        if not player_id or player_id in completed_ids:
+        if error:
+            errors += 1
+            print(f"[{count}/{len(todo)}] {name}... ✗ {error}")
             continue
         
-        url = player.get('profile_url')
-        if not url:
-            continue
+        player.update(full_data)
+        completed_ids.add(player['player_id'])
+        journal.append('player', player['player_id'], full_data)
+        processed += 1
         
-        name = player.get('name', 'Unknown')
-        print(f"[{i+1}/{len(players)}] {name}...", end=' ', flush=True)
+        totals = full_data.get('career_totals', {})
+        apps = totals.get('appearances', '?')
+        goals = totals.get('goals', '?')
+        seasons = len(full_data.get('season_stats', []))
+        transfers = len(full_data.get('transfer_history', []))
         
-        try:
-            full_data = scrape_player_everything(url)
-            player.update(full_data)
-            completed_ids.add(player_id)
-            processed += 1
-            
-            totals = full_data.get('career_totals', {})
-            apps = totals.get('appearances', '?')
-            goals = totals.get('goals', '?')
-            seasons = len(full_data.get('season_stats', []))
-            transfers = len(full_data.get('transfer_history', []))
-            
-            print(f"✓ apps:{apps} goals:{goals} seasons:{seasons} transfers:{transfers}")
-        except Exception as e:
-            errors += 1
-            print(f"✗ {e}")
+        print(f"[{count}/{len(todo)}] {name}... ✓ apps:{apps} goals:{goals} seasons:{seasons} transfers:{transfers}")
         
-        # Save every 25 players (more frequent due to more data)
-        if processed % 25 == 0 and processed > 0:
-            progress['completed_ids'] = list(completed_ids)
-            save_progress(progress)
-            save_players(data)
+        # Checkpoint every 25 players: fsync the journal, no full rewrite
+        if processed % 25 == 0:
+            journal.sync()
             print(f"   [Saved: {len(completed_ids)} done]")
-        
-        # Rate limit - 2 sec between players (already has internal delays)
-        time.sleep(2)
     
     # Final save
-    progress['completed_ids'] = list(completed_ids)
-    save_progress(progress)
+    journal.close()
     save_players(data)
     
     print("=" * 60)
@@ -321,4 +200,4 @@ def main():
     print("=" * 60)
 
 if __name__ == "__main__":
-    main()
+    run(main())
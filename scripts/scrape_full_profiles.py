@@ -4,19 +4,14 @@ Scrape full player profiles (not performance stats).
 Gets: photo, DOB, nationality, height, foot, position, market value, contract, career totals.
 """
 
-import requests
-from bs4 import BeautifulSoup
+import asyncio
 import json
-import time
 import re
 import os
 from datetime import datetime
 
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-    'Accept-Language': 'en-US,en;q=0.5',
-}
+from fetch_engine import fetch_html, run
+import tm_parse
 
 PROGRESS_FILE = 'full_profile_progress.json'
 DATA_FILE = 'complete_progress.json'
@@ -41,83 +36,32 @@ def save_players(data):
     with open(DATA_FILE, 'w') as f:
         json.dump(data, f)
 
-def scrape_profile(url):
+PROFILE_FIELDS = ('photo_url', 'shirt_number', 'date_of_birth', 'age', 'place_of_birth', 'height',
+                  'citizenship', 'position', 'foot', 'agent', 'current_club', 'joined',
+                  'contract_expires', 'market_value')
+
+async def scrape_profile(url):
     """Scrape full profile from player page"""
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=30)
-        soup = BeautifulSoup(resp.text, 'lxml')
-        
-        profile = {}
-        
-        # Photo URL
-        photo_el = soup.select_one('img.data-header__profile-image')
-        if photo_el:
-            profile['photo_url'] = photo_el.get('src', '')
-        
-        # Player header info
-        header = soup.select_one('div.data-header__profile-container')
-        if header:
-            # Shirt number
-            shirt = header.select_one('span.data-header__shirt-number')
-            if shirt:
-                profile['shirt_number'] = shirt.text.strip().replace('#', '')
+        html = await fetch_html(url, kind='profile')
+        if not html:
+            return None
+        doc = tm_parse.document(html)
         
-        # Info table (DOB, height, nationality, etc.)
-        info_table = soup.select_one('div.info-table')
-        if info_table:
-            rows = info_table.select('span.info-table__content')
-            labels = info_table.select('span.info-table__content--regular')
-            
-            for i, label_el in enumerate(labels):
-                label = label_el.text.strip().lower()
-                # Get the next sibling or corresponding content
-                value_el = label_el.find_next_sibling('span', class_='info-table__content--bold') or \
-                           label_el.find_next_sibling('span')
-                if not value_el:
-                    continue
-                value = value_el.text.strip()
-                
-                if 'date of birth' in label:
-                    profile['date_of_birth'] = value
-                    age_match = re.search(r'\((\d+)\)', value)
-                    if age_match:
-                        profile['age'] = int(age_match.group(1))
-                elif 'place of birth' in label:
-                    profile['place_of_birth'] = value
-                elif 'height' in label:
-                    profile['height'] = value
-                elif 'citizenship' in label:
-                    profile['citizenship'] = value
-                elif 'position' in label:
-                    profile['position'] = value
-                elif 'foot' in label:
-                    profile['foot'] = value
-                elif 'agent' in label:
-                    profile['agent'] = value
-                elif 'current club' in label:
-                    profile['current_club'] = value
-                elif 'joined' in label:
-                    profile['joined'] = value
-                elif 'contract expires' in label:
-                    profile['contract_expires'] = value
-        
-        # Market value from header
-        mv_el = soup.select_one('a.data-header__market-value-wrapper')
-        if mv_el:
-            profile['market_value'] = mv_el.text.strip()
+        # Header + info table (DOB, height, nationality, etc.) in one pass
+        fields = tm_parse.profile(doc)
+        profile = {k: fields[k] for k in PROFILE_FIELDS if k in fields}
         
         # Position from detail box
-        pos_el = soup.select_one('div.detail-position__position')
-        if pos_el and 'position' not in profile:
-            profile['position'] = pos_el.text.strip()
+        if 'position' not in profile and 'main_position' in fields:
+            profile['position'] = fields['main_position']
         
         # Get career totals from the stats box on profile page
-        stats_boxes = soup.select('div.data-header__content--highlight')
-        for box in stats_boxes:
-            text = box.text.strip()
-            label_el = box.find_next_sibling('span') or box.find_previous_sibling('span')
+        for box in doc.xpath('//div[contains(@class, "data-header__content--highlight")]'):
+            text = tm_parse.text(box)
+            label_el = box.xpath('following-sibling::span[1]') or box.xpath('preceding-sibling::span[1]')
             if label_el:
-                label = label_el.text.strip().lower()
+                label = tm_parse.text(label_el[0]).lower()
                 try:
                     num = int(re.sub(r'[^\d]', '', text) or 0)
                     if 'appearance' in label or 'match' in label:
@@ -130,12 +74,11 @@ def scrape_profile(url):
                     pass
         
         # Alternative: scrape from the compact stats if available
-        compact_stats = soup.select('li.data-header__label')
-        for stat in compact_stats:
-            spans = stat.select('span')
+        for stat in doc.xpath('//li[contains(@class, "data-header__label")]'):
+            spans = stat.findall('.//span')
             if len(spans) >= 2:
-                value_text = spans[0].text.strip()
-                label_text = spans[1].text.strip().lower() if len(spans) > 1 else ''
+                value_text = tm_parse.text(spans[0])
+                label_text = tm_parse.text(spans[1]).lower()
                 try:
                     num = int(re.sub(r'[^\d]', '', value_text) or 0)
                     if 'appearance' in label_text:
@@ -148,14 +91,12 @@ def scrape_profile(url):
                     pass
         
         # National team info
-        nt_section = soup.select_one('div[data-viewport="Nationalspieler"]')
-        if nt_section:
-            nt_row = nt_section.select_one('tr')
-            if nt_row:
-                cells = nt_row.select('td')
-                if len(cells) >= 3:
-                    profile['national_team'] = cells[1].text.strip() if len(cells) > 1 else ''
-                    profile['national_team_caps'] = cells[2].text.strip() if len(cells) > 2 else ''
+        nt_rows = doc.xpath('//div[@data-viewport="Nationalspieler"]//tr[td]')
+        if nt_rows:
+            cells = nt_rows[0].findall('.//td')
+            if len(cells) >= 3:
+                profile['national_team'] = tm_parse.spaced_text(cells[1])
+                profile['national_team_caps'] = tm_parse.spaced_text(cells[2])
         
         return profile
         
@@ -163,7 +104,10 @@ def scrape_profile(url):
         print(f"Error: {e}")
         return None
 
-def main():
+async def scrape_one(player):
+    return player, await scrape_profile(player['profile_url'])
+
+async def main():
     print("=" * 60)
     print("FULL PROFILE SCRAPER")
     print("=" * 60)
@@ -181,42 +125,32 @@ def main():
     processed = 0
     errors = 0
     
-    for i, player in enumerate(players):
-        player_id = player.get('player_id')
-        
-        if not player_id or player_id in completed_ids:
-            continue
-        
-        url = player.get('profile_url')
-        if not url:
-            continue
-        
+    todo = [p for p in players
+            if p.get('player_id') and p['player_id'] not in completed_ids and p.get('profile_url')]
+    
+    for done, next_player in enumerate(asyncio.as_completed([scrape_one(p) for p in todo]), 1):
+        player, profile = await next_player
         name = player.get('name', 'Unknown')
-        print(f"[{i+1}/{len(players)}] {name}...", end=' ', flush=True)
-        
-        profile = scrape_profile(url)
         
         if profile:
             player.update(profile)
-            completed_ids.add(player_id)
+            completed_ids.add(player['player_id'])
             processed += 1
             apps = profile.get('total_appearances', '?')
             goals = profile.get('total_goals', '?')
             pos = profile.get('position', '?')
-            print(f"✓ {pos} | apps:{apps} goals:{goals}")
+            print(f"[{done}/{len(todo)}] {name}... ✓ {pos} | apps:{apps} goals:{goals}")
         else:
             errors += 1
-            print("✗")
+            print(f"[{done}/{len(todo)}] {name}... ✗")
+            continue
         
         # Save every 50 players
-        if processed % 50 == 0 and processed > 0:
+        if processed % 50 == 0:
             progress['completed_ids'] = list(completed_ids)
             save_progress(progress)
             save_players(data)
             print(f"   [Saved: {len(completed_ids)} done]")
-        
-        # Rate limit
-        time.sleep(2)
     
     # Final save
     progress['completed_ids'] = list(completed_ids)
@@ -228,4 +162,4 @@ def main():
     print("=" * 60)
 
 if __name__ == "__main__":
-    main()
+    run(main())
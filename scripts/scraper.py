@@ -4,21 +4,13 @@ Transfermarkt scraper for Bacau Scout
 Scrapes player data from market value pages for specified leagues.
 """
 
-import requests
-from bs4 import BeautifulSoup
+import asyncio
 import json
-import time
-import random
 import os
 from datetime import datetime
 
-# Headers to mimic a browser
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-    'Accept-Language': 'en-US,en;q=0.5',
-    'Connection': 'keep-alive',
-}
+from fetch_engine import fetch_html, run
+import tm_parse
 
 # Leagues to scrape with their Transfermarkt codes
 # Format: (name, code, description)
@@ -81,154 +73,68 @@ LEAGUES = [
     ("MLS Next Pro", "MNP3", "mls-next-pro"),
 ]
 
+LISTING_URL = "https://www.transfermarkt.com/wettbewerb/marktwerte/wettbewerb/{code}/page/{page}"
+
 def get_league_url(code, page=1):
     """Build the URL for a league's market value page"""
-    return f"https://www.transfermarkt.com/wettbewerb/marktwerte/wettbewerb/{code}/page/{page}"
+    return LISTING_URL.format(code=code, page=page)
+
+def legacy_row(row, league_url):
+    """scraped_players.json row from a tm_parse.market_value_rows row"""
+    return {
+        "Player": [row['name'], row['position']],
+        "Age": row.get('age', ''),
+        "Club": row.get('club', ''),
+        "Market value": row['market_value'] or '',
+        "givenUrl": league_url,
+        "Nat.": row.get('nationality', ''),
+    }
 
 def parse_market_value_page(html, league_url):
     """Parse players from a market value page"""
-    soup = BeautifulSoup(html, 'lxml')
-    players = []
-    
-    # Find player rows in the table
-    table = soup.find('table', class_='items')
-    if not table:
-        return players
-    
-    rows = table.find_all('tr', class_=['odd', 'even'])
-    
-    for row in rows:
-        try:
-            # Player name and position
-            player_cell = row.find('td', class_='hauptlink')
-            if not player_cell:
-                continue
-            
-            name_link = player_cell.find('a')
-            if not name_link:
-                continue
-            
-            name = name_link.get_text(strip=True)
-            
-            # Position (in a separate row below or in td)
-            position = ""
-            pos_cell = row.find_all('td')
-            for td in pos_cell:
-                if td.get_text(strip=True) and 'posrela' in str(td):
-                    position = td.get_text(strip=True)
-                    break
-            
-            # Try to find position in inline-table
-            inline_table = row.find('table', class_='inline-table')
-            if inline_table:
-                tds = inline_table.find_all('td')
-                if len(tds) >= 2:
-                    position = tds[1].get_text(strip=True) if tds[1] else ""
-            
-            # Age
-            age = ""
-            for td in row.find_all('td'):
-                text = td.get_text(strip=True)
-                if text.isdigit() and 14 <= int(text) <= 45:
-                    age = text
-                    break
-            
-            # Club
-            club = ""
-            club_links = row.find_all('a', href=lambda x: x and '/startseite/verein/' in x)
-            for link in club_links:
-                club_text = link.get_text(strip=True)
-                if club_text and len(club_text) > 1:
-                    club = club_text
-                    break
-            
-            # Market value
-            market_value = ""
-            value_cell = row.find('td', class_='rechts hauptlink')
-            if value_cell:
-                market_value = value_cell.get_text(strip=True)
-            
-            # Nationality
-            nationality = []
-            flag_imgs = row.find_all('img', class_='flaggenrahmen')
-            for img in flag_imgs:
-                nat = img.get('title', '')
-                if nat and nat not in nationality:
-                    nationality.append(nat)
-            
-            if name:
-                player = {
-                    "Player": [name, position],
-                    "Age": age,
-                    "Club": club,
-                    "Market value": market_value,
-                    "givenUrl": league_url,
-                    "Nat.": nationality[0] if len(nationality) == 1 else nationality if nationality else ""
-                }
-                players.append(player)
-                
-        except Exception as e:
-            print(f"Error parsing row: {e}")
-            continue
-    
-    return players
+    return [legacy_row(row, league_url) for row in tm_parse.market_value_rows(tm_parse.document(html))]
 
-def has_next_page(html):
-    """Check if there's a next page"""
-    soup = BeautifulSoup(html, 'lxml')
-    pager = soup.find('div', class_='pager')
-    if pager:
-        next_link = pager.find('a', class_='tm-pagination__link', title='Go to next page')
-        return next_link is not None
-    return False
+async def iter_league(code):
+    """Yield (page, rows) of a league's market-value listing as pages arrive.
+    
+    Page 1 is parsed once for its rows and the pager total; the other pages are
+    then fetched together (the fetch engine keeps them within the per-host
+    limit and rate budget) and parsed as each one comes in. Rows are
+    tm_parse.market_value_rows dicts.
+    """
+    html = await fetch_html(get_league_url(code), kind='market_values')
+    if not html:
+        print(f"  [{code}] Error: no page returned")
+        return
+    doc = tm_parse.document(html)
+    yield 1, tm_parse.market_value_rows(doc)
+    total = tm_parse.pager_total(doc)
+    
+    async def one_page(page):
+        return page, await fetch_html(get_league_url(code, page), kind='market_values')
+    
+    for next_page in asyncio.as_completed([one_page(page) for page in range(2, total + 1)]):
+        page, html = await next_page
+        if not html:
+            print(f"  [{code}] Page {page}: no page returned")
+            continue
+        yield page, tm_parse.market_value_rows(tm_parse.document(html))
 
-def scrape_league(name, code, delay_min=3, delay_max=6):
-    """Scrape all players from a league"""
-    all_players = []
-    page = 1
-    base_url = f"https://www.transfermarkt.com/wettbewerb/marktwerte/wettbewerb/{code}"
-    
+async def scrape_league(name, code):
+    """Yield a league's players page by page, as each listing page is parsed"""
     print(f"\n{'='*60}")
     print(f"Scraping: {name} ({code})")
     print(f"{'='*60}")
     
-    while True:
-        url = f"{base_url}/page/{page}"
-        print(f"  Page {page}: {url}")
-        
-        try:
-            response = requests.get(url, headers=HEADERS, timeout=30)
-            
-            if response.status_code != 200:
-                print(f"  Error: HTTP {response.status_code}")
-                break
-            
-            players = parse_market_value_page(response.text, base_url)
-            
-            if not players:
-                print(f"  No players found on page {page}, stopping")
-                break
-            
-            all_players.extend(players)
-            print(f"  Found {len(players)} players (total: {len(all_players)})")
-            
-            # Check for next page
-            if not has_next_page(response.text):
-                print(f"  No more pages")
-                break
-            
-            page += 1
-            
-            # Rate limiting
-            delay = random.uniform(delay_min, delay_max)
-            print(f"  Waiting {delay:.1f}s...")
-            time.sleep(delay)
-            
-        except Exception as e:
-            print(f"  Error: {e}")
-            break
-    
-    return all_players
+    league_url = get_league_url(code).rsplit('/page/', 1)[0]
+    found = 0
+    try:
+        async for page, rows in iter_league(code):
+            found += len(rows)
+            print(f"  Page {page}: {len(rows)} players (total: {found})")
+            yield [legacy_row(row, league_url) for row in rows]
+    except Exception as e:
+        print(f"  Error: {e}")
 
 def save_progress(players, filename):
     """Save current progress to file"""
@@ -236,7 +142,7 @@ def save_progress(players, filename):
         json.dump(players, f, indent=2, ensure_ascii=False)
     print(f"Saved {len(players)} players to {filename}")
 
-def main():
+async def main():
     """Main scraping function"""
     output_dir = os.path.dirname(os.path.abspath(__file__))
     output_file = os.path.join(output_dir, 'scraped_players.json')
@@ -262,8 +168,9 @@ def main():
             continue
         
         try:
-            players = scrape_league(name, code)
-            all_players.extend(players)
+            # Pages come in arrival order, not listing order
+            async for players in scrape_league(name, code):
+                all_players.extend(players)
             completed_leagues.append(code)
             
             # Save progress after each league
@@ -277,11 +184,6 @@ def main():
             
             print(f"\nTotal players so far: {len(all_players)}")
             
-            # Longer delay between leagues
-            delay = random.uniform(10, 20)
-            print(f"Waiting {delay:.1f}s before next league...")
-            time.sleep(delay)
-            
         except KeyboardInterrupt:
             print("\n\nInterrupted! Saving progress...")
             save_progress(all_players, output_file)
@@ -297,4 +199,4 @@ def main():
     print(f"{'='*60}")
 
 if __name__ == "__main__":
-    main()
+    run(main())
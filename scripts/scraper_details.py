@@ -4,33 +4,27 @@ Transfermarkt Detail Scraper for Bacau Scout
 Gets full player profiles: stats, contract, history, etc.
 """
 
-import requests
 from bs4 import BeautifulSoup
 import json
-import time
-import random
 import os
-import re
 from datetime import datetime
 from urllib.parse import quote
 
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-    'Accept-Language': 'en-US,en;q=0.5',
-    'Connection': 'keep-alive',
-}
+from fetch_engine import fetch_page
+from name_resolver import NameResolver
+from player_store import PlayerStore
+import tm_parse
 
 def search_player(name, club=None):
     """Search for a player and return their profile URL"""
     search_url = f"https://www.transfermarkt.com/schnellsuche/ergebnis/schnellsuche?query={quote(name)}"
     
     try:
-        response = requests.get(search_url, headers=HEADERS, timeout=30)
-        if response.status_code != 200:
+        html = fetch_page(search_url, kind='search')
+        if not html:
             return None
         
-        soup = BeautifulSoup(response.text, 'lxml')
+        soup = BeautifulSoup(html, 'lxml')
         
         # Find player results table
         player_table = soup.find('table', class_='items')
@@ -61,119 +55,33 @@ def search_player(name, club=None):
     
     return None
 
+PROFILE_FIELDS = ('full_name', 'shirt_number', 'date_of_birth', 'place_of_birth', 'height', 'citizenship',
+                  'position', 'foot', 'agent', 'outfitter', 'current_club', 'contract_expires', 'joined',
+                  'market_value')
+
 def parse_player_profile(html, url):
     """Parse detailed player info from profile page"""
-    soup = BeautifulSoup(html, 'lxml')
-    details = {}
-    
-    # Basic info from header
-    header = soup.find('header', class_='data-header')
-    if header:
-        # Full name
-        name_h1 = header.find('h1', class_='data-header__headline-wrapper')
-        if name_h1:
-            details['full_name'] = name_h1.get_text(strip=True)
-        
-        # Shirt number
-        shirt = header.find('span', class_='data-header__shirt-number')
-        if shirt:
-            details['shirt_number'] = shirt.get_text(strip=True).replace('#', '')
-    
-    # Info table (right side)
-    info_table = soup.find('div', class_='info-table')
-    if info_table:
-        rows = info_table.find_all('span', class_='info-table__content')
-        labels = info_table.find_all('span', class_='info-table__content--regular')
-        
-        for i, label in enumerate(labels):
-            label_text = label.get_text(strip=True).lower()
-            if i < len(rows):
-                value = rows[i].get_text(strip=True)
-                
-                if 'date of birth' in label_text or 'birth' in label_text:
-                    details['date_of_birth'] = value
-                elif 'place of birth' in label_text:
-                    details['place_of_birth'] = value
-                elif 'height' in label_text:
-                    details['height'] = value
-                elif 'citizenship' in label_text:
-                    details['citizenship'] = value
-                elif 'position' in label_text:
-                    details['position'] = value
-                elif 'foot' in label_text:
-                    details['foot'] = value
-                elif 'agent' in label_text:
-                    details['agent'] = value
-                elif 'outfitter' in label_text:
-                    details['outfitter'] = value
-    
-    # Alternative: parse from data-header__items
-    header_items = soup.find_all('li', class_='data-header__label')
-    for item in header_items:
-        text = item.get_text(strip=True)
-        if 'Current club' in text or 'club:' in text.lower():
-            club_link = item.find('a')
-            if club_link:
-                details['current_club'] = club_link.get_text(strip=True)
-        elif 'Contract expires' in text:
-            details['contract_expires'] = text.replace('Contract expires:', '').strip()
+    doc = tm_parse.document(html)
     
-    # Player data box
-    data_box = soup.find('div', class_='data-header__box')
-    if data_box:
-        items = data_box.find_all('li')
-        for item in items:
-            text = item.get_text(strip=True)
-            if 'Contract expires' in text:
-                details['contract_expires'] = text.replace('Contract expires:', '').strip()
-            elif 'Joined' in text:
-                details['joined'] = text.replace('Joined:', '').strip()
+    # Header + info table (right side), one pass with labels paired to their values
+    fields = tm_parse.profile(doc)
+    details = {k: fields[k] for k in PROFILE_FIELDS if k in fields}
     
-    # Market value
-    mv_div = soup.find('div', class_='data-header__market-value-wrapper')
-    if mv_div:
-        value = mv_div.find('a', class_='data-header__market-value-wrapper')
-        if value:
-            details['market_value'] = value.get_text(strip=True).split('Last')[0].strip()
-    
-    # Stats section
-    stats_box = soup.find('div', {'data-viewport': 'Leistungsdaten'})
-    if stats_box:
-        stats = {}
-        rows = stats_box.find_all('div', class_='tm-player-performance')
-        # Alternative parsing for stats
-        
     # Career stats from performance data
-    perf_table = soup.find('table', class_='items')
-    if perf_table:
-        career_stats = []
-        rows = perf_table.find_all('tr', class_=['odd', 'even'])
-        for row in rows:
-            cells = row.find_all('td')
-            if len(cells) >= 5:
-                season_data = {
-                    'season': cells[0].get_text(strip=True) if cells[0] else '',
-                    'competition': cells[1].get_text(strip=True) if len(cells) > 1 else '',
-                    'appearances': cells[3].get_text(strip=True) if len(cells) > 3 else '',
-                    'goals': cells[4].get_text(strip=True) if len(cells) > 4 else '',
-                    'assists': cells[5].get_text(strip=True) if len(cells) > 5 else '',
-                }
-                if season_data['season']:
-                    career_stats.append(season_data)
-        if career_stats:
-            details['career_stats'] = career_stats
-    
-    # Transfer history
-    transfer_table = soup.find('div', class_='transferhistorie')
-    if transfer_table:
-        transfers = []
-        rows = transfer_table.find_all('div', class_='tm-player-transfer-history-grid')
-        for row in rows:
-            transfer = {}
-            # Parse transfer data
-            transfers.append(transfer)
-        if transfers:
-            details['transfer_history'] = transfers
+    career_stats = []
+    for row in tm_parse.stats_rows(doc):
+        cells = row['cells']
+        season_data = {
+            'season': cells[0],
+            'competition': cells[1] if len(cells) > 1 else '',
+            'appearances': cells[3] if len(cells) > 3 else '',
+            'goals': cells[4] if len(cells) > 4 else '',
+            'assists': cells[5] if len(cells) > 5 else '',
+        }
+        if season_data['season']:
+            career_stats.append(season_data)
+    if career_stats:
+        details['career_stats'] = career_stats
     
     details['profile_url'] = url
     details['scraped_at'] = datetime.now().isoformat()
@@ -183,10 +91,10 @@ def parse_player_profile(html, url):
 def get_player_details(url):
     """Fetch and parse a player's full profile"""
     try:
-        response = requests.get(url, headers=HEADERS, timeout=30)
-        if response.status_code != 200:
+        html = fetch_page(url, kind='profile')
+        if not html:
             return None
-        return parse_player_profile(response.text, url)
+        return parse_player_profile(html, url)
     except Exception as e:
         print(f"    Error fetching profile: {e}")
         return None
@@ -214,6 +122,12 @@ def main():
             completed_names = set(progress.get('completed', []))
             print(f"Resuming: {len(detailed_players)} players already done")
     
+    # Names resolve against every known roster; only true misses are searched
+    store = PlayerStore.for_json()
+    resolver = NameResolver.from_store(store, search=search_player)
+    store.close()
+    print(f"Name index: {len(resolver.entries)} known players")
+    
     print(f"\nStarting detail scraper at {datetime.now()}")
     
     for i, player in enumerate(players):
@@ -224,17 +138,15 @@ def main():
         
         print(f"\n[{i+1}/{len(players)}] {name}")
         
-        # Search for player URL
-        print(f"  Searching...")
-        url = search_player(name, player.get('Club'))
+        # Resolve the player's ID (local index first, search for misses)
+        player_id = resolver.resolve(name, player.get('Club'), player.get('Age'))
+        url = resolver.profile_url(player_id) if player_id else None
         
         if not url:
             print(f"  Not found, skipping")
             completed_names.add(name)
             continue
         
-        time.sleep(random.uniform(2, 4))
-        
         # Get details
         print(f"  Fetching profile: {url}")
         details = get_player_details(url)
@@ -260,18 +172,18 @@ def main():
             }
             with open(progress_file, 'w', encoding='utf-8') as f:
                 json.dump(progress, f, indent=2, ensure_ascii=False)
+            resolver.save()
             print(f"\n  Saved progress: {len(detailed_players)} players")
-        
-        # Rate limiting
-        delay = random.uniform(3, 6)
-        time.sleep(delay)
     
     # Final save
     with open(details_file, 'w', encoding='utf-8') as f:
         json.dump(detailed_players, f, indent=2, ensure_ascii=False)
     
+    resolver.save()
+    
     print(f"\n{'='*60}")
     print(f"DONE! {len(detailed_players)} players with details")
+    print(f"Name resolution: {resolver.report()}")
     print(f"{'='*60}")
 
 if __name__ == "__main__":
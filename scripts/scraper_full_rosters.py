@@ -4,14 +4,14 @@ Transfermarkt Full Roster Scraper for Bacau Scout
 Gets ALL players from every team in each league.
 """
 
-import requests
-from bs4 import BeautifulSoup
 import json
-import time
-import random
 import os
 from datetime import datetime
 
+from fetch_engine import fetch_page
+from team_manifest import load_teams_blocking
+import tm_parse
+
 def get_current_season():
     """Calculate Transfermarkt season year dynamically.
     TM uses start year: Aug 2025 onward = 2025, before Aug 2025 = 2024."""
@@ -20,13 +20,6 @@ def get_current_season():
     return now.year if now.month >= 8 else now.year - 1
 
 
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-    'Accept-Language': 'en-US,en;q=0.5',
-    'Connection': 'keep-alive',
-}
-
 # Leagues with their Transfermarkt URLs
 LEAGUES = [
     # Romania
@@ -87,138 +80,34 @@ LEAGUES = [
     ("MLS Next Pro", "MNP3", "mls-next-pro"),
 ]
 
-def get_teams_in_league(league_code):
-    """Get all teams in a league"""
-    url = f"https://www.transfermarkt.com/wettbewerb/startseite/wettbewerb/{league_code}"
-    
-    try:
-        response = requests.get(url, headers=HEADERS, timeout=30)
-        if response.status_code != 200:
-            print(f"    Error fetching league: HTTP {response.status_code}")
-            return []
-        
-        soup = BeautifulSoup(response.text, 'lxml')
-        teams = []
-        
-        # Find team links in the table
-        table = soup.find('table', class_='items')
-        if not table:
-            # Try alternative layout
-            team_links = soup.find_all('a', href=lambda x: x and '/startseite/verein/' in x)
-            seen = set()
-            for link in team_links:
-                href = link.get('href', '')
-                team_id = href.split('/verein/')[-1].split('/')[0] if '/verein/' in href else None
-                if team_id and team_id not in seen and team_id.isdigit():
-                    seen.add(team_id)
-                    name = link.get('title') or link.get_text(strip=True)
-                    if name and len(name) > 1:
-                        teams.append({
-                            'id': team_id,
-                            'name': name,
-                            'url': f"https://www.transfermarkt.com/team/kader/verein/{team_id}/plus/1"
-                        })
-            return teams
-        
-        rows = table.find_all('tr', class_=['odd', 'even'])
-        for row in rows:
-            link = row.find('a', href=lambda x: x and '/startseite/verein/' in x)
-            if link:
-                href = link.get('href', '')
-                team_id = href.split('/verein/')[-1].split('/')[0] if '/verein/' in href else None
-                if team_id and team_id.isdigit():
-                    name = link.get('title') or link.get_text(strip=True)
-                    teams.append({
-                        'id': team_id,
-                        'name': name,
-                        'url': f"https://www.transfermarkt.com/team/kader/verein/{team_id}/plus/1"
-                    })
-        
-        return teams
-        
-    except Exception as e:
-        print(f"    Error: {e}")
-        return []
+def get_teams_in_league(league_code, league_teams):
+    """Get all teams in a league (from the team lists loaded up front)"""
+    teams = league_teams.get(league_code, [])
+    if not teams:
+        print(f"    Error fetching league {league_code}")
+    for team in teams:
+        team['url'] = f"https://www.transfermarkt.com/team/kader/verein/{team['id']}/plus/1"
+    return teams
 
 def get_team_roster(team):
     """Get all players from a team's roster"""
     url = team['url']
     
     try:
-        response = requests.get(url, headers=HEADERS, timeout=30)
-        if response.status_code != 200:
+        html = fetch_page(url, kind='roster')
+        if not html:
             return []
         
-        soup = BeautifulSoup(response.text, 'lxml')
         players = []
-        
-        # Find player table
-        table = soup.find('table', class_='items')
-        if not table:
-            return []
-        
-        rows = table.find_all('tr', class_=['odd', 'even'])
-        
-        for row in rows:
-            try:
-                player = {'club': team['name'], 'club_id': team['id']}
-                
-                # Player name and link
-                name_cell = row.find('td', class_='hauptlink')
-                if name_cell:
-                    link = name_cell.find('a')
-                    if link:
-                        player['name'] = link.get_text(strip=True)
-                        href = link.get('href', '')
-                        if '/profil/spieler/' in href:
-                            player['player_id'] = href.split('/spieler/')[-1].split('/')[0]
-                            player['profile_url'] = f"https://www.transfermarkt.com{href}"
-                
-                # Position from inline table
-                inline = row.find('table', class_='inline-table')
-                if inline:
-                    pos_row = inline.find_all('tr')
-                    if len(pos_row) > 1:
-                        player['position'] = pos_row[1].get_text(strip=True)
-                
-                # Find all td cells for other data
-                cells = row.find_all('td')
-                for cell in cells:
-                    text = cell.get_text(strip=True)
-                    
-                    # Age (number between 14-50)
-                    if text.isdigit() and 14 <= int(text) <= 50 and 'age' not in player:
-                        player['age'] = text
-                    
-                    # Date of birth (format: Mon DD, YYYY or similar)
-                    if ',' in text and any(m in text for m in ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']):
-                        player['dob'] = text
-                    
-                    # Market value
-                    if '€' in text or ('m' in text.lower() and any(c.isdigit() for c in text)):
-                        if 'market_value' not in player:
-                            player['market_value'] = text
-                
-                # Nationality from flags
-                flags = row.find_all('img', class_='flaggenrahmen')
-                nationalities = []
-                for flag in flags:
-                    nat = flag.get('title', '')
-                    if nat and nat not in nationalities:
-                        nationalities.append(nat)
-                if nationalities:
-                    player['nationality'] = nationalities[0] if len(nationalities) == 1 else nationalities
-                
-                # Shirt number
-                shirt = row.find('div', class_='rn_nummer')
-                if shirt:
-                    player['shirt_number'] = shirt.get_text(strip=True)
-                
-                if player.get('name'):
-                    players.append(player)
-                    
-            except Exception as e:
-                continue
+        for row in tm_parse.roster_rows(tm_parse.document(html), base_url='https://www.transfermarkt.com'):
+            player = {'club': team['name'], 'club_id': team['id']}
+            for key in ('name', 'player_id', 'profile_url', 'position', 'age', 'market_value',
+                        'nationality', 'shirt_number'):
+                if key in row:
+                    player[key] = row[key]
+            if 'date_of_birth' in row:
+                player['dob'] = row['date_of_birth'].split('(')[0].strip()
+            players.append(player)
         
         return players
         
@@ -246,6 +135,7 @@ def main():
     
     print(f"\nFull Roster Scraper started at {datetime.now()}")
     print(f"Leagues to process: {len(LEAGUES)}")
+    league_teams = load_teams_blocking([code for _, code, _ in LEAGUES if code not in completed_leagues])
     
     for league_name, league_code, _ in LEAGUES:
         if league_code in completed_leagues:
@@ -258,7 +148,7 @@ def main():
         
         # Get teams
         print("  Fetching teams...")
-        teams = get_teams_in_league(league_code)
+        teams = get_teams_in_league(league_code, league_teams)
         print(f"  Found {len(teams)} teams")
         
         if not teams:
@@ -266,8 +156,6 @@ def main():
             completed_leagues.append(league_code)
             continue
         
-        time.sleep(random.uniform(2, 4))
-        
         league_players = 0
         for i, team in enumerate(teams):
             team_key = f"{league_code}_{team['id']}"
@@ -301,9 +189,6 @@ def main():
                 with open(progress_file, 'w', encoding='utf-8') as f:
                     json.dump(progress, f, ensure_ascii=False)
                 print(f"    [Progress saved: {len(all_players)} total players]")
-            
-            # Rate limiting
-            time.sleep(random.uniform(3, 5))
         
         completed_leagues.append(league_code)
         print(f"  League total: {league_players} players")
@@ -319,9 +204,6 @@ def main():
             json.dump(progress, f, ensure_ascii=False)
         
         print(f"\nTotal players so far: {len(all_players)}")
-        
-        # Delay between leagues
-        time.sleep(random.uniform(5, 10))
     
     # Final save
     with open(output_file, 'w', encoding='utf-8') as f:
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Early-terminating extraction for head-only lookups.
+
+Some scrapers need two or three values from a profile page (the meta
+description, the position box) but used to download and parse all of it.
+A PageScanner is fed the response in chunks through lxml's incremental
+HTMLPullParser and reports when every Target has been found - or when the
+parser passes a stop tag such as </head> - so the engine can close the
+transfer there. The same scanner also works on a full body (cache/archive).
+
+    found = await fetch_partial(url, [HEADER_POSITION, HEADER_HEIGHT], stop_after=DATA_HEADER)
+    found.get('header_position')
+"""
+
+from lxml import etree
+
+CHUNK_SIZE = 16 * 1024
+
+
+class Target:
+    """One value to pull out of a page as soon as its element closes"""
+
+    def __init__(self, name, tag=None, cls=None, attrs=None, contains=None, value_cls=None, read='text'):
+        self.name = name
+        self.tag = tag
+        self.cls = cls                  # required class token
+        self.attrs = attrs or {}        # required attribute values
+        self.contains = contains        # required substring of the element text
+        self.value_cls = value_cls      # read the value from a descendant with this class
+        self.read = read                # 'text' or an attribute name
+
+    def match(self, el):
+        if self.tag and el.tag != self.tag:
+            return None
+        if self.cls and self.cls not in (el.get('class') or '').split():
+            return None
+        for key, value in self.attrs.items():
+            if el.get(key) != value:
+                return None
+        if self.contains and self.contains not in ''.join(el.itertext()):
+            return None
+        if self.value_cls:
+            found = el.xpath(f'.//*[contains(concat(" ", normalize-space(@class), " "), " {self.value_cls} ")]')
+            if not found:
+                return None
+            el = found[0]
+        if self.read == 'text':
+            value = ' '.join(''.join(el.itertext()).split())
+        else:
+            value = el.get(self.read)
+        return value or None
+
+
+META_DESCRIPTION = Target('meta_description', tag='meta', attrs={'name': 'description'}, read='content')
+DETAIL_POSITION = Target('detail_position', cls='detail-position__position')
+HEADER_POSITION = Target('header_position', tag='li', cls='data-header__label', contains='Position',
+                         value_cls='data-header__content')
+HEADER_DATE_OF_BIRTH = Target('header_date_of_birth', tag='li', cls='data-header__label', contains='Date of birth',
+                              value_cls='data-header__content')
+HEADER_HEIGHT = Target('header_height', tag='li', cls='data-header__label', contains='Height',
+                       value_cls='data-header__content')
+# stop_after for profile header values (the site header is a <header> too)
+DATA_HEADER = Target('data_header', tag='header', cls='data-header', read='class')
+
+
+class PageScanner:
+    """Incremental parser that stops once all targets are found.
+
+    stop_after ends the scan early: a tag name ('head') or a Target for the
+    element whose end is enough (DATA_HEADER).
+    """
+
+    def __init__(self, targets, stop_after=None):
+        self.targets = list(targets)
+        self.stop_after = stop_after
+        self.found = {}
+        self.done = False
+        self.bytes_fed = 0
+        self._parser = etree.HTMLPullParser(events=('end',))
+
+    def feed(self, chunk):
+        """Feed raw bytes; returns True when the transfer can stop"""
+        self.bytes_fed += len(chunk)
+        self._parser.feed(chunk)
+        for _, el in self._parser.read_events():
+            if not isinstance(el.tag, str):
+                continue
+            for target in self.targets:
+                if target.name not in self.found:
+                    value = target.match(el)
+                    if value is not None:
+                        self.found[target.name] = value
+            if len(self.found) == len(self.targets) or self._stops(el):
+                self.done = True
+                break
+        return self.done
+
+    def _stops(self, el):
+        if isinstance(self.stop_after, Target):
+            return self.stop_after.match(el) is not None
+        return el.tag == self.stop_after
+
+    def scan(self, body):
+        """Run over a complete page (e.g. from the cache)"""
+        data = body.encode('utf-8') if isinstance(body, str) else body
+        for start in range(0, len(data), CHUNK_SIZE):
+            if self.feed(data[start:start + CHUNK_SIZE]):
+                break
+        return self.found
+
+
+class StreamStats:
+    def __init__(self):
+        self.partial = 0
+        self.bytes_read = 0
+        self.bytes_saved = 0
+        self.full_sizes = {}    # kind -> (pages, bytes) from complete fetches
+
+    def note_full(self, kind, size):
+        pages, total = self.full_sizes.get(kind, (0, 0))
+        self.full_sizes[kind] = (pages + 1, total + size)
+
+    def note_partial(self, kind, read, content_length=None):
+        self.partial += 1
+        self.bytes_read += read
+        if content_length:
+            full = content_length
+        else:
+            # chunked responses: estimate from complete pages of the same kind
+            pages, total = self.full_sizes.get(kind, (0, 0))
+            full = total / pages if pages else read
+        self.bytes_saved += max(0, int(full) - read)
+
+    def report(self):
+        if not self.partial:
+            return ''
+        return (f"Streaming: {self.partial} partial fetches | {self.bytes_read / 1e6:.1f} MB read | "
+                f"~{self.bytes_saved / 1e6:.1f} MB saved")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Persisted league -> teams manifest, so scrapers don't start with a league
+page per league.
+
+Every roster run used to open with a league-page fetch for each league,
+one after the other - 37+ requests before the first roster, repeated by
+every script. The team lists are now kept in team_manifest.json:
+
+    {"leagues": {"RO1": {"fetched_at": ..., "season": 2025,
+                         "teams": [{"id": "3336", "name": "FC Bacău", "slug": "fc-bacau"}, ...]}}}
+
+An entry is stale once it is older than TTL_DAYS or from an earlier
+season (promotions and relegations happen between seasons). load_teams()
+refreshes all stale leagues of a run concurrently through the fetch engine
+and answers the rest from the file, so a warm start reads no pages at all.
+A league page that fails or lists no clubs keeps its old entry.
+
+    python scripts/team_manifest.py                 # age and size of each league entry
+    python scripts/team_manifest.py --refresh       # refetch every known league now
+    python scripts/team_manifest.py --refresh RO1 RO2
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+from fetch_engine import fetch_many, fetch_pages, run
+import tm_parse
+
+MANIFEST_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'team_manifest.json')
+TTL_DAYS = 7
+LEAGUE_URL = "https://www.transfermarkt.com/wettbewerb/startseite/wettbewerb/{code}"
+
+_manifest = None
+
+def get_current_season():
+    """Calculate Transfermarkt season year dynamically.
+    TM uses start year: Aug 2025 onward = 2025, before Aug 2025 = 2024."""
+    now = datetime.now()
+    return now.year if now.month >= 8 else now.year - 1
+
+def load_manifest(path=MANIFEST_FILE):
+    """The manifest as last saved ({'leagues': {}} before the first run)"""
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    return {'leagues': {}}
+
+def save_manifest(manifest, path=MANIFEST_FILE):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+def manifest():
+    """The manifest of this process, read from disk once"""
+    global _manifest
+    if _manifest is None:
+        _manifest = load_manifest()
+    return _manifest
+
+def is_stale(entry, max_age_days=TTL_DAYS):
+    if not entry or entry.get('season') != get_current_season():
+        return True
+    return time.time() - entry.get('fetched_at', 0) > max_age_days * 86400
+
+def stale_codes(codes, max_age_days=TTL_DAYS):
+    leagues = manifest()['leagues']
+    return [code for code in dict.fromkeys(codes) if is_stale(leagues.get(code), max_age_days)]
+
+def store_pages(codes, pages):
+    """Parse the fetched league pages into the manifest and save it; returns the codes refreshed"""
+    leagues = manifest()['leagues']
+    updated = {}
+    for code, html in zip(codes, pages):
+        teams = tm_parse.league_teams(tm_parse.document(html)) if html else []
+        if teams:
+            updated[code] = {'fetched_at': time.time(), 'season': get_current_season(), 'teams': teams}
+        elif code in leagues:
+            print(f"  [{code}] league page failed, keeping teams from "
+                  f"{datetime.fromtimestamp(leagues[code]['fetched_at']):%Y-%m-%d}", flush=True)
+        else:
+            print(f"  [{code}] league page failed, no teams known", flush=True)
+    if updated:
+        # Another script may have saved leagues of its own since this one loaded the file
+        on_disk = load_manifest()
+        on_disk['leagues'].update(updated)
+        leagues.update(on_disk['leagues'])
+        save_manifest(on_disk)
+    return list(updated)
+
+def teams_of(code):
+    entry = manifest()['leagues'].get(code)
+    return [dict(team) for team in entry['teams']] if entry else []
+
+async def load_teams(codes, max_age_days=TTL_DAYS):
+    """{league_code: teams} for all codes, fetching the stale leagues concurrently"""
+    stale = stale_codes(codes, max_age_days)
+    if stale:
+        start = time.perf_counter()
+        pages = await fetch_many([LEAGUE_URL.format(code=code) for code in stale], kind='league')
+        refreshed = store_pages(stale, pages)
+        print(f"Team manifest: {len(refreshed)}/{len(stale)} leagues refreshed "
+              f"in {time.perf_counter() - start:.1f}s", flush=True)
+    return {code: teams_of(code) for code in codes}
+
+def load_teams_blocking(codes, max_age_days=TTL_DAYS):
+    """load_teams() for synchronous scripts"""
+    stale = stale_codes(codes, max_age_days)
+    if stale:
+        refreshed = store_pages(stale, fetch_pages([LEAGUE_URL.format(code=code) for code in stale], kind='league'))
+        print(f"Team manifest: {len(refreshed)}/{len(stale)} leagues refreshed", flush=True)
+    return {code: teams_of(code) for code in codes}
+
+def print_status(codes=None):
+    leagues = manifest()['leagues']
+    now = time.time()
+    for code in codes or sorted(leagues):
+        entry = leagues.get(code)
+        if not entry:
+            print(f"  {code:6} -")
+            continue
+        age = (now - entry['fetched_at']) / 86400
+        state = 'stale' if is_stale(entry) else 'fresh'
+        print(f"  {code:6} {len(entry['teams']):3} teams  {age:5.1f} days  season {entry.get('season')}  {state}")
+
+async def main():
+    parser = argparse.ArgumentParser(description='Show or refresh the league team manifest')
+    parser.add_argument('--refresh', nargs='*', metavar='CODE', help='refetch these leagues (default: all known)')
+    args = parser.parse_args()
+
+    if args.refresh is not None:
+        codes = args.refresh or sorted(manifest()['leagues'])
+        if not codes:
+            parser.error('the manifest is empty; name the league codes to fetch')
+        await load_teams(codes, max_age_days=0)
+        print_status(codes)
+        return
+    print(f"{MANIFEST_FILE}: {len(manifest()['leagues'])} leagues (TTL {TTL_DAYS} days)")
+    print_status()
+
+if __name__ == '__main__':
+    run(main())
@@ -0,0 +1,579 @@
+#!/usr/bin/env python3
+"""
+lxml parser backend for Transfermarkt pages.
+
+BeautifulSoup (especially with html.parser) plus find_all() with lambda
+filters costs far more CPU per page than the fetch itself once the cache or
+archive is warm. These helpers parse with lxml.html and run precompiled
+XPath expressions for the parts of a page the scrapers actually read:
+
+    doc = document(html)                 # str or raw response bytes
+    roster_rows(doc)                     # squad table, columns mapped from the header
+    club_stats_rows(doc)                 # club performance page, whole squad's season numbers
+    profile(doc)                         # every profile field (info table + header), canonical names
+    header_labels(doc) / info_table(doc) # profile header and info table, label -> value
+    stats_footer(doc) / stats_rows(doc)  # leistungsdaten totals and season rows
+    stats_totals(doc)                    # leistungsdaten 'Total' row, columns mapped from the header
+    transfer_rows(doc)                   # transfer history
+    club_transfer_rows(doc)              # club arrivals/departures for a season
+    market_value_rows(doc) / pager_total(doc)  # league market-value listing
+    league_teams(doc)                    # clubs of a league overview page
+
+All helpers return plain strings/dicts (no tree objects) so callers can map
+fields without touching lxml. `python scripts/bench_parse.py` compares pages/sec
+against the BeautifulSoup code paths.
+"""
+
+import re
+
+from lxml import etree
+from lxml import html as lxml_html
+
+_PARSER = lxml_html.HTMLParser(encoding='utf-8')
+
+
+def _has_class(name):
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+# Squad tables: outer rows only (each has an inline table holding the name link)
+ROSTER_TABLE = etree.XPath(f'//table[{_has_class("items")}][1]')
+HEADER_CELLS = etree.XPath('thead/tr[1]/th')
+HEADER_TITLES = etree.XPath('.//@title')
+BODY_ROWS = etree.XPath('tbody/tr[td]')
+PLAYER_LINK = etree.XPath('.//a[contains(@href, "/profil/spieler/")]')
+INLINE_ROWS = etree.XPath(f'.//table[{_has_class("inline-table")}]//tr')
+PHOTO = etree.XPath(f'.//img[{_has_class("bilderrahmen-fixed")}]')
+FLAGS = etree.XPath(f'.//img[{_has_class("flaggenrahmen")}]/@title')
+
+# Squad table header label -> field; first match wins, '#' must match exactly
+ROSTER_COLUMNS = (
+    ('date of birth', 'date_of_birth'),
+    ('age', 'date_of_birth'),
+    ('player', 'player'),
+    ('nat', 'nationality'),
+    ('height', 'height'),
+    ('foot', 'foot'),
+    ('joined', 'joined'),
+    ('signed from', 'signed_from'),
+    ('contract', 'contract_expires'),
+    ('market value', 'market_value'),
+    ('current club', 'current_club'),
+)
+
+# Performance tables (leistungsdaten/verein/.../plus/1 and a player's
+# leistungsdaten/.../plus/1): the numeric columns are icons, so most labels
+# come from the header spans' titles.
+# More specific markers first ('own goals' before 'goals', ...)
+CLUB_STATS_COLUMNS = (
+    ('player', 'player'),
+    ('in squad', 'in_squad'),
+    ('appearances', 'appearances'),
+    ('own goal', 'own_goals'),
+    ('penalty', 'penalty_goals'),
+    ('minutes per goal', 'minutes_per_goal'),
+    ('minutes', 'minutes'),
+    ('goals', 'goals'),
+    ('assists', 'assists'),
+    ('second yellow', 'second_yellow'),
+    ('yellow-red', 'second_yellow'),
+    ('yellow', 'yellow_cards'),
+    ('red card', 'red_cards'),
+    ('substituted on', 'subs_on'),
+    ('substitutions on', 'subs_on'),
+    ('substituted off', 'subs_off'),
+    ('substitutions off', 'subs_off'),
+    ('points per', 'points_per_game'),
+)
+
+# Profile header / info table (current layout and the older auflistung table)
+HEADER_LABELS = etree.XPath(f'//li[{_has_class("data-header__label")}]')
+HEADER_CONTENT = etree.XPath(f'.//span[{_has_class("data-header__content")}]')
+INFO_LABELS = etree.XPath(f'//div[{_has_class("info-table")}]/span[{_has_class("info-table__content--regular")}]')
+NEXT_SPAN = etree.XPath('following-sibling::span[1]')
+_IS_LABEL = etree.XPath(f'boolean(self::span[{_has_class("info-table__content--regular")}])')
+AUFLISTUNG_ROWS = etree.XPath(f'//table[{_has_class("auflistung")}]//tr[th and td]')
+SHIRT_NUMBER = etree.XPath(f'//span[{_has_class("data-header__shirt-number")}]')
+HEADLINE = etree.XPath(f'//h1[{_has_class("data-header__headline-wrapper")}]')
+PROFILE_PHOTO = etree.XPath(f'//img[{_has_class("data-header__profile-image")}]/@src')
+HEADER_CLUB = etree.XPath(f'//span[{_has_class("data-header__club")}]//a')
+MARKET_VALUE = etree.XPath(f'//a[{_has_class("data-header__market-value-wrapper")}]')
+DETAIL_POSITION = etree.XPath(f'//div[{_has_class("detail-position__position")}]')
+STATS_BOX_SPANS = etree.XPath(f'//div[{_has_class("data-header__box--big")}]//span')
+
+# Performance data (leistungsdaten)
+STATS_FOOTER = etree.XPath(f'//table[{_has_class("items")}]/tfoot/tr')
+STATS_ROWS = etree.XPath(f'//table[{_has_class("items")}]/tbody/tr')
+CENTERED = etree.XPath(f'td[{_has_class("zentriert")}]')
+CENTERED_LINK = etree.XPath(f'td[{_has_class("zentriert")}]//a')
+COMPETITION_LINK = etree.XPath(f'td[{_has_class("hauptlink")}]//a')
+CLUB_LINK = etree.XPath(f'td[{_has_class("no-border-links")}]//a')
+
+# Club transfers page: an "Arrivals" and a "Departures" box per season
+TRANSFER_BOXES = etree.XPath(f'//div[{_has_class("box")}][h2 and .//table[{_has_class("items")}]]')
+BOX_ITEMS_ROWS = etree.XPath(f'.//table[{_has_class("items")}]/tbody/tr[td]')
+CLUB_LINKS = etree.XPath('.//a[contains(@href, "/startseite/verein/")]')
+CLUB_ID = re.compile(r'/verein/(\d+)')
+
+# League overview (wettbewerb/startseite): every club link, slug first
+CLUB_SLUG = re.compile(r'^/([^/]+)/startseite/verein/')
+
+# League market-value listing (wettbewerb/marktwerte), 25 players a page
+LISTING_ROWS = etree.XPath(f'//table[{_has_class("items")}]/tbody/tr[td]')
+LISTING_VALUE = etree.XPath(f'td[{_has_class("rechts")} and {_has_class("hauptlink")}]')
+PAGER_HREFS = etree.XPath(f'//div[{_has_class("pager")}]//a/@href')
+
+# Transfer history
+TRANSFER_ROWS = etree.XPath(f'//div[{_has_class("tm-transfer-history")}]//tbody/tr'
+                            f' | //table[{_has_class("transfer-history")}]//tbody/tr')
+TRANSFER_CLUBS = etree.XPath(f'td[{_has_class("no-border-links")} or {_has_class("vereinsname")}]//a')
+TRANSFER_FEE = etree.XPath(f'td[{_has_class("rechts")}]//a | td[{_has_class("transfer-fee")}]')
+
+# Info-table label (lower case, no colon) -> canonical field name
+INFO_FIELDS = {
+    'date of birth': 'date_of_birth',
+    'date of birth/age': 'date_of_birth',
+    'born': 'date_of_birth',
+    'place of birth': 'place_of_birth',
+    'height': 'height',
+    'citizenship': 'citizenship',
+    'position': 'position',
+    'foot': 'foot',
+    'player agent': 'agent',
+    'agent': 'agent',
+    'current club': 'current_club',
+    'joined': 'joined',
+    'contract expires': 'contract_expires',
+    'last contract extension': 'contract_extended',
+    'contract option': 'contract_option',
+    'on loan from': 'on_loan_from',
+    'contract there expires': 'loan_contract_expires',
+    'outfitter': 'outfitter',
+    'name in home country': 'name_in_home_country',
+    'full name': 'full_name',
+}
+
+PLAYER_ID = re.compile(r'/spieler/(\d+)')
+PAGE_NUMBER = re.compile(r'/page/(\d+)')
+AGE = re.compile(r'\((\d+)\)')
+
+
+def document(page):
+    """Parse a page (str or bytes) into an lxml tree"""
+    if isinstance(page, str):
+        page = page.encode('utf-8')
+    return lxml_html.document_fromstring(page, parser=_PARSER)
+
+
+def text(el):
+    """Same as BeautifulSoup's get_text(strip=True)"""
+    return ''.join(t.strip() for t in el.itertext())
+
+
+def spaced_text(el):
+    """Element text with whitespace runs collapsed ("May 9, 2000 (25)")"""
+    return ' '.join(''.join(el.itertext()).split())
+
+
+def _first(matches):
+    return matches[0] if matches else None
+
+
+def _first_text(matches):
+    return text(matches[0]) if matches else None
+
+
+def header_columns(table, markers):
+    """{cell index: field} read once from a table header; markers are (label part, field) pairs"""
+    columns = {}
+    index = 0
+    for th in HEADER_CELLS(table):
+        # The '#' header carries title="Shirt number", so test its text alone
+        if text(th) == '#':
+            field = 'shirt_number'
+        else:
+            label = ' '.join([text(th)] + HEADER_TITLES(th)).lower()
+            field = next((f for marker, f in markers if marker in label), None)
+        if field and field not in columns.values():
+            columns[index] = field
+        index += int(th.get('colspan') or 1)
+    return columns
+
+
+def roster_columns(table):
+    """{cell index: field} read once from the squad table header"""
+    return header_columns(table, ROSTER_COLUMNS)
+
+
+def _player_cell(cell, player):
+    links = PLAYER_LINK(cell)
+    if not links:
+        return
+    href = links[0].get('href', '')
+    match = PLAYER_ID.search(href)
+    if not match:
+        return
+    player['player_id'] = match.group(1)
+    player['href'] = href
+    player['name'] = text(links[0])
+    inline = INLINE_ROWS(cell)
+    if len(inline) > 1:
+        player['position'] = text(inline[1])
+    photo = PHOTO(cell)
+    if photo:
+        player['photo_url'] = photo[0].get('data-src') or photo[0].get('src')
+
+
+def roster_rows(doc, base_url=None):
+    """Players from a squad (kader) table, one pass per row.
+
+    Columns are identified from the header, so a value is only read from
+    its own column (a shirt number can't be taken for an age). Keys match
+    players.json: player_id, name, position, age, date_of_birth, nationality
+    (string, or list for dual nationals), height, foot, market_value, ...
+    plus href and, given base_url, profile_url.
+    """
+    tables = ROSTER_TABLE(doc)
+    if not tables:
+        return []
+    columns = roster_columns(tables[0])
+    rows = []
+    seen = set()
+    for tr in BODY_ROWS(tables[0]):
+        cells = tr.findall('td')
+        player = {}
+        for index, field in columns.items():
+            if index >= len(cells):
+                continue
+            cell = cells[index]
+            if field == 'player':
+                _player_cell(cell, player)
+            elif field == 'nationality':
+                nats = list(dict.fromkeys(FLAGS(cell)))
+                if nats:
+                    player['nationality'] = nats[0] if len(nats) == 1 else nats
+            else:
+                value = text(cell)
+                if not value or value == '-':
+                    continue
+                if field == 'date_of_birth':
+                    age = AGE.search(value)
+                    if age and 14 <= int(age.group(1)) <= 50:
+                        player['age'] = int(age.group(1))
+                elif field == 'foot':
+                    value = value.lower()
+                player[field] = value
+        if 'player_id' not in player:
+            # No usable "Player" header: fall back to the row's profile link
+            _player_cell(tr, player)
+        if 'player_id' not in player or player['player_id'] in seen:
+            continue
+        seen.add(player['player_id'])
+        if base_url:
+            player['profile_url'] = base_url + player['href']
+        rows.append(player)
+    return rows
+
+
+def _count(value):
+    """Stats cell as a number: '-' is 0, minutes lose their 1.234' formatting"""
+    value = value.replace("'", '').replace('.', '')
+    return int(value) if value.isdigit() else 0
+
+
+def club_stats_rows(doc):
+    """Per-player season numbers from a club performance page (whole squad, one page).
+
+    [{player_id, name, appearances, goals, assists, minutes, yellow_cards, ...}];
+    columns are mapped from the header like roster_rows, '-' counts as 0.
+    """
+    tables = ROSTER_TABLE(doc)
+    if not tables:
+        return []
+    columns = header_columns(tables[0], CLUB_STATS_COLUMNS)
+    rows = []
+    seen = set()
+    for tr in BODY_ROWS(tables[0]):
+        cells = tr.findall('td')
+        player = {}
+        for index, field in columns.items():
+            if index >= len(cells):
+                continue
+            if field == 'player':
+                _player_cell(cells[index], player)
+            elif field == 'points_per_game':
+                value = text(cells[index])
+                if value and value != '-':
+                    player[field] = value
+            elif field != 'shirt_number':
+                player[field] = _count(text(cells[index]))
+        if 'player_id' not in player:
+            _player_cell(tr, player)
+        if 'player_id' not in player or player['player_id'] in seen:
+            continue
+        seen.add(player['player_id'])
+        player.pop('href', None)
+        player.pop('photo_url', None)
+        player.pop('position', None)
+        rows.append(player)
+    return rows
+
+
+def header_labels(doc):
+    """Profile header 'Label: value' items, e.g. {'Position': 'Centre-Back'}"""
+    labels = {}
+    for li in HEADER_LABELS(doc):
+        content = HEADER_CONTENT(li)
+        if not content:
+            continue
+        label = (li.text or '').strip().rstrip(':')
+        if label:
+            labels[label] = text(content[0])
+    return labels
+
+
+def info_table(doc):
+    """Profile info table as {lower-case label without ':': value}.
+
+    Each label is paired with the span that follows it, never by position
+    in a list of all spans - that pairing shifted fields (height ended up in
+    citizenship) whenever a label had no value. A label followed directly by
+    another label has no value and is skipped.
+    """
+    info = {}
+    for label_el in INFO_LABELS(doc):
+        value = NEXT_SPAN(label_el)
+        if value and not _IS_LABEL(value[0]):
+            info.setdefault(spaced_text(label_el).lower().rstrip(':'), spaced_text(value[0]))
+    for row in AUFLISTUNG_ROWS(doc):
+        info.setdefault(spaced_text(row.find('th')).lower().rstrip(':'), spaced_text(row.find('td')))
+    return info
+
+
+def info_fields(doc):
+    """Info table under canonical field names (INFO_FIELDS), plus age"""
+    fields = {}
+    for label, value in info_table(doc).items():
+        field = INFO_FIELDS.get(label)
+        if field and value and value != '-':
+            fields.setdefault(field, value)
+    if 'date_of_birth' in fields:
+        age = AGE.search(fields['date_of_birth'])
+        if age:
+            fields['age'] = int(age.group(1))
+    return fields
+
+
+def profile(doc):
+    """Every profile field the scrapers use, from one parse of the page.
+
+    Info-table fields (see INFO_FIELDS) plus header values: full_name,
+    shirt_number, photo_url, current_club, market_value, main_position.
+    The info table wins where both have a value.
+    """
+    fields = info_fields(doc)
+    headline = _first(HEADLINE(doc))
+    if headline is not None:
+        name = spaced_text(headline)
+        fields.setdefault('full_name', re.sub(r'^#\d+\s*', '', name))
+    shirt = _first(SHIRT_NUMBER(doc))
+    if shirt is not None:
+        fields['shirt_number'] = text(shirt).replace('#', '')
+    photo = PROFILE_PHOTO(doc)
+    if photo:
+        fields['photo_url'] = photo[0]
+    club = _first(HEADER_CLUB(doc))
+    if club is not None:
+        fields.setdefault('current_club', text(club))
+    value = _first(MARKET_VALUE(doc))
+    if value is not None:
+        fields['market_value'] = spaced_text(value).split('Last update')[0].strip()
+    position = _first(DETAIL_POSITION(doc))
+    if position is not None:
+        fields['main_position'] = text(position)
+    return fields
+
+
+def profile_header(doc):
+    """Shirt number, market value, main position and the header stats box spans"""
+    return {
+        'shirt_number': _first_text(SHIRT_NUMBER(doc)),
+        'market_value': _first_text(MARKET_VALUE(doc)),
+        'main_position': _first_text(DETAIL_POSITION(doc)),
+        'stats_box': [text(span) for span in STATS_BOX_SPANS(doc)],
+    }
+
+
+def stats_footer(doc):
+    """Cell texts of the performance table's 'Total' footer row, or []"""
+    for tr in STATS_FOOTER(doc):
+        cells = [text(td) for td in tr.iter('td')]
+        if cells and 'total' in cells[0].lower():
+            return cells
+    return []
+
+
+def _stats_counts(cells, texts, columns):
+    """{field: number} of a performance table row, cells placed by their colspan"""
+    counts = {}
+    index = 0
+    for td, value in zip(cells, texts):
+        field = columns.get(index)
+        if field and field not in ('player', 'shirt_number', 'points_per_game'):
+            counts[field] = _count(value)
+        index += int(td.get('colspan') or 1)
+    return counts
+
+
+def _stats_columns(doc):
+    tables = ROSTER_TABLE(doc)
+    return header_columns(tables[0], CLUB_STATS_COLUMNS) if tables else {}
+
+
+def stats_totals(doc):
+    """{appearances, goals, assists, minutes, ...} of the 'Total' footer row, {} if there is none"""
+    columns = _stats_columns(doc)
+    for tr in STATS_FOOTER(doc):
+        cells = tr.findall('td')
+        texts = [text(td) for td in cells]
+        if texts and 'total' in texts[0].lower():
+            return _stats_counts(cells, texts, columns)
+    return {}
+
+
+def stats_rows(doc):
+    """Season rows of the performance table; 'counts' holds the numbers mapped from the header"""
+    columns = _stats_columns(doc)
+    rows = []
+    for tr in STATS_ROWS(doc):
+        cells = tr.findall('td')
+        if len(cells) < 5:
+            continue
+        # Each cell's text once; 'numbers' are the centered cells among them
+        texts = [text(td) for td in cells]
+        rows.append({
+            'cells': texts,
+            'season': _first_text(CENTERED_LINK(tr)),
+            'competition': _first_text(COMPETITION_LINK(tr)),
+            'club': _first_text(CLUB_LINK(tr)),
+            'numbers': [value for td, value in zip(cells, texts) if 'zentriert' in td.get('class', '').split()],
+            'counts': _stats_counts(cells, texts, columns),
+        })
+    return rows
+
+
+def market_value_rows(doc):
+    """Rows of a league market-value listing page:
+    [{player_id, name, position, age, nationality, club, club_id, market_value}]
+    """
+    tables = ROSTER_TABLE(doc)
+    # The rank column is numeric too, so age is only read from its own column
+    columns = header_columns(tables[0], (('age', 'age'),)) if tables else {}
+    age_column = next((index for index, field in columns.items() if field == 'age'), None)
+    rows = []
+    for tr in LISTING_ROWS(doc):
+        player = {}
+        _player_cell(tr, player)
+        if 'player_id' not in player:
+            continue
+        value = LISTING_VALUE(tr)
+        row = {'player_id': player['player_id'], 'name': player['name'], 'position': player.get('position', ''),
+               'market_value': text(value[0]) if value else None}
+        cells = tr.findall('td')
+        if age_column is not None and age_column < len(cells) and text(cells[age_column]).isdigit():
+            row['age'] = text(cells[age_column])
+        for link in CLUB_LINKS(tr):
+            club = link.get('title') or text(link)
+            if club and len(club) > 1:
+                row['club'] = club
+                row['club_id'] = CLUB_ID.search(link.get('href')).group(1)
+                break
+        nats = list(dict.fromkeys(FLAGS(tr)))
+        if nats:
+            row['nationality'] = nats[0] if len(nats) == 1 else nats
+        rows.append(row)
+    return rows
+
+
+def pager_total(doc):
+    """Page count of a paged listing; the pager's "last page" link carries it (1 without a pager)"""
+    pages = [int(m.group(1)) for href in PAGER_HREFS(doc) for m in [PAGE_NUMBER.search(href)] if m]
+    return max(pages + [1])
+
+
+def league_teams(doc):
+    """[{id, name, slug}] of the clubs linked from a league overview page, in page order"""
+    teams = []
+    seen = set()
+    for link in CLUB_LINKS(doc):
+        href = link.get('href', '')
+        match = CLUB_ID.search(href)
+        if not match or match.group(1) in seen:
+            continue
+        name = link.get('title') or text(link)
+        if not name or len(name) < 2:
+            continue
+        seen.add(match.group(1))
+        slug = CLUB_SLUG.match(href)
+        teams.append({'id': match.group(1), 'name': name, 'slug': slug.group(1) if slug else None})
+    return teams
+
+
+def club_transfer_rows(doc):
+    """Moves on a club transfers page: [{direction: 'in'|'out', player_id, name, club, club_id, fee}].
+
+    club is the other side of the move (where an arrival came from, where a
+    departure went).
+    """
+    moves = []
+    for box in TRANSFER_BOXES(doc):
+        headline = text(box.find('h2')).lower()
+        if 'arrival' in headline:
+            direction = 'in'
+        elif 'departure' in headline:
+            direction = 'out'
+        else:
+            continue
+        for tr in BOX_ITEMS_ROWS(box):
+            player = {}
+            _player_cell(tr, player)
+            if 'player_id' not in player:
+                continue
+            move = {'direction': direction, 'player_id': player['player_id'], 'name': player['name']}
+            for link in CLUB_LINKS(tr):
+                club = link.get('title') or text(link)
+                if club:
+                    move['club'] = club
+                    club_id = CLUB_ID.search(link.get('href', ''))
+                    if club_id:
+                        move['club_id'] = club_id.group(1)
+                    break
+            cells = tr.findall('td')
+            if cells and 'rechts' in (cells[-1].get('class') or ''):
+                move['fee'] = text(cells[-1])
+            moves.append(move)
+    return moves
+
+
+def transfer_rows(doc):
+    """[{season, date, from_club, to_club, from_club_id, to_club_id, fee}] from the transfer history"""
+    transfers = []
+    for tr in TRANSFER_ROWS(doc):
+        cells = tr.findall('td')
+        if not cells:
+            continue
+        transfer = {'season': text(cells[0])}
+        dates = CENTERED(tr)
+        if dates:
+            transfer['date'] = text(dates[0])
+        for side, link in zip(('from_club', 'to_club'), TRANSFER_CLUBS(tr)):
+            transfer[side] = text(link)
+            club_id = CLUB_ID.search(link.get('href') or '')
+            if club_id:
+                transfer[f'{side}_id'] = club_id.group(1)
+        fee = TRANSFER_FEE(tr)
+        if fee:
+            transfer['fee'] = text(fee[0])
+        if transfer.get('season') or transfer.get('date'):
+            transfers.append(transfer)
+    return transfers